@@ -70,6 +70,8 @@ def main():
                 logger.info(f"Date of Birth: {document_data['dateOfBirth']}")
             if "licenseNumber" in document_data:
                 logger.info(f"License Number: {document_data['licenseNumber']}")
+            if "licenceNumber" in document_data:
+                logger.info(f"Licence Number: {document_data['licenceNumber']}")
             if "passportNumber" in document_data:
                 logger.info(f"Passport Number: {document_data['passportNumber']}")
         
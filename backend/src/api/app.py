@@ -1,15 +1,32 @@
 """FastAPI application for the backend API."""
 
 import os
+import shutil
 import tempfile
 import logging
-from typing import Dict, Any, Optional
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException
+import threading
+import uuid
+from typing import Dict, Any, List, Optional, Tuple
+from fastapi import FastAPI, File, UploadFile, Form, Header, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 
+from backend.src.api.jobs import Job, JobManager, count_pages, format_event
+from backend.src.api.uploads import StoredUpload, check_content_length, iter_upload, store_upload
+from backend.src.config.settings import Settings
+from backend.src.core.planner import plan_statement
+from backend.src.core.result_store import StoredResult, get_result_store, pipeline_version
+from backend.src.core.scheduler import get_call_scheduler, job_priority, lane_for
+from backend.src.core.single_flight import get_single_flight
 from backend.src.core.statement_processor import StatementProcessor
+from backend.src.services.client_registry import get_gemini_client
+from backend.src.services.credential_pool import get_credential_pool
+from backend.src.utils.exceptions import IdempotencyConflictError, JobRejectedError, UploadRejectedError
 from backend.src.utils.logging_utils import setup_logger
+from backend.src.utils.metrics import CONTENT_TYPE, IN_FLIGHT, QUEUE_DEPTH, REGISTRY
+from backend.src.utils.remote_files import get_remote_file_manager
 
 # Set up logging
 logger = setup_logger("api", level=logging.INFO)
@@ -30,14 +47,99 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    """Reject uploads declared larger than Settings.MAX_FILE_SIZE before their body is read."""
+    if request.method == "POST":
+        # A batch holds up to Settings.BATCH_MAX_DOCUMENTS files
+        max_size = Settings.MAX_FILE_SIZE
+        if request.url.path == "/process/batch":
+            max_size *= Settings.BATCH_MAX_DOCUMENTS
+        try:
+            check_content_length(request.headers.get("content-length"), max_size)
+        except UploadRejectedError as e:
+            return JSONResponse(status_code=e.status_code, content={"detail": str(e)})
+    return await call_next(request)
+
 # Create statement processor
 processor = StatementProcessor()
 
+def _lookup_result(
+    upload: StoredUpload,
+    version: str,
+    idempotency_key: Optional[str]
+) -> Tuple[str, Optional[StoredResult]]:
+    """
+    Return the job id of a request, which is the earlier job's when its idempotency key
+    was seen before, and the stored result it can be answered with, if any.
+
+    Raises:
+        IdempotencyConflictError: The idempotency key was used for a different document
+    """
+    job_id = uuid.uuid4().hex
+    store = get_result_store()
+    if store is None:
+        return job_id, None
+    if idempotency_key:
+        job_id = store.claim_key(idempotency_key, job_id, upload.sha256)
+    return job_id, store.get_job(job_id) or store.get(upload.sha256, version)
+
+def _store_result(job_id: str, sha256: str, version: str, result: Dict[str, Any]) -> None:
+    """Keep a complete result in the result store (without the trace or profile of the run)."""
+    store = get_result_store()
+    if store is not None and result.get("complete"):
+        store.put(job_id, sha256, version, {key: value for key, value in result.items() if key not in ("trace", "profile")})
+
+def _profile_options(x_profile: Optional[str], job_id: str) -> Dict[str, Any]:
+    """
+    Options profiling a job when its X-Profile header is set (or Settings.PROFILING_ENABLED).
+    The reports are kept in Settings.PROFILE_DIR/<job_id>, since the job's own directory
+    is temporary.
+    """
+    if not Settings.PROFILING_ENABLED and (x_profile or "").strip().lower() not in ("1", "true", "yes"):
+        return {}
+    return {"profile": True, "profile_dir": os.path.join(Settings.PROFILE_DIR, job_id)}
+
+def _run_job(job: Job) -> Dict[str, Any]:
+    result = processor.process_pdf_statement(
+        pdf_path=job.pdf_path,
+        output_dir=job.work_dir,
+        on_progress=job.on_progress,
+        **job.options
+    )
+    _store_result(job.job_id, job.sha256, job.pipeline_version, result)
+    return result
+
+# Asynchronous jobs submitted to POST /jobs
+jobs = JobManager(_run_job)
+QUEUE_DEPTH.set_function(lambda: jobs.stats()["queued_jobs"], queue="api_jobs")
+IN_FLIGHT.set_function(lambda: jobs.stats()["running"], kind="api_jobs")
+
 class ProcessResponse(BaseModel):
     """Response model for the process endpoint."""
     success: bool
     message: str
     data: Optional[Dict[str, Any]] = None
+    # Id by which the result can be fetched again at GET /jobs/{job_id}
+    job_id: Optional[str] = None
+
+class JobSubmission(BaseModel):
+    """Response model for the job submission endpoint."""
+    job_id: str
+    status: str
+    pages: int
+    status_url: str
+
+def _sweep_orphans():
+    # Each key of the credential pool has its own file store
+    for credential in get_credential_pool().credentials:
+        get_remote_file_manager().sweep_orphans(get_gemini_client(credential.api_key))
+
+@app.on_event("startup")
+def sweep_orphaned_uploads():
+    """Queue uploads left behind by earlier processes for deletion."""
+    if Settings.GEMINI_API_KEYS:
+        threading.Thread(target=_sweep_orphans, name="orphan-sweep", daemon=True).start()
 
 @app.get("/")
 async def root():
@@ -47,7 +149,13 @@ async def root():
 @app.post("/process", response_model=ProcessResponse)
 async def process_statement(
     file: UploadFile = File(...),
-    use_gemini: bool = Form(False)
+    use_gemini: bool = Form(False),
+    deadline_seconds: Optional[float] = Form(None),
+    lane: Optional[str] = Form(None),
+    tenant: Optional[str] = Form(None),
+    include_trace: bool = Form(False),
+    idempotency_key: Optional[str] = Header(None),
+    x_profile: Optional[str] = Header(None)
 ):
     """
     Process a financial statement PDF.
@@ -55,9 +163,22 @@ async def process_statement(
     Args:
         file: The PDF file to process
         use_gemini: Whether to use Gemini instead of OpenAI
+        deadline_seconds: Respond within this many seconds with the stages completed by
+            then; data["complete"] is False and data["incomplete"] lists the rest
+        lane: Scheduling lane, "interactive" (default) or "bulk"
+        tenant: Tenant the statement belongs to; tenants in a lane take turns
+        include_trace: Return the job's trace timeline in data["trace"] (Chrome
+            trace-event format, see utils/tracing.py)
+        idempotency_key: Idempotency-Key header; a retried request with the same key
+            is answered with the earlier request's job
+        x_profile: X-Profile header; "1" profiles each stage of the job into
+            Settings.PROFILE_DIR/<job_id>, with the figures in data["profile"]
         
     Returns:
-        ProcessResponse object with the processing results
+        ProcessResponse object with the processing results. A document already
+        processed by the same pipeline version is answered from the result store,
+        without a trace.
+        422 when the idempotency key was used for a different document.
     """
     try:
         # Check if the file is a PDF
@@ -66,24 +187,47 @@ async def process_statement(
             
         # Create a temporary directory for processing
         with tempfile.TemporaryDirectory() as temp_dir:
-            # Save the uploaded file
-            temp_file_path = os.path.join(temp_dir, file.filename)
-            with open(temp_file_path, "wb") as f:
-                f.write(await file.read())
+            # Stream the uploaded file to disk
+            upload = await store_upload(iter_upload(file), temp_dir, file.filename)
+
+            # Documents processed before by this pipeline version are answered at once
+            version = pipeline_version(use_gemini=use_gemini, chunk_count=3)
+            job_id, stored = _lookup_result(upload, version, idempotency_key)
+            if stored is not None:
+                return ProcessResponse(
+                    success=True,
+                    message=f"Returned the stored result for {file.filename}",
+                    data=stored.result,
+                    job_id=stored.job_id
+                )
                 
-            # Process the PDF statement
-            result = processor.process_pdf_statement(
-                pdf_path=temp_file_path,
-                output_dir=temp_dir,
-                use_gemini=use_gemini
-            )
+            # Process the PDF statement, its provider calls scheduled in the job's lane
+            def run_statement() -> Dict[str, Any]:
+                with job_priority(lane, tenant):
+                    return processor.process_pdf_statement(
+                        pdf_path=upload.path,
+                        output_dir=temp_dir,
+                        use_gemini=use_gemini,
+                        deadline_seconds=deadline_seconds,
+                        include_trace=include_trace,
+                        **_profile_options(x_profile, job_id)
+                    )
+
+            # The pipeline blocks for the whole job; keep the event loop free meanwhile
+            result = await run_in_threadpool(run_statement)
+            _store_result(job_id, upload.sha256, version, result)
             
             return ProcessResponse(
                 success=True,
                 message=f"Successfully processed {file.filename}",
-                data=result
+                data=result,
+                job_id=job_id
             )
             
+    except UploadRejectedError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except IdempotencyConflictError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         logger.error(f"Error processing statement: {str(e)}")
         return ProcessResponse(
@@ -92,7 +236,269 @@ async def process_statement(
             data=None
         )
 
+@app.post("/process/batch", response_model=ProcessResponse)
+async def process_statement_batch(
+    files: List[UploadFile] = File(...),
+    use_gemini: bool = Form(False),
+    deadline_seconds: Optional[float] = Form(None),
+    lane: Optional[str] = Form(None),
+    tenant: Optional[str] = Form(None)
+):
+    """
+    Process several financial statement PDFs, e.g. an applicant's monthly statements,
+    in one request.
+    
+    Args:
+        files: The PDF files to process, at most Settings.BATCH_MAX_DOCUMENTS
+        use_gemini: Whether to use Gemini instead of OpenAI
+        deadline_seconds: Respond within this many seconds with the stages of each
+            document completed by then
+        lane: Scheduling lane, "interactive" (default) or "bulk"
+        tenant: Tenant the statements belong to; tenants in a lane take turns
+        
+    Returns:
+        ProcessResponse whose data holds "documents", the result (or error) of each
+        file in the order uploaded, and "summary", the aggregate across statements
+    """
+    if len(files) > Settings.BATCH_MAX_DOCUMENTS:
+        raise HTTPException(status_code=400, detail=f"At most {Settings.BATCH_MAX_DOCUMENTS} files per batch")
+    if not all(file.filename.lower().endswith(".pdf") for file in files):
+        raise HTTPException(status_code=400, detail="Files must be PDFs")
+    try:
+        lane = lane_for(lane)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # Each upload gets its own directory, as brokers' file names often repeat
+        documents = []
+        for i, file in enumerate(files, start=1):
+            upload_dir = os.path.join(temp_dir, f"upload_{i}")
+            os.makedirs(upload_dir)
+            try:
+                upload = await store_upload(iter_upload(file), upload_dir, file.filename)
+            except UploadRejectedError as e:
+                raise HTTPException(status_code=e.status_code, detail=f"{file.filename}: {str(e)}")
+            documents.append({"filename": file.filename, "sha256": upload.sha256, "path": upload.path})
+
+        def run_batch() -> Dict[str, Any]:
+            with job_priority(lane, tenant):
+                return processor.process_pdf_batch(
+                    documents,
+                    output_dir=temp_dir,
+                    use_gemini=use_gemini,
+                    deadline_seconds=deadline_seconds
+                )
+
+        # The documents run on their own threads; keep the event loop free meanwhile
+        result = await run_in_threadpool(run_batch)
+
+    succeeded = result["summary"]["succeeded"]
+    return ProcessResponse(
+        success=succeeded > 0,
+        message=f"Processed {succeeded} of {len(files)} statement(s)",
+        data=result
+    )
+
+@app.post("/plan")
+async def plan_statement_job(
+    file: UploadFile = File(...),
+    use_gemini: bool = Form(False),
+    chunk_count: int = Form(3)
+):
+    """
+    Plan the processing of a financial statement PDF without running it or
+    contacting any provider (see core/planner.py).
+
+    Args:
+        file: The PDF file to plan
+        use_gemini: Whether to plan for Gemini instead of OpenAI
+        chunk_count: Number of chunks the PDF would be split into
+
+    Returns:
+        The plan: the document's pages and text layer, its chunks, the stored result
+        it would be answered with, the uploads and model calls it would make, and the
+        estimated tokens, cost and wall-clock time
+    """
+    if not file.filename.lower().endswith(".pdf"):
+        raise HTTPException(status_code=400, detail="File must be a PDF")
+    if chunk_count < 1:
+        raise HTTPException(status_code=400, detail="chunk_count must be at least 1")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        try:
+            upload = await store_upload(iter_upload(file), temp_dir, file.filename)
+            # Reading every page's text layer is CPU work; keep the event loop free meanwhile
+            return await run_in_threadpool(plan_statement, upload.path, use_gemini, chunk_count)
+        except UploadRejectedError as e:
+            raise HTTPException(status_code=e.status_code, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/jobs", response_model=JobSubmission, status_code=202)
+async def submit_job(
+    response: Response,
+    file: UploadFile = File(...),
+    use_gemini: bool = Form(False),
+    deadline_seconds: Optional[float] = Form(None),
+    lane: Optional[str] = Form(None),
+    tenant: Optional[str] = Form(None),
+    include_trace: bool = Form(False),
+    idempotency_key: Optional[str] = Header(None),
+    x_profile: Optional[str] = Header(None)
+):
+    """
+    Queue a financial statement PDF for processing and return at once.
+
+    Args:
+        file: The PDF file to process
+        use_gemini: Whether to use Gemini instead of OpenAI
+        deadline_seconds: Finish the job within this many seconds with the stages completed by then
+        lane: Scheduling lane, "interactive" (default) or "bulk"
+        tenant: Tenant the statement belongs to; tenants in a lane take turns
+        include_trace: Include the job's trace timeline in its result's "trace"
+        idempotency_key: Idempotency-Key header; a retried request with the same key
+            is answered with the earlier request's job
+        x_profile: X-Profile header; "1" profiles each stage of the job into
+            Settings.PROFILE_DIR/<job_id>, with the figures in its result's "profile"
+
+    Returns:
+        202 with the job id; poll GET /jobs/{job_id} for progress and the result.
+        200 with the job id of the stored result when the document was processed
+        before by the same pipeline version, or with the job already queued or running
+        for the idempotency key. 429 with a Retry-After header when the service is
+        at capacity, 413 when the file exceeds Settings.MAX_FILE_SIZE, 415 when it is
+        not a PDF and 422 when the idempotency key was used for a different document.
+    """
+    if not file.filename.lower().endswith(".pdf"):
+        raise HTTPException(status_code=400, detail="File must be a PDF")
+    try:
+        lane = lane_for(lane)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # The upload lives in the job's work directory until the job finishes
+    work_dir = tempfile.mkdtemp(prefix="api_job_")
+    try:
+        upload = await store_upload(iter_upload(file), work_dir, file.filename)
+        pages = await run_in_threadpool(count_pages, upload.path)
+    except UploadRejectedError as e:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except ValueError as e:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Answer from the result store, or with the job the idempotency key already started
+    version = pipeline_version(use_gemini=use_gemini, chunk_count=3)
+    try:
+        job_id, stored = _lookup_result(upload, version, idempotency_key)
+    except IdempotencyConflictError as e:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        raise HTTPException(status_code=422, detail=str(e))
+    existing = jobs.get(job_id)
+    if stored is not None or (existing is not None and existing.status != "failed"):
+        shutil.rmtree(work_dir, ignore_errors=True)
+        job_id = stored.job_id if stored is not None else job_id
+        status = "succeeded" if stored is not None else existing.status
+        response.status_code = 200
+        response.headers["Location"] = f"/jobs/{job_id}"
+        return JobSubmission(job_id=job_id, status=status, pages=pages, status_url=f"/jobs/{job_id}")
+
+    job = Job(
+        pdf_path=upload.path,
+        work_dir=work_dir,
+        pages=pages,
+        sha256=upload.sha256,
+        pipeline_version=version,
+        options={
+            "use_gemini": use_gemini,
+            "deadline_seconds": deadline_seconds,
+            "include_trace": include_trace,
+            **_profile_options(x_profile, job_id)
+        },
+        lane=lane,
+        tenant=tenant,
+        job_id=job_id
+    )
+    try:
+        jobs.submit(job)
+    except JobRejectedError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+    status_url = f"/jobs/{job.job_id}"
+    response.headers["Location"] = status_url
+    return JobSubmission(job_id=job.job_id, status=job.status, pages=pages, status_url=status_url)
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Status of a job: queued, running, succeeded (with "result") or failed (with
+    "error"), and the latest status of each pipeline stage in "stages". Once a job
+    is no longer kept in memory, its result is read from the result store.
+    """
+    job = jobs.get(job_id)
+    if job is not None:
+        return job.to_dict()
+    store = get_result_store()
+    stored = store.get_job(job_id) if store is not None else None
+    if stored is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return stored.to_dict()
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, request: Request, format: Optional[str] = None):
+    """
+    Stream a job's pipeline events as they happen, from the first event (or the one
+    after the Last-Event-ID header) until the closing "job" event with the result.
+
+    Events are sent as server-sent events, or as NDJSON with ?format=ndjson or an
+    Accept header of application/x-ndjson. Each event carries its "seq", "stage" and
+    "status", plus the stage's output: a chunk's "transactions" when it is parsed and
+    categorized, "personal_info", the reconciliation "report" and the "summary".
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    sse = format != "ndjson" and "application/x-ndjson" not in request.headers.get("accept", "")
+    last_event_id = request.headers.get("last-event-id", "")
+    start = int(last_event_id) + 1 if last_event_id.isdigit() else 0
+
+    async def events():
+        seq = start
+        while not await request.is_disconnected():
+            batch = await run_in_threadpool(job.events_from, seq, Settings.API_EVENT_KEEPALIVE_SECONDS)
+            if not batch:
+                if job.done:
+                    return
+                if sse:
+                    # Comment line keeping proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+                continue
+            for event in batch:
+                yield format_event(event, sse)
+            seq = batch[-1]["seq"] + 1
+            if batch[-1]["stage"] == "job":
+                return
+
+    media_type = "text/event-stream" if sse else "application/x-ndjson"
+    return StreamingResponse(events(), media_type=media_type, headers={"Cache-Control": "no-cache"})
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Metrics of this process in the Prometheus text format (see utils/metrics.py)."""
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy"} 
\ No newline at end of file
+    store = get_result_store()
+    return {
+        "status": "healthy",
+        "remote_files": get_remote_file_manager().stats(),
+        "gemini_keys": get_credential_pool().stats(),
+        "scheduler": get_call_scheduler().stats(),
+        "single_flight": get_single_flight().stats(),
+        "jobs": jobs.stats(),
+        "result_store": store.stats() if store is not None else None
+    }
+ 
\ No newline at end of file
@@ -0,0 +1,279 @@
+"""
+Asynchronous statement jobs for the HTTP API.
+
+POST /process keeps the connection open for the whole pipeline, so clients time out on
+long statements, and it admits every request however busy the service is. Jobs
+submitted to POST /jobs are instead queued here and answered at once with 202 and a
+job id, which the client polls at GET /jobs/{id} for status, stage progress and, once
+done, the result.
+
+Each job also keeps the log of its pipeline events (see JobContext.emit): each chunk's
+transactions as they are parsed and categorized, personal information,
+reconciliation and summary, closed by a "job" event carrying the result. GET
+/jobs/{id}/events streams the log as server-sent events or NDJSON, so clients can
+render transactions while the rest of the statement is still being processed.
+
+Jobs are run by a bounded pool of Settings.API_JOB_WORKERS threads, taking queued jobs
+in lane and tenant order (core/scheduler.py). Admission control estimates a job's cost
+by its page count: while jobs are waiting, a job is rejected with a suggested retry
+delay when the queue already holds Settings.API_MAX_QUEUED_JOBS jobs or would exceed
+Settings.API_MAX_QUEUED_PAGES pages. A job arriving at an empty queue is always
+admitted, however large.
+"""
+
+import json
+import logging
+import math
+import shutil
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from backend.src.config.settings import Settings
+from backend.src.core.scheduler import FairQueue, job_priority, lane_for
+from backend.src.utils.exceptions import JobRejectedError
+from backend.src.utils.lazy_import import lazy_import
+
+PyPDF2 = lazy_import("PyPDF2")
+
+logger = logging.getLogger(__name__)
+
+# Processing time per page assumed for Retry-After until a job has completed
+DEFAULT_SECONDS_PER_PAGE = 10.0
+
+
+def count_pages(pdf_path: str) -> int:
+    """
+    Return the page count of a PDF, the estimated cost of its job.
+
+    Raises:
+        ValueError: The file is not a readable PDF
+    """
+    try:
+        return len(PyPDF2.PdfReader(pdf_path).pages)
+    except Exception as e:
+        raise ValueError(f"Could not read the PDF: {str(e)}")
+
+
+@dataclass
+class Job:
+    """An asynchronous statement job and its progress."""
+    pdf_path: str
+    work_dir: str
+    pages: int
+    options: Dict[str, Any] = field(default_factory=dict)
+    lane: str = field(default_factory=lambda: lane_for(None))
+    tenant: Optional[str] = None
+    # SHA-256 of the uploaded document
+    sha256: Optional[str] = None
+    # Version of the pipeline the job runs (see core/result_store.py)
+    pipeline_version: Optional[str] = None
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    # queued, running, succeeded or failed
+    status: str = "queued"
+    # Latest status of each pipeline stage reported so far
+    stages: Dict[str, str] = field(default_factory=dict)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    submitted: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    # Pipeline events, numbered by "seq" in the order they happened
+    events: List[Dict[str, Any]] = field(default_factory=list, repr=False)
+    _condition: threading.Condition = field(default_factory=threading.Condition, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def on_progress(self, stage: str, status: str, details: Dict[str, Any]) -> None:
+        """Progress listener of the job's pipeline (see JobContext.emit)."""
+        with self._condition:
+            self.stages[stage] = status
+            self.events.append({"seq": len(self.events), "stage": stage, "status": status, **details})
+            self._condition.notify_all()
+
+    def finish(self, status: str, result: Dict[str, Any] = None, error: str = None) -> None:
+        """Record the job's outcome, closing its event log with a "job" event."""
+        self.result = result
+        self.error = error
+        self.finished = time.time()
+        details = {"result": result} if status == "succeeded" else {"error": error}
+        with self._condition:
+            self.status = status
+            self.events.append({"seq": len(self.events), "stage": "job", "status": status, **details})
+            self._condition.notify_all()
+
+    def events_from(self, seq: int, timeout: float = None) -> List[Dict[str, Any]]:
+        """
+        Return the events numbered `seq` and later, waiting up to `timeout` seconds for
+        one while the job is unfinished. An empty list means none arrived in time.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: len(self.events) > seq or self.done, timeout)
+            return self.events[seq:]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The job's status as returned by GET /jobs/{id}."""
+        status = {
+            "job_id": self.job_id,
+            "status": self.status,
+            "lane": self.lane,
+            "tenant": self.tenant,
+            "pages": self.pages,
+            "sha256": self.sha256,
+            "submitted": self.submitted,
+            "started": self.started,
+            "finished": self.finished,
+            "stages": dict(self.stages),
+        }
+        if self.status == "succeeded":
+            status["result"] = self.result
+        if self.status == "failed":
+            status["error"] = self.error
+        return status
+
+
+class JobManager:
+    """Queue and worker pool of asynchronous jobs, with admission control."""
+
+    def __init__(
+        self,
+        runner: Callable[[Job], Dict[str, Any]],
+        workers: int = None,
+        max_queued_jobs: int = None,
+        max_queued_pages: int = None,
+        retention_seconds: int = None
+    ):
+        """
+        Initialize the manager. Its worker threads start with the first job.
+
+        Args:
+            runner: Runs a job and returns its result
+            workers: Jobs run at the same time (defaults to Settings.API_JOB_WORKERS)
+            max_queued_jobs: Waiting jobs beyond which jobs are rejected
+            max_queued_pages: Pages of waiting jobs beyond which jobs are rejected
+            retention_seconds: How long finished jobs can still be polled
+        """
+        self.runner = runner
+        self.workers = workers or Settings.API_JOB_WORKERS
+        self.max_queued_jobs = Settings.API_MAX_QUEUED_JOBS if max_queued_jobs is None else max_queued_jobs
+        self.max_queued_pages = Settings.API_MAX_QUEUED_PAGES if max_queued_pages is None else max_queued_pages
+        self.retention_seconds = Settings.API_JOB_RETENTION_SECONDS if retention_seconds is None else retention_seconds
+        self.rejected = 0
+        self._jobs: Dict[str, Job] = {}
+        self._queue = FairQueue()
+        self._queued_jobs = 0
+        self._queued_pages = 0
+        self._running = 0
+        self._seconds_per_page: Optional[float] = None
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def submit(self, job: Job) -> Job:
+        """
+        Admit a job and queue it. The manager owns the job's work_dir from here on and
+        removes it once the job finishes or is rejected.
+
+        Raises:
+            JobRejectedError: The queue is full; retry_after suggests when to resubmit
+        """
+        with self._lock:
+            self._purge()
+            if self._queued_jobs and (
+                self._queued_jobs >= self.max_queued_jobs
+                or self._queued_pages + job.pages > self.max_queued_pages
+            ):
+                self.rejected += 1
+                retry_after = self._retry_after()
+                shutil.rmtree(job.work_dir, ignore_errors=True)
+                raise JobRejectedError(
+                    f"Service at capacity ({self._queued_jobs} job(s), {self._queued_pages} page(s) queued)",
+                    retry_after=retry_after
+                )
+            self._queued_jobs += 1
+            self._queued_pages += job.pages
+            self._jobs[job.job_id] = job
+            if not self._threads:
+                self._threads = [
+                    threading.Thread(target=self._run, name=f"api-job-{i}", daemon=True)
+                    for i in range(self.workers)
+                ]
+                for thread in self._threads:
+                    thread.start()
+        self._queue.put(job, job.lane, job.tenant)
+        logger.info(f"Queued job {job.job_id} ({job.pages} page(s), {job.lane} lane)")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return a job that is queued, running or finished within the retention period."""
+        with self._lock:
+            self._purge()
+            return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, pages queued, jobs running and rejected, and wait times per lane."""
+        with self._lock:
+            return {
+                "queued_jobs": self._queued_jobs,
+                "queued_pages": self._queued_pages,
+                "running": self._running,
+                "rejected": self.rejected,
+                "seconds_per_page": self._seconds_per_page,
+                "lanes": self._queue.stats(),
+            }
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            with self._lock:
+                self._queued_jobs -= 1
+                self._queued_pages -= job.pages
+                self._running += 1
+            job.started = time.time()
+            job.status = "running"
+            try:
+                with job_priority(job.lane, job.tenant):
+                    result = self.runner(job)
+                job.finish("succeeded", result=result)
+            except Exception as e:
+                logger.exception(f"Job {job.job_id} failed: {str(e)}")
+                job.finish("failed", error=str(e))
+            finally:
+                shutil.rmtree(job.work_dir, ignore_errors=True)
+                with self._lock:
+                    self._running -= 1
+                    self._record_throughput(job)
+                self._queue.task_done()
+
+    def _record_throughput(self, job: Job) -> None:
+        # Called with the lock held; a moving average of the processing time per page
+        if job.status != "succeeded" or not job.pages:
+            return
+        seconds_per_page = (job.finished - job.started) / job.pages
+        if self._seconds_per_page is None:
+            self._seconds_per_page = seconds_per_page
+        else:
+            self._seconds_per_page = 0.8 * self._seconds_per_page + 0.2 * seconds_per_page
+
+    def _retry_after(self) -> int:
+        # Called with the lock held; roughly how long the queued pages take to drain
+        seconds_per_page = self._seconds_per_page or DEFAULT_SECONDS_PER_PAGE
+        return max(1, math.ceil(self._queued_pages * seconds_per_page / self.workers))
+
+    def _purge(self) -> None:
+        # Called with the lock held
+        cutoff = time.time() - self.retention_seconds
+        expired = [job_id for job_id, job in self._jobs.items() if job.done and job.finished < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+def format_event(event: Dict[str, Any], sse: bool = True) -> str:
+    """Encode a job event as a server-sent event (with its seq as id) or an NDJSON line."""
+    data = json.dumps(event, default=str)
+    if sse:
+        return f"id: {event['seq']}\nevent: {event['stage']}\ndata: {data}\n\n"
+    return data + "\n"
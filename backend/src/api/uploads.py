@@ -0,0 +1,109 @@
+"""
+Streaming ingestion of uploaded statements.
+
+Uploads used to be read into memory in one piece (`await file.read()`) and written out
+afterwards, with no size limit. They are now copied to scratch storage in blocks of
+Settings.UPLOAD_CHUNK_SIZE bytes, so memory per request stays constant whatever the
+upload size. While copying, the upload is hashed (the digest serves as a caching and
+deduplication key), rejected as soon as it exceeds Settings.MAX_FILE_SIZE, and
+rejected from its first block if it does not start with the PDF signature.
+
+Starlette receives a multipart body in full (spooling it to disk) before the handler
+runs, so bodies whose declared Content-Length is over the limit are rejected by
+check_content_length() in a middleware, before they are read at all.
+"""
+
+import hashlib
+import os
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from backend.src.config.settings import Settings
+from backend.src.utils.exceptions import UploadRejectedError
+
+PDF_SIGNATURE = b"%PDF-"
+
+# Allowance for the multipart boundaries and form fields around the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+@dataclass
+class StoredUpload:
+    """An upload copied to scratch storage."""
+    path: str
+    size_bytes: int
+    sha256: str
+
+
+def check_content_length(content_length: Optional[str], max_size: int = None) -> None:
+    """
+    Reject a request body whose declared length cannot hold an upload within the limit.
+
+    Args:
+        content_length: The Content-Length header, if any
+        max_size: Largest upload in bytes (defaults to Settings.MAX_FILE_SIZE)
+
+    Raises:
+        UploadRejectedError: With status 413 when the body is too large
+    """
+    max_size = Settings.MAX_FILE_SIZE if max_size is None else max_size
+    if content_length and content_length.isdigit() and int(content_length) > max_size + MULTIPART_OVERHEAD:
+        raise UploadRejectedError(f"Upload exceeds the {max_size} byte limit", status_code=413)
+
+
+async def iter_upload(file, chunk_size: int = None) -> AsyncIterator[bytes]:
+    """Yield the blocks of an UploadFile."""
+    chunk_size = chunk_size or Settings.UPLOAD_CHUNK_SIZE
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+async def store_upload(chunks: AsyncIterator[bytes], directory: str, filename: str, max_size: int = None) -> StoredUpload:
+    """
+    Copy an upload, block by block, into `directory`.
+
+    Args:
+        chunks: The upload's blocks (see iter_upload)
+        directory: Scratch directory to store the upload in
+        filename: The client's file name (only its base name is used)
+        max_size: Largest upload in bytes (defaults to Settings.MAX_FILE_SIZE)
+
+    Returns:
+        The stored upload with its size and SHA-256 digest
+
+    Raises:
+        UploadRejectedError: With status 413 when the upload is too large, or 415 when
+            it is not a PDF; nothing is left in `directory`
+    """
+    max_size = Settings.MAX_FILE_SIZE if max_size is None else max_size
+    path = os.path.join(directory, os.path.basename(filename or "") or "upload.pdf")
+    digest = hashlib.sha256()
+    size = 0
+    head = b""
+
+    try:
+        with open(path, "wb") as f:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadRejectedError(f"Upload exceeds the {max_size} byte limit", status_code=413)
+                if len(head) < len(PDF_SIGNATURE):
+                    head += chunk[:len(PDF_SIGNATURE) - len(head)]
+                    if not PDF_SIGNATURE.startswith(head):
+                        raise UploadRejectedError("Upload is not a PDF", status_code=415)
+                digest.update(chunk)
+                # Written from a worker thread, so a slow disk does not stall the event loop
+                await run_in_threadpool(f.write, chunk)
+        if head != PDF_SIGNATURE:
+            raise UploadRejectedError("Upload is not a PDF", status_code=415)
+    except BaseException:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+
+    return StoredUpload(path=path, size_bytes=size, sha256=digest.hexdigest())
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Long-lived worker process for the web tier.
+
+Instead of starting a fresh interpreter per upload (paying for interpreter start-up,
+SDK imports, .env loading and client construction every time), the web routes submit
+jobs to this worker, which keeps its Gemini clients warm between jobs.
+
+Protocol: JSON lines, either over stdin/stdout (default) or a Unix socket (--socket).
+Each request is one line:
+
+    {"id": "...", "type": "statement" | "passport" | "driving_license" | "ping" | "metrics",
+     "path": "/path/to/upload", "output_dir": "/path/to/job/output", "options": {...},
+     "lane": "interactive" | "bulk", "tenant": "...", "events": true | false}
+
+and is answered, in completion order, by one line:
+
+    {"id": "...", "ok": true, "result": {...}}   or   {"id": "...", "ok": false, "error": "..."}
+
+Statement options are "chunk_count", "resume", "deadline_seconds",
+"export_raw_responses", "include_trace" (return the job's trace timeline, see
+utils/tracing.py, in the result's "trace") and "profile" (profile each stage into
+the job's artifacts, see utils/profiling.py, with the figures in "profile").
+Statements processed before are answered from the result store (see
+core/result_store.py), except with "include_trace" or "profile", which need a run
+to report on. A statement's result carries, in "job_id", the id of the request that
+produced it (the earlier request's, for an answer from the result store).
+
+A statement request with "events": true is also sent its pipeline events before the
+answer, one line each (see JobContext.emit), so the web tier can stream chunk results
+to the UI while the rest of the statement is processed:
+
+    {"id": "...", "event": {"stage": "chunk:1", "status": "parsed", "transactions": [...]}}
+
+Jobs are queued by lane and tenant (see core/scheduler.py; "lane" defaults to
+Settings.SCHEDULER_DEFAULT_LANE) and run by Settings.WORKER_CONCURRENCY threads, plus
+Settings.WORKER_INTERACTIVE_RESERVE threads that only take interactive jobs, so uploads
+start while bulk jobs occupy the other threads. After
+Settings.WORKER_MAX_JOBS jobs the worker stops reading requests, finishes the jobs it
+has accepted and exits, so that its supervisor can start a fresh process; requests it
+did not read must be resubmitted to the new process.
+"""
+
+import os
+import sys
+import json
+import socket
+import argparse
+import threading
+import time
+import logging
+import uuid
+
+# Add the repository root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+
+from backend.src.config.settings import Settings
+from backend.src.core.job_context import JobContext
+from backend.src.core.deadlines import deadline_after
+from backend.src.core.journal import open_journal
+from backend.src.core.planner import record_job
+from backend.src.core.result_store import file_sha256, get_result_store, pipeline_version
+from backend.src.core.scheduler import FairQueue, get_call_scheduler, job_priority, lane_for
+from backend.src.core.single_flight import get_single_flight
+from backend.src.services.gemini_service import StatementGeminiService
+from backend.src.services.passport_service import PassportService
+from backend.src.services.driving_license_service import DrivingLicenseService
+from backend.src.services.client_registry import get_gemini_client
+from backend.src.services.credential_pool import get_credential_pool
+from backend.src.utils.artifact_writer import get_artifact_writer
+from backend.src.utils.logging_utils import setup_logger
+from backend.src.utils.metrics import QUEUE_DEPTH, REGISTRY
+from backend.src.utils.profiling import JobProfile, profiling, write_reports
+from backend.src.utils.remote_files import get_remote_file_manager
+from backend.src.utils.tracing import Trace, span, tracing
+from backend.src.utils.usage import Usage, accounting
+
+logger = setup_logger("worker", level=logging.INFO)
+
+JOB_TYPES = ("statement", "passport", "driving_license")
+
+
+class Worker:
+    """Job queue and warm services shared by every connection of the worker process."""
+
+    def __init__(self, concurrency: int = None, max_jobs: int = None):
+        """
+        Initialize the worker.
+
+        Args:
+            concurrency: Number of jobs processed at the same time
+            max_jobs: Number of jobs after which the worker recycles (0 for never)
+        """
+        self.concurrency = concurrency or Settings.WORKER_CONCURRENCY
+        self.max_jobs = Settings.WORKER_MAX_JOBS if max_jobs is None else max_jobs
+        self.jobs = FairQueue(maxsize=Settings.WORKER_QUEUE_SIZE)
+        QUEUE_DEPTH.set_function(self.jobs.qsize, queue="worker_jobs")
+        self.accepted = 0
+        self.completed = 0
+        self._services = {}
+        self._lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"worker-{i}", daemon=True)
+            for i in range(self.concurrency)
+        ]
+        self._threads += [
+            threading.Thread(target=self._run, args=(("interactive",),), name=f"worker-interactive-{i}", daemon=True)
+            for i in range(Settings.WORKER_INTERACTIVE_RESERVE)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def exhausted(self) -> bool:
+        """Whether the worker has accepted all the jobs it will run before recycling."""
+        return bool(self.max_jobs) and self.accepted >= self.max_jobs
+
+    def submit(self, request: dict, reply) -> bool:
+        """
+        Queue a request, blocking while the queue is full.
+
+        Args:
+            request: The decoded request line
+            reply: Callable taking the response dictionary
+
+        Returns:
+            False once the worker has stopped accepting jobs
+        """
+        if request.get("type") == "ping":
+            reply({"id": request.get("id"), "ok": True, "result": self.stats()})
+            return True
+        if request.get("type") == "metrics":
+            reply({"id": request.get("id"), "ok": True, "result": {"text": REGISTRY.render()}})
+            return True
+        try:
+            lane = lane_for(request.get("lane"))
+        except ValueError as e:
+            reply({"id": request.get("id"), "ok": False, "error": str(e)})
+            return True
+
+        with self._lock:
+            if self.exhausted:
+                return False
+            self.accepted += 1
+        self.jobs.put((request, reply), lane, request.get("tenant"))
+        return True
+
+    def drain(self) -> None:
+        """Block until every accepted job has been answered."""
+        self.jobs.join()
+
+    def stats(self) -> dict:
+        """Counters reported in reply to a ping."""
+        return {
+            "pid": os.getpid(),
+            "accepted": self.accepted,
+            "completed": self.completed,
+            "queued": self.jobs.qsize(),
+            "max_jobs": self.max_jobs,
+            "scheduler": {"jobs": self.jobs.stats(), "calls": get_call_scheduler().stats()},
+            "single_flight": get_single_flight().stats(),
+            "remote_files": get_remote_file_manager().stats(),
+            "gemini_keys": get_credential_pool().stats(),
+        }
+
+    def _service(self, name: str):
+        """Return the warm service for a job type, constructing it on first use."""
+        with self._lock:
+            service = self._services.get(name)
+            if service is None:
+                if name == "statement":
+                    service = StatementGeminiService()
+                elif name == "passport":
+                    service = PassportService()
+                else:
+                    service = DrivingLicenseService()
+                self._services[name] = service
+            return service
+
+    def _run(self, lanes: tuple = None) -> None:
+        while True:
+            request, reply = self.jobs.get(lanes)
+            try:
+                on_progress = None
+                if request.get("events"):
+                    def on_progress(stage, status, details, request_id=request.get("id")):
+                        reply({"id": request_id, "event": {"stage": stage, "status": status, **details}})
+                with job_priority(request.get("lane"), request.get("tenant")):
+                    result = self.process(request, on_progress=on_progress)
+                response = {"id": request.get("id"), "ok": True, "result": result}
+            except Exception as e:
+                logger.exception(f"Job {request.get('id')} failed: {str(e)}")
+                response = {"id": request.get("id"), "ok": False, "error": str(e)}
+            try:
+                reply(response)
+            except Exception as e:
+                logger.warning(f"Could not deliver the response to job {request.get('id')}: {str(e)}")
+            finally:
+                with self._lock:
+                    self.completed += 1
+                self.jobs.task_done()
+
+    def process(self, request: dict, on_progress=None) -> dict:
+        """
+        Run one job.
+
+        Args:
+            request: The decoded request line
+            on_progress: Listener of a statement job's pipeline events (see JobContext.emit)
+
+        Returns:
+            The job's result
+        """
+        job_type = request.get("type")
+        path = request.get("path")
+        if job_type not in JOB_TYPES:
+            raise ValueError(f"Unknown job type: {job_type}")
+        if not path or not os.path.exists(path):
+            raise FileNotFoundError(f"Input file not found: {path}")
+
+        logger.info(f"Processing {job_type} job {request.get('id')}: {path}")
+        if job_type == "passport":
+            return self._service("passport").parse_passport(path)
+        if job_type == "driving_license":
+            return self._service("driving_license").parse_driving_license(path)
+        return self._process_statement(
+            path, request.get("output_dir"), request.get("options") or {}, on_progress,
+            job_id=request.get("id")
+        )
+
+    def _process_statement(self, pdf_path: str, output_dir: str, options: dict, on_progress=None, job_id: str = None) -> dict:
+        job_id = job_id or uuid.uuid4().hex
+        chunk_count = int(options.get("chunk_count", 3))
+        resume = bool(options.get("resume", False))
+        include_trace = bool(options.get("include_trace"))
+
+        # Statements uploaded before are answered from the result store, unless the
+        # request asks for a trace or profile of the run
+        store = get_result_store()
+        if store is not None:
+            sha256 = file_sha256(pdf_path)
+            version = pipeline_version(use_gemini=True, chunk_count=chunk_count)
+            stored = store.get(sha256, version) if not (include_trace or options.get("profile")) else None
+            if stored is not None:
+                logger.info(f"Returning the stored result of job {stored.job_id} for {pdf_path}")
+                return {**stored.result, "job_id": stored.job_id}
+
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+        with JobContext(
+            job_id=job_id,
+            output_dir=output_dir,
+            export_raw_responses=bool(options.get("export_raw_responses")) or Settings.EXPORT_RAW_GEMINI_RESPONSES,
+            journal=open_journal(output_dir, pdf_path, resume=resume, chunk_count=chunk_count)
+        ) as context:
+            if options.get("deadline_seconds") is not None:
+                context.deadline = deadline_after(options["deadline_seconds"])
+            if on_progress is not None:
+                context.listeners.append(on_progress)
+            if output_dir and Settings.ARTIFACT_ARCHIVE_ENABLED:
+                context.artifacts = get_artifact_writer().open_job(output_dir, context.job_id, append=resume)
+            trace = Trace(os.path.basename(pdf_path)) if Settings.TRACE_ENABLED or include_trace else None
+            usage = Usage()
+            job_profile = JobProfile() if Settings.PROFILING_ENABLED or options.get("profile") else None
+            started = time.perf_counter()
+            try:
+                with tracing(trace), accounting(usage), profiling(job_profile), span("job", provider="gemini"):
+                    result = self._service("statement").process_document(pdf_path, chunk_count=chunk_count, context=context)
+                result["usage"] = usage.to_dict()
+            finally:
+                # Saved before the context closes, so that they end up in the job's archive
+                if trace is not None and output_dir:
+                    get_artifact_writer().write_json(os.path.join(output_dir, "trace.json"), trace.to_dict())
+                if job_profile is not None and output_dir:
+                    write_reports(job_profile, output_dir)
+        if result.get("complete") and not resume and job_profile is None:
+            record_job(pdf_path, True, chunk_count, time.perf_counter() - started, result["usage"])
+        if store is not None and result.get("complete"):
+            store.put(job_id, sha256, version, result)
+        result = {**result, "job_id": job_id}
+        if include_trace:
+            result = {**result, "trace": trace.to_dict()}
+        if job_profile is not None:
+            result = {**result, "profile": job_profile.summary()}
+        return result
+
+
+def serve_stdio(worker: Worker) -> None:
+    """Serve requests read from stdin, writing responses to stdout."""
+    # Responses own the real stdout; anything else printing or logging to stdout
+    # (including handlers created before this point) is sent to stderr instead
+    protocol_out = os.fdopen(os.dup(sys.stdout.fileno()), "w", encoding="utf-8")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    write_lock = threading.Lock()
+
+    def reply(response: dict) -> None:
+        with write_lock:
+            protocol_out.write(json.dumps(response, default=str) + "\n")
+            protocol_out.flush()
+
+    reply({"id": None, "ok": True, "result": {"ready": True, **worker.stats()}})
+    for line in sys.stdin:
+        if not _handle_line(worker, line, reply):
+            break
+    worker.drain()
+    logger.info(f"Worker {os.getpid()} exiting after {worker.completed} job(s)")
+
+
+def serve_socket(worker: Worker, socket_path: str) -> None:
+    """Serve JSON-lines connections on a Unix socket."""
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    server.listen()
+    logger.info(f"Worker {os.getpid()} listening on {socket_path}")
+
+    def handle(connection: socket.socket) -> None:
+        stream = connection.makefile("rw", encoding="utf-8")
+        # Responses still owed on this connection; it stays open until they are sent
+        pending = [0]
+        condition = threading.Condition()
+
+        def reply(response: dict) -> None:
+            with condition:
+                stream.write(json.dumps(response, default=str) + "\n")
+                stream.flush()
+                if "event" not in response:
+                    pending[0] -= 1
+                condition.notify_all()
+
+        with connection:
+            for line in stream:
+                if not line.strip():
+                    continue
+                with condition:
+                    pending[0] += 1
+                if not _handle_line(worker, line, reply):
+                    break
+            with condition:
+                condition.wait_for(lambda: pending[0] <= 0)
+
+    try:
+        while not worker.exhausted:
+            server.settimeout(1.0)
+            try:
+                connection, _ = server.accept()
+            except socket.timeout:
+                continue
+            threading.Thread(target=handle, args=(connection,), daemon=True).start()
+    finally:
+        server.close()
+        os.unlink(socket_path)
+    worker.drain()
+    logger.info(f"Worker {os.getpid()} exiting after {worker.completed} job(s)")
+
+
+def _handle_line(worker: Worker, line: str, reply) -> bool:
+    """Decode and submit one request line. Returns False once the worker stops accepting jobs."""
+    line = line.strip()
+    if not line:
+        return True
+    try:
+        request = json.loads(line)
+    except json.JSONDecodeError as e:
+        reply({"id": None, "ok": False, "error": f"Invalid request: {str(e)}"})
+        return True
+    if not worker.submit(request, reply):
+        reply({"id": request.get("id"), "ok": False, "error": "worker recycling", "retry": True})
+        return False
+    return not worker.exhausted
+
+
+def _sweep_orphans() -> None:
+    # Each key of the credential pool has its own file store
+    for credential in get_credential_pool().credentials:
+        get_remote_file_manager().sweep_orphans(get_gemini_client(credential.api_key))
+
+
+def main():
+    """Main entry point for the worker."""
+    parser = argparse.ArgumentParser(description="Persistent worker processing statement and identity document jobs.")
+    parser.add_argument("--socket", type=str, help="Serve on this Unix socket instead of stdin/stdout")
+    parser.add_argument("--concurrency", type=int, help="Jobs processed at the same time (default: WORKER_CONCURRENCY)")
+    parser.add_argument("--max-jobs", type=int, help="Recycle after this many jobs, 0 for never (default: WORKER_MAX_JOBS)")
+    args = parser.parse_args()
+
+    worker = Worker(concurrency=args.concurrency, max_jobs=args.max_jobs)
+    if Settings.GEMINI_API_KEYS:
+        # Uploads left behind by a previous worker that died are deleted in the background
+        threading.Thread(target=_sweep_orphans, name="orphan-sweep", daemon=True).start()
+    if args.socket:
+        serve_socket(worker, args.socket)
+    else:
+        serve_stdio(worker)
+
+
+if __name__ == "__main__":
+    main()
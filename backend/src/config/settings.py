@@ -1,32 +1,58 @@
 """Configuration settings for the backend application."""
 
+import json
 import os
-import sys
+import logging
 from pathlib import Path
 from dotenv import load_dotenv
-from typing import Final
+from typing import Final, Optional
+
+logger = logging.getLogger(__name__)
 
 # Get the absolute path to the directory containing this script
 current_dir = Path(__file__).parent.parent.parent.absolute()
 
-# Try to load .env from the current directory
-env_path = current_dir / '.env'
-if not env_path.exists():
-    # If not found, try parent directory
-    env_path = current_dir.parent / '.env'
+# Path of the loaded .env file once load_environment() has run
+_UNRESOLVED = object()
+_env_path = _UNRESOLVED
+
+
+def load_environment() -> Optional[Path]:
+    """
+    Load the .env file into the environment, once per process.
+
+    The backend directory is searched first, then its parent. Importing this module
+    calls it, so services and scripts read os.environ / Settings without loading .env
+    themselves. Nothing is printed; the outcome is logged at debug level.
+
+    Returns:
+        The path of the loaded .env file, or None if there is none
+    """
+    global _env_path
+    if _env_path is not _UNRESOLVED:
+        return _env_path
+
+    _env_path = None
+    for candidate in (current_dir / '.env', current_dir.parent / '.env'):
+        if candidate.exists():
+            load_dotenv(candidate)
+            _env_path = candidate
+            break
+
+    if _env_path:
+        logger.debug(f"Loaded .env from: {_env_path}")
+    else:
+        logger.debug(f".env file not found in {current_dir} or its parent directory")
+    return _env_path
+
 
-if not env_path.exists():
-    print(f"Warning: .env file not found in {current_dir} or its parent directory")
-else:
-    print(f"Loading .env from: {env_path}")
-    load_dotenv(env_path)
+load_environment()
 
 # Configuration class to store API settings
 class Settings:
     # OpenAI API Key from environment variable
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "your_api_key")
     if not OPENAI_API_KEY:
-        print("Debug: Environment variables loaded:", dict(os.environ))
         raise ValueError("OPENAI_API_KEY environment variable is not set")
 
     # Assistant ID from environment variable
@@ -45,6 +71,8 @@ class Settings:
 
     # Maximum file size in bytes (100MB)
     MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", 5242880))  # Default: 5MB
+    # Uploads are copied to scratch storage in blocks of this many bytes
+    UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 65536))
     
     # Image compression settings
     USE_IMAGE_COMPRESSION = False  # Whether to compress images before upload
@@ -63,4 +91,153 @@ class Settings:
     EXPORT_RAW_GEMINI_RESPONSES = os.getenv("EXPORT_RAW_GEMINI_RESPONSES", "False").lower() in ["true", "1", "yes"]
 
     # Google Gemini API Key
-    GOOGLE_API_KEY = os.getenv("GEMINI_API_KEY", "") 
\ No newline at end of file
+    GOOGLE_API_KEY = os.getenv("GEMINI_API_KEY", "") 
+
+    # Pool of Gemini API keys (comma separated, defaults to GEMINI_API_KEY) that jobs are
+    # spread across (services/credential_pool.py). Each job keeps the key it started
+    # with; a key answered with 429 is not given new jobs for GEMINI_KEY_COOLDOWN_SECONDS.
+    GEMINI_API_KEYS = [key.strip() for key in os.getenv("GEMINI_API_KEYS", "").split(",") if key.strip()] or (
+        [GOOGLE_API_KEY] if GOOGLE_API_KEY else []
+    )
+    GEMINI_KEY_COOLDOWN_SECONDS = int(os.getenv("GEMINI_KEY_COOLDOWN_SECONDS", 60))
+
+    # Ask Gemini for JSON constrained to a response schema instead of free text
+    GEMINI_STRUCTURED_OUTPUT = os.getenv("GEMINI_STRUCTURED_OUTPUT", "True").lower() in ["true", "1", "yes"]
+
+    # Register the long static prompts as Gemini cached content (falls back to inline
+    # system instructions when caching is unavailable)
+    GEMINI_PROMPT_CACHE_ENABLED = os.getenv("GEMINI_PROMPT_CACHE_ENABLED", "True").lower() in ["true", "1", "yes"]
+    GEMINI_PROMPT_CACHE_TTL_SECONDS = int(os.getenv("GEMINI_PROMPT_CACHE_TTL_SECONDS", 3600))
+
+    # Model used for each pipeline stage; override per stage with GEMINI_MODEL_<STAGE>
+    GEMINI_DEFAULT_MODEL = os.getenv("GEMINI_DEFAULT_MODEL", "gemini-2.0-flash")
+    GEMINI_MODEL_ROUTES = {
+        "parse": os.getenv("GEMINI_MODEL_PARSE", GEMINI_DEFAULT_MODEL),
+        "categorize": os.getenv("GEMINI_MODEL_CATEGORIZE", GEMINI_DEFAULT_MODEL),
+        "personal_info": os.getenv("GEMINI_MODEL_PERSONAL_INFO", GEMINI_DEFAULT_MODEL),
+        "summary": os.getenv("GEMINI_MODEL_SUMMARY", GEMINI_DEFAULT_MODEL),
+        "passport": os.getenv("GEMINI_MODEL_PASSPORT", GEMINI_DEFAULT_MODEL),
+        "driving_license": os.getenv("GEMINI_MODEL_DRIVING_LICENSE", GEMINI_DEFAULT_MODEL),
+    }
+
+    # Stronger model used to re-run chunks or rows that fail validation on the routed model
+    GEMINI_ESCALATION_ENABLED = os.getenv("GEMINI_ESCALATION_ENABLED", "True").lower() in ["true", "1", "yes"]
+    GEMINI_ESCALATION_MODEL = os.getenv("GEMINI_ESCALATION_MODEL", "gemini-2.5-pro")
+
+    # Reconcile the running balance after extraction and re-extract only the pages
+    # around each discontinuity (at most RECONCILIATION_MAX_PAGES pages per job)
+    RECONCILIATION_ENABLED = os.getenv("RECONCILIATION_ENABLED", "True").lower() in ["true", "1", "yes"]
+    RECONCILIATION_MAX_PAGES = int(os.getenv("RECONCILIATION_MAX_PAGES", 4))
+
+    # Journal completed Gemini stages in the job's output directory so that an
+    # interrupted job can be resumed without redoing finished work
+    JOB_JOURNAL_ENABLED = os.getenv("JOB_JOURNAL_ENABLED", "True").lower() in ["true", "1", "yes"]
+
+    # Job artifacts (raw responses, transaction CSVs, result JSON) are written by a
+    # background thread into one compressed archive per job; producers block once
+    # ARTIFACT_QUEUE_SIZE writes are pending
+    ARTIFACT_ARCHIVE_ENABLED = os.getenv("ARTIFACT_ARCHIVE_ENABLED", "True").lower() in ["true", "1", "yes"]
+    ARTIFACT_QUEUE_SIZE = int(os.getenv("ARTIFACT_QUEUE_SIZE", 64))
+
+    # Persistent worker (backend/src/api/worker.py): jobs processed at the same time,
+    # jobs after which the process recycles (0 for never) and queued jobs before
+    # submitters block
+    WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", 2))
+    WORKER_MAX_JOBS = int(os.getenv("WORKER_MAX_JOBS", 100))
+    WORKER_QUEUE_SIZE = int(os.getenv("WORKER_QUEUE_SIZE", 16))
+
+    # HTTP connection pool of each shared provider client (services/client_registry.py):
+    # keep-alive connections per client and how long an idle connection is kept, in seconds
+    HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", max(MAX_CONCURRENT_REQUESTS, WORKER_CONCURRENCY)))
+    HTTP_KEEPALIVE_SECONDS = int(os.getenv("HTTP_KEEPALIVE_SECONDS", 60))
+
+    # Files uploaded to the Gemini/OpenAI file stores are deleted by a background sweeper
+    # (utils/remote_files.py) once their job ends: at most REMOTE_FILE_BATCH_SIZE per
+    # sweep, with released files waiting up to REMOTE_FILE_SWEEP_SECONDS to be batched.
+    # At startup, Gemini uploads older than REMOTE_FILE_ORPHAN_AGE_SECONDS that no job
+    # tracks are deleted as orphans; at exit, pending deletions get
+    # REMOTE_FILE_EXIT_TIMEOUT_SECONDS to finish.
+    REMOTE_FILE_CLEANUP_ENABLED = os.getenv("REMOTE_FILE_CLEANUP_ENABLED", "True").lower() in ["true", "1", "yes"]
+    REMOTE_FILE_BATCH_SIZE = int(os.getenv("REMOTE_FILE_BATCH_SIZE", 20))
+    REMOTE_FILE_SWEEP_SECONDS = int(os.getenv("REMOTE_FILE_SWEEP_SECONDS", 5))
+    REMOTE_FILE_ORPHAN_AGE_SECONDS = int(os.getenv("REMOTE_FILE_ORPHAN_AGE_SECONDS", 3600))
+    REMOTE_FILE_EXIT_TIMEOUT_SECONDS = int(os.getenv("REMOTE_FILE_EXIT_TIMEOUT_SECONDS", 30))
+
+    # Default deadline of a statement job in seconds (0 for none). When it expires,
+    # in-flight provider calls are cut off and the job returns the stages that
+    # completed, marked incomplete. Callers can pass their own deadline per job.
+    JOB_DEADLINE_SECONDS = int(os.getenv("JOB_DEADLINE_SECONDS", 0))
+    # Deadline of a passport or driving licence job in seconds (0 for none). It bounds
+    # the wait for the uploaded image to become ACTIVE and the provider call.
+    IDENTITY_DEADLINE_SECONDS = int(os.getenv("IDENTITY_DEADLINE_SECONDS", 300))
+
+    # Fair scheduling (core/scheduler.py). Jobs are queued in priority lanes: interactive
+    # uploads from the web UI and bulk backfills. Lanes are served in proportion to their
+    # weights, and tenants within a lane in turn. Provider calls take one of
+    # SCHEDULER_CALL_SLOTS slots per call, granted in the same order, so a bulk job
+    # yields to interactive jobs between its chunks. The worker keeps
+    # WORKER_INTERACTIVE_RESERVE extra job threads for the interactive lane only.
+    SCHEDULER_LANE_WEIGHTS = {
+        "interactive": int(os.getenv("SCHEDULER_INTERACTIVE_WEIGHT", 4)),
+        "bulk": int(os.getenv("SCHEDULER_BULK_WEIGHT", 1)),
+    }
+    SCHEDULER_DEFAULT_LANE = os.getenv("SCHEDULER_DEFAULT_LANE", "interactive")
+    SCHEDULER_CALL_SLOTS = int(os.getenv("SCHEDULER_CALL_SLOTS", MAX_CONCURRENT_REQUESTS))
+    WORKER_INTERACTIVE_RESERVE = int(os.getenv("WORKER_INTERACTIVE_RESERVE", 1))
+
+    # A statement job identical to one already in flight in the process (same document
+    # and options) waits for that job's result instead of running the pipeline again
+    SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "True").lower() in ["true", "1", "yes"]
+
+    # Asynchronous job API (POST /jobs, api/jobs.py): jobs run by API_JOB_WORKERS threads.
+    # A job is rejected with 429 when API_MAX_QUEUED_JOBS jobs, or jobs totalling
+    # API_MAX_QUEUED_PAGES pages, are already waiting; finished jobs can be polled for
+    # API_JOB_RETENTION_SECONDS.
+    API_JOB_WORKERS = int(os.getenv("API_JOB_WORKERS", WORKER_CONCURRENCY))
+    API_MAX_QUEUED_JOBS = int(os.getenv("API_MAX_QUEUED_JOBS", 32))
+    API_MAX_QUEUED_PAGES = int(os.getenv("API_MAX_QUEUED_PAGES", 500))
+    API_JOB_RETENTION_SECONDS = int(os.getenv("API_JOB_RETENTION_SECONDS", 3600))
+
+    # Seconds between keep-alive comments on an idle job event stream (GET /jobs/{id}/events)
+    API_EVENT_KEEPALIVE_SECONDS = int(os.getenv("API_EVENT_KEEPALIVE_SECONDS", 15))
+
+    # Multi-document batches (POST /process/batch, core/batch.py): at most
+    # BATCH_MAX_DOCUMENTS statements per request, BATCH_DOCUMENT_CONCURRENCY of them
+    # processed at the same time so that they keep the provider call slots busy
+    BATCH_MAX_DOCUMENTS = int(os.getenv("BATCH_MAX_DOCUMENTS", 24))
+    BATCH_DOCUMENT_CONCURRENCY = int(os.getenv("BATCH_DOCUMENT_CONCURRENCY", SCHEDULER_CALL_SLOTS))
+
+    # Durable store of completed results (core/result_store.py), keyed by document
+    # SHA-256 and pipeline version: resubmitted documents and retried requests with
+    # an Idempotency-Key are answered from it, and results can be fetched by job id
+    RESULT_STORE_ENABLED = os.getenv("RESULT_STORE_ENABLED", "True").lower() in ["true", "1", "yes"]
+    RESULT_STORE_DIR = os.getenv("RESULT_STORE_DIR", str(current_dir / "output" / "results"))
+
+    # Record a trace timeline of each statement job's stages (utils/tracing.py), saved
+    # as trace.json in the job's output directory when file storage is enabled
+    TRACE_ENABLED = os.getenv("TRACE_ENABLED", "True").lower() in ["true", "1", "yes"]
+
+    # Prices of model tokens in USD per million (utils/usage.py), by model: "input"
+    # (uncached prompt tokens), "cached" (prompt tokens read from a cache) and
+    # "output" (including thinking tokens). MODEL_PRICES, a JSON object of the same
+    # shape, adds or replaces models. Calls to models without a price count tokens only.
+    MODEL_PRICES = {
+        "gemini-2.0-flash": {"input": 0.10, "cached": 0.025, "output": 0.40},
+        "gemini-2.5-flash": {"input": 0.30, "cached": 0.075, "output": 2.50},
+        "gemini-2.5-pro": {"input": 1.25, "cached": 0.31, "output": 10.00},
+        **json.loads(os.getenv("MODEL_PRICES", "{}")),
+    }
+
+    # Dry-run planner (core/planner.py): statistics of each complete statement job are
+    # appended to PLANNER_HISTORY_PATH, and plans are estimated from the most recent
+    # PLANNER_HISTORY_JOBS jobs
+    PLANNER_HISTORY_PATH = os.getenv("PLANNER_HISTORY_PATH", str(current_dir / "output" / "job_history.jsonl"))
+    PLANNER_HISTORY_JOBS = int(os.getenv("PLANNER_HISTORY_JOBS", 200))
+
+    # Profile every statement job (utils/profiling.py): cProfile and tracemalloc per
+    # stage, reported in the job's artifacts with PROFILE_TOP_ENTRIES entries per
+    # report. Single jobs can be profiled with --profile or the X-Profile header; the
+    # reports of API jobs, whose work directories are temporary, go to PROFILE_DIR.
+    PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "False").lower() in ["true", "1", "yes"]
+    PROFILE_TOP_ENTRIES = int(os.getenv("PROFILE_TOP_ENTRIES", 30))
+    PROFILE_DIR = os.getenv("PROFILE_DIR", str(current_dir / "output" / "profiles"))
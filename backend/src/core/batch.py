@@ -0,0 +1,176 @@
+"""
+Multi-document batches.
+
+Brokers send packs of monthly statements for one applicant, which used to be posted
+to /process one by one, each processed in isolation and the pool idle between the
+client's calls. A batch runs its documents concurrently instead, up to
+Settings.BATCH_DOCUMENT_CONCURRENCY at a time. A document runs its chunks one after
+another, so it has one provider call in flight at a time; running several documents
+at once keeps the shared call slots of the call scheduler (core/scheduler.py) busy,
+and the batch's calls still take turns with other jobs of its lane and tenant.
+
+Documents that fail are reported in the batch and do not fail it. The per-document
+results are combined by aggregate_results() into one summary across statements.
+"""
+
+import contextvars
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    from backend.src.config.settings import Settings
+    from backend.src.core.validation import DATE_FORMAT, direction_sign, parse_amount
+except ImportError:
+    from src.config.settings import Settings
+    from src.core.validation import DATE_FORMAT, direction_sign, parse_amount
+
+logger = logging.getLogger(__name__)
+
+
+def process_batch(
+    run_document: Callable[[Dict[str, Any]], Dict[str, Any]],
+    documents: List[Dict[str, Any]],
+    concurrency: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Run every document of a batch, several at a time.
+
+    Each document runs in a copy of the caller's context, so it inherits the caller's
+    lane, tenant, deadline and credential.
+
+    Args:
+        run_document: Processes one document and returns its result
+        documents: The documents, each a dictionary with at least a "filename"
+        concurrency: Documents run at the same time (defaults to
+            Settings.BATCH_DOCUMENT_CONCURRENCY)
+
+    Returns:
+        One entry per document, in the order given: the document's fields plus
+        "success" and either "data" (the result) or "error"
+    """
+    concurrency = max(1, min(concurrency or Settings.BATCH_DOCUMENT_CONCURRENCY, len(documents) or 1))
+
+    def run(document: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            return {**document, "success": True, "data": run_document(document)}
+        except Exception as e:
+            logger.error(f"Batch document {document.get('filename')} failed: {str(e)}")
+            return {**document, "success": False, "error": str(e)}
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch-document") as executor:
+        futures = [
+            executor.submit(contextvars.copy_context().run, run, document)
+            for document in documents
+        ]
+        return [future.result() for future in futures]
+
+
+def _month(date: Any) -> Optional[datetime]:
+    try:
+        return datetime.strptime(str(date or '').strip(), DATE_FORMAT)
+    except ValueError:
+        return None
+
+
+def aggregate_results(documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Combine the results of a batch's statements into one summary.
+
+    Statements of the same account often overlap by a few days; a transaction found
+    in more than one document (same account, date, description, amount, direction and
+    balance) is counted once and reported in "duplicate_transactions".
+
+    Args:
+        documents: Entries returned by process_batch()
+
+    Returns:
+        Dictionary with the documents that failed or are incomplete, the applicants and
+        accounts found, the period covered, and money paid in and withdrawn in total,
+        by category and by month (yyyy-mm)
+    """
+    applicants = set()
+    accounts: Dict[tuple, Dict[str, Any]] = {}
+    seen: Dict[tuple, int] = {}
+    duplicates = 0
+    counted = 0
+    paid_in = withdrawn = 0.0
+    categories = defaultdict(lambda: {"paid_in": 0.0, "withdrawn": 0.0})
+    months = defaultdict(lambda: {"paid_in": 0.0, "withdrawn": 0.0})
+    first = last = None
+
+    for position, document in enumerate(documents):
+        if not document.get("success"):
+            continue
+        data = document.get("data") or {}
+        info = data.get("personal_info") or {}
+        if info.get("fullName"):
+            applicants.add(info["fullName"].strip())
+        account = (info.get("sortCode") or "", info.get("accountNumber") or "")
+        if any(account):
+            entry = accounts.setdefault(account, {
+                "sortCode": account[0],
+                "accountNumber": account[1],
+                "bankProvider": info.get("bankProvider"),
+                "documents": [],
+            })
+            entry["documents"].append(document.get("filename"))
+
+        for transaction in data.get("transactions") or []:
+            key = account + tuple(
+                str(transaction.get(field) or '').strip()
+                for field in ("Date", "Description", "Amount", "Direction", "Balance")
+            )
+            # Rows repeated within one statement are genuine; across statements they overlap
+            if seen.setdefault(key, position) != position:
+                duplicates += 1
+                continue
+            counted += 1
+
+            amount = parse_amount(transaction.get("Amount"))
+            sign = direction_sign(transaction.get("Direction"))
+            if amount is None or sign is None:
+                continue
+            side = "paid_in" if sign > 0 else "withdrawn"
+            amount = abs(amount)
+            if sign > 0:
+                paid_in += amount
+            else:
+                withdrawn += amount
+            categories[transaction.get("Category") or "Unknown"][side] += amount
+            date = _month(transaction.get("Date"))
+            if date is not None:
+                months[date.strftime("%Y-%m")][side] += amount
+                first = date if first is None or date < first else first
+                last = date if last is None or date > last else last
+
+    def rounded(totals: Dict[str, Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+        return {
+            name: {side: round(value, 2) for side, value in sides.items()}
+            for name, sides in sorted(totals.items())
+        }
+
+    return {
+        "documents": len(documents),
+        "succeeded": sum(1 for document in documents if document.get("success")),
+        "failed": [document.get("filename") for document in documents if not document.get("success")],
+        "incomplete": [
+            document.get("filename") for document in documents
+            if document.get("success") and not (document.get("data") or {}).get("complete", True)
+        ],
+        "applicants": sorted(applicants),
+        "accounts": list(accounts.values()),
+        "period": {
+            "start": first.strftime(DATE_FORMAT) if first else None,
+            "end": last.strftime(DATE_FORMAT) if last else None,
+        },
+        "transactions": counted,
+        "duplicate_transactions": duplicates,
+        "total_paid_in": round(paid_in, 2),
+        "total_withdrawn": round(withdrawn, 2),
+        "net": round(paid_in - withdrawn, 2),
+        "categories": rounded(categories),
+        "months": rounded(months),
+    }
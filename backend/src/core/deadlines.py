@@ -0,0 +1,119 @@
+"""
+Per-job deadlines.
+
+A job's deadline is a time.monotonic() timestamp on its JobContext. Stages run through
+run_within(), which waits for a stage only until the deadline and then gives up on it
+with DeadlineExceededError, so the caller can return what has completed so far. The
+deadline is also made current for the code running inside the stage, so that provider
+calls can pass the time left on as a request timeout and polling loops stop waiting:
+work that was given up on is then cut off shortly after the deadline instead of
+running to completion in the background.
+"""
+
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+try:
+    from backend.src.config.settings import Settings
+    from backend.src.utils.exceptions import DeadlineExceededError
+except ImportError:
+    from src.config.settings import Settings
+    from src.utils.exceptions import DeadlineExceededError
+
+_current_deadline: contextvars.ContextVar = contextvars.ContextVar("job_deadline", default=None)
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def deadline_after(seconds: Optional[float]) -> Optional[float]:
+    """Return the deadline `seconds` from now, or None for no deadline (None or 0)."""
+    if not seconds:
+        return None
+    return time.monotonic() + float(seconds)
+
+
+def current_deadline() -> Optional[float]:
+    """Return the deadline of the stage running in this context, if any."""
+    return _current_deadline.get()
+
+
+def remaining_time(deadline: Optional[float] = None) -> Optional[float]:
+    """
+    Seconds left before `deadline` (default: the current deadline), never negative.
+
+    Returns:
+        None when there is no deadline
+    """
+    deadline = deadline if deadline is not None else _current_deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def check_deadline(what: str = "stage", deadline: Optional[float] = None) -> None:
+    """
+    Raise DeadlineExceededError if `deadline` (default: the current deadline) has passed.
+
+    Args:
+        what: Description of the work that would have started, for the error message
+    """
+    if remaining_time(deadline) == 0.0:
+        raise DeadlineExceededError(f"Job deadline expired before {what} could complete")
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[float]):
+    """Make `deadline` current for the code run in this block (in this thread)."""
+    token = _current_deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _current_deadline.reset(token)
+
+
+def run_within(deadline: Optional[float], what: str, fn: Callable, *args, **kwargs):
+    """
+    Run `fn(*args, **kwargs)` and wait for it no longer than until `deadline`.
+
+    The call runs on a stage thread with `deadline` current, so nested provider calls
+    honour it too. Without a deadline it is run directly.
+
+    Args:
+        deadline: time.monotonic() deadline, or None
+        what: Description of the stage, for the error message
+
+    Returns:
+        The stage's return value
+
+    Raises:
+        DeadlineExceededError: The deadline passed before the stage completed
+    """
+    if deadline is None:
+        return fn(*args, **kwargs)
+
+    check_deadline(what, deadline)
+    context = contextvars.copy_context()
+    context.run(_current_deadline.set, deadline)
+    future = _get_executor().submit(context.run, fn, *args, **kwargs)
+    try:
+        return future.result(timeout=remaining_time(deadline))
+    except FutureTimeoutError:
+        future.cancel()
+        raise DeadlineExceededError(f"Job deadline expired before {what} could complete")
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Stage threads given up on keep their slot until their request times out,
+            # so allow more threads than requests run at once
+            _executor = ThreadPoolExecutor(
+                max_workers=2 * Settings.HTTP_POOL_SIZE,
+                thread_name_prefix="job-stage"
+            )
+        return _executor
@@ -0,0 +1,124 @@
+"""
+Per-job execution context.
+
+Everything that belongs to a single processing job (export options, output directory,
+scratch space, checkpoint journal, artifact archive and result buffers) lives on a
+JobContext that is passed through the services, instead of being toggled on the shared
+Settings class or accumulated in module globals. Concurrent jobs therefore never see each other's
+options, and a job's buffers and scratch files are released when it completes.
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    from backend.src.config.settings import Settings
+    from backend.src.core.deadlines import deadline_after, remaining_time
+    from backend.src.core.journal import JobJournal
+    from backend.src.utils.artifact_writer import JobArtifacts
+    from backend.src.utils.remote_files import get_remote_file_manager
+except ImportError:
+    from src.config.settings import Settings
+    from src.core.deadlines import deadline_after, remaining_time
+    from src.core.journal import JobJournal
+    from src.utils.artifact_writer import JobArtifacts
+    from src.utils.remote_files import get_remote_file_manager
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class JobContext:
+    """State and options of one processing job."""
+    output_dir: Optional[str] = None
+    export_raw_responses: bool = field(default_factory=lambda: Settings.EXPORT_RAW_GEMINI_RESPONSES)
+    journal: Optional[JobJournal] = None
+    artifacts: Optional[JobArtifacts] = None
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    # time.monotonic() by which the job must return (None for no deadline)
+    deadline: Optional[float] = field(default_factory=lambda: deadline_after(Settings.JOB_DEADLINE_SECONDS))
+
+    # Result buffers, filled in as the job progresses
+    transactions: List[Dict[str, Any]] = field(default_factory=list)
+    personal_info: Any = None
+    # Stages left unfinished when the deadline expired
+    incomplete: List[str] = field(default_factory=list)
+    # Called with (stage, status, details) as the job's stages start and complete
+    listeners: List[Callable[[str, str, Dict[str, Any]], None]] = field(default_factory=list)
+
+    _scratch_dir: Optional[str] = field(default=None, repr=False)
+    _closed: bool = field(default=False, repr=False)
+
+    @property
+    def closed(self) -> bool:
+        """Whether the job has been closed (stages abandoned at its deadline may still run)."""
+        return self._closed
+
+    @property
+    def scratch_dir(self) -> str:
+        """Private temporary directory of this job, created on first use."""
+        if self._closed:
+            raise RuntimeError(f"Job {self.job_id} is closed")
+        if self._scratch_dir is None:
+            self._scratch_dir = tempfile.mkdtemp(prefix=f"job_{self.job_id[:8]}_")
+            logger.info(f"Created temporary directory: {self._scratch_dir}")
+        return self._scratch_dir
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the job's deadline, or None without a deadline."""
+        return remaining_time(self.deadline)
+
+    def emit(self, stage: str, status: str, **details: Any) -> None:
+        """
+        Report the progress of a stage to the job's listeners. A failing listener is
+        logged and does not affect the job; stages abandoned after the job was closed
+        report nothing.
+
+        Args:
+            stage: The stage, e.g. "chunk:2" or "summary"
+            status: "started", "completed", ...
+            details: JSON-serializable facts about the stage
+        """
+        if self._closed:
+            return
+        for listener in self.listeners:
+            try:
+                listener(stage, status, details)
+            except Exception as e:
+                logger.warning(f"Progress listener of job {self.job_id} failed: {str(e)}")
+
+    def export_path(self, filename: str) -> Optional[str]:
+        """
+        Path to export a raw response to, or None when raw responses are not exported
+        for this job.
+        """
+        if not self.export_raw_responses or not self.output_dir:
+            return None
+        return os.path.join(self.output_dir, filename)
+
+    def close(self) -> None:
+        """
+        Remove the scratch directory, release the result buffers and queue the
+        artifact archive to be finalized and the job's remote uploads to be deleted.
+        """
+        self._closed = True
+        if self.artifacts is not None:
+            self.artifacts.close()
+        get_remote_file_manager().release_job(self.job_id)
+        if self._scratch_dir:
+            shutil.rmtree(self._scratch_dir, ignore_errors=True)
+            logger.info(f"Removed temporary directory: {self._scratch_dir}")
+            self._scratch_dir = None
+        self.transactions = []
+        self.personal_info = None
+
+    def __enter__(self) -> "JobContext":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -0,0 +1,132 @@
+"""
+Durable per-job checkpoint journal.
+
+Each completed pipeline stage (chunk transactions, categorizations, personal info,
+reconciliation, summary) is appended as one JSON line to `journal.jsonl` in the job's
+output directory and flushed to disk. When a job is resumed, stages already in the
+journal are read back instead of being re-run, so the cost of a restart is
+proportional to the unfinished work.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_FILENAME = "journal.jsonl"
+
+# Marker for a stage result that has not been recorded
+MISSING = object()
+
+
+def job_fingerprint(pdf_path: str, **options: Any) -> str:
+    """
+    Fingerprint of a job's input document and the options that change its results.
+    A journal is only reused when the fingerprint matches.
+    """
+    digest = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    digest.update(json.dumps(options, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class JobJournal:
+    """Append-only journal of completed stage results for one job."""
+
+    def __init__(self, output_dir: str, fingerprint: str, resume: bool = False):
+        """
+        Open the journal in `output_dir`.
+
+        Args:
+            output_dir: The job's output directory
+            fingerprint: job_fingerprint() of the job's input and options
+            resume: Reuse the results already in the journal; otherwise start afresh
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        self.path = os.path.join(output_dir, JOURNAL_FILENAME)
+        self.fingerprint = fingerprint
+        self._entries: Dict[Tuple[str, str], Any] = {}
+        self._lock = threading.Lock()
+
+        if resume and self._load():
+            logger.info(f"Resuming job from {self.path} ({len(self._entries)} completed stage(s))")
+            return
+
+        # Start a new journal for this input
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"stage": "job", "key": "", "data": {"fingerprint": fingerprint}}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _load(self) -> bool:
+        """Read an existing journal. Returns False if there is none or it belongs to another input."""
+        if not os.path.exists(self.path):
+            return False
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+        entries = {}
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # The process died while writing this line
+                logger.warning(f"Ignoring truncated journal record in {self.path}")
+                continue
+            entries[(record["stage"], record["key"])] = record["data"]
+
+        header = entries.pop(("job", ""), None)
+        if not header or header.get("fingerprint") != self.fingerprint:
+            logger.info(f"Journal {self.path} was written for a different input, starting afresh")
+            return False
+
+        self._entries = entries
+        return True
+
+    def get(self, stage: str, key: Any = "", default: Any = MISSING) -> Any:
+        """Return the recorded result of a stage, or `default` if it has not completed."""
+        with self._lock:
+            return self._entries.get((stage, str(key)), default)
+
+    def has(self, stage: str, key: Any = "") -> bool:
+        """Whether a stage has completed."""
+        return self.get(stage, key) is not MISSING
+
+    def record(self, stage: str, data: Any, key: Any = "") -> None:
+        """
+        Append the result of a completed stage and flush it to disk.
+
+        Args:
+            stage: Stage name (parse, categorize, personal_info, reconciliation, summary)
+            data: JSON-serializable stage result
+            key: Distinguishes repeated stages, e.g. the chunk number
+        """
+        record = {"stage": stage, "key": str(key), "data": data, "time": time.time()}
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._entries[(stage, str(key))] = data
+
+
+def open_journal(output_dir: Optional[str], pdf_path: str, resume: bool = False, **options: Any) -> Optional[JobJournal]:
+    """
+    Open the journal for a job, or return None when there is no output directory to keep it in.
+
+    Args:
+        output_dir: The job's output directory
+        pdf_path: Path to the input document
+        resume: Reuse results already in the journal
+        **options: Processing options that change the results (e.g. chunk_count)
+    """
+    if not output_dir:
+        return None
+    return JobJournal(output_dir, job_fingerprint(pdf_path, **options), resume=resume)
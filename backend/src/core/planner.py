@@ -0,0 +1,317 @@
+"""
+Dry-run planning of statement jobs.
+
+Before a large backfill is accepted its cost and duration used to be unknown until
+it had run. plan_statement() inspects a PDF without contacting any provider (its
+page count, whether it has a text layer, the chunks it would be split into and
+whether the result store already holds its result) and estimates the uploads and
+model calls the job would make, its tokens, cost and wall-clock time.
+
+Estimates come from the history of completed jobs (JobHistory, a JSON-lines file
+appended to by every complete statement job): tokens per page of each stage and
+seconds per page of the whole job, averaged over the most recent jobs of the same
+provider. Without history, tokens are estimated from the prompts and the tokens
+Gemini counts per PDF page, and time from DEFAULT_CALL_SECONDS.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+try:
+    from backend.src.config.settings import Settings
+    from backend.src.core import prompts
+    from backend.src.core.result_store import file_sha256, get_result_store, pipeline_version
+    from backend.src.services.gemini_service import StatementGeminiService
+    from backend.src.utils.lazy_import import lazy_import
+    from backend.src.utils.usage import call_cost
+except ImportError:
+    from src.config.settings import Settings
+    from src.core import prompts
+    from src.core.result_store import file_sha256, get_result_store, pipeline_version
+    from src.services.gemini_service import StatementGeminiService
+    from src.utils.lazy_import import lazy_import
+    from src.utils.usage import call_cost
+
+PyPDF2 = lazy_import("PyPDF2")
+
+logger = logging.getLogger(__name__)
+
+# Tokens Gemini counts for each page of a PDF
+TOKENS_PER_PDF_PAGE = 258
+# Rough characters per token of English prompt text
+CHARS_PER_TOKEN = 4
+# Output tokens without history: per page for the per-chunk stages, per call otherwise
+DEFAULT_OUTPUT_TOKENS = {"parse": 600, "categorize": 300, "personal_info": 200, "summary": 1500}
+# Seconds per call without history, by stage
+DEFAULT_CALL_SECONDS = {
+    "upload": 2.0,
+    "file_active_wait": 5.0,
+    "parse": 20.0,
+    "categorize": 8.0,
+    "personal_info": 5.0,
+    "summary": 15.0,
+}
+
+_TOKEN_FIELDS = ("prompt_tokens", "output_tokens", "cached_tokens")
+
+
+class JobHistory:
+    """Statistics of recently completed statement jobs, kept in a JSON-lines file."""
+
+    def __init__(self, path: str, max_jobs: int = None):
+        """
+        Args:
+            path: The history file, created on the first record
+            max_jobs: Most recent jobs used for estimates (defaults to
+                Settings.PLANNER_HISTORY_JOBS); older lines are dropped as the file grows
+        """
+        self.path = path
+        self.max_jobs = max_jobs or Settings.PLANNER_HISTORY_JOBS
+        self._lock = threading.Lock()
+
+    def record(self, provider: str, pages: int, chunks: int, seconds: float, usage: Dict[str, Any]) -> None:
+        """
+        Add a completed job.
+
+        Args:
+            provider: "gemini" or "openai"
+            pages: Pages of the statement
+            chunks: Chunks it was split into
+            seconds: Wall-clock time of the job
+            usage: The job's usage (see utils/usage.py)
+        """
+        entry = {
+            "finished": time.time(),
+            "provider": provider,
+            "pages": pages,
+            "chunks": chunks,
+            "seconds": round(seconds, 3),
+            "stages": {
+                stage: {field: totals.get(field, 0) for field in ("calls",) + _TOKEN_FIELDS}
+                for stage, totals in (usage.get("stages") or {}).items()
+            },
+        }
+        try:
+            with self._lock:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry) + "\n")
+                entries = self._read()
+                if len(entries) > 2 * self.max_jobs:
+                    # Keep the file from growing without bound
+                    with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+                        f.writelines(json.dumps(kept) + "\n" for kept in entries[-self.max_jobs:])
+                    os.replace(self.path + ".tmp", self.path)
+        except OSError as e:
+            logger.warning(f"Could not record job statistics in {self.path}: {str(e)}")
+
+    def jobs(self, provider: str) -> List[Dict[str, Any]]:
+        """The most recent completed jobs of `provider`, oldest first."""
+        with self._lock:
+            entries = self._read()
+        return [entry for entry in entries if entry.get("provider") == provider][-self.max_jobs:]
+
+    def _read(self) -> List[Dict[str, Any]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return []
+        entries = []
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A line cut short by a process that died
+                continue
+        return entries
+
+
+_job_history: Optional[JobHistory] = None
+_job_history_lock = threading.Lock()
+
+
+def get_job_history() -> JobHistory:
+    """Return the process-wide job history (Settings.PLANNER_HISTORY_PATH)."""
+    global _job_history
+    with _job_history_lock:
+        if _job_history is None:
+            _job_history = JobHistory(Settings.PLANNER_HISTORY_PATH)
+        return _job_history
+
+
+def record_job(pdf_path: str, use_gemini: bool, chunk_count: int, seconds: float, usage: Dict[str, Any]) -> None:
+    """Add a complete statement job to the job history; failures are only logged."""
+    try:
+        pages = len(PyPDF2.PdfReader(pdf_path).pages)
+    except Exception as e:
+        logger.warning(f"Could not count the pages of {pdf_path} for the job history: {str(e)}")
+        return
+    chunks = len(StatementGeminiService.chunk_page_ranges(pages, chunk_count)) if use_gemini else pages
+    get_job_history().record("gemini" if use_gemini else "openai", pages, chunks, seconds, usage)
+
+
+def inspect_pdf(pdf_path: str) -> Dict[str, Any]:
+    """
+    Page count and text layer of a PDF.
+
+    Returns:
+        Dictionary with "pages", "text_pages" (pages with extractable text),
+        "text_layer" (whether most pages have one) and "size_bytes"
+
+    Raises:
+        ValueError: The file is not a readable PDF
+    """
+    try:
+        reader = PyPDF2.PdfReader(pdf_path)
+        pages = len(reader.pages)
+        text_pages = sum(1 for page in reader.pages if (page.extract_text() or "").strip())
+    except Exception as e:
+        raise ValueError(f"Could not read the PDF: {str(e)}")
+    return {
+        "pages": pages,
+        "text_pages": text_pages,
+        "text_layer": pages > 0 and text_pages * 2 >= pages,
+        "size_bytes": os.path.getsize(pdf_path),
+    }
+
+
+def _prompt_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN
+
+
+def _default_tokens(stage: str, pages: int, calls: int, first_chunk_pages: int, parse_output: int) -> Dict[str, int]:
+    """Tokens of a stage estimated from its prompt and input, for a job without history."""
+    prompt = {
+        "parse": prompts.GEMINI_STATEMENT_PARSE,
+        "categorize": prompts.GEMINI_TRANSACTION_CATEGORISATION,
+        "personal_info": prompts.GEMINI_PERSONAL_INFO_PARSE,
+        "summary": prompts.GEMINI_TRANSACTION_SUMMARY,
+    }[stage]
+    instructions = _prompt_tokens(prompt) * calls
+    document = {
+        "parse": pages * TOKENS_PER_PDF_PAGE,
+        "categorize": parse_output,
+        "personal_info": first_chunk_pages * TOKENS_PER_PDF_PAGE,
+        "summary": parse_output,
+    }[stage]
+    per_page = stage in ("parse", "categorize")
+    return {
+        "prompt_tokens": instructions + document,
+        "output_tokens": DEFAULT_OUTPUT_TOKENS[stage] * (pages if per_page else calls),
+        "cached_tokens": instructions if Settings.GEMINI_PROMPT_CACHE_ENABLED else 0,
+    }
+
+
+def plan_statement(
+    pdf_path: str,
+    use_gemini: bool = True,
+    chunk_count: int = 3,
+    history: Optional[JobHistory] = None
+) -> Dict[str, Any]:
+    """
+    Plan a statement job without running it or contacting any provider.
+
+    Args:
+        pdf_path: Path to the PDF file
+        use_gemini: Whether the job would use Gemini instead of OpenAI
+        chunk_count: Number of chunks the PDF would be split into
+        history: Completed jobs to estimate from (defaults to get_job_history())
+
+    Returns:
+        Dictionary with the "document" (see inspect_pdf), its "chunks", the
+        "stored_result" it would be answered with (a job id, or None), the
+        "uploads" and "model_calls" by stage, and the "estimate" of tokens by stage,
+        cost in USD and wall-clock seconds, with the "basis" of the estimate
+
+    Raises:
+        ValueError: The file is not a readable PDF
+    """
+    document = inspect_pdf(pdf_path)
+    pages = document["pages"]
+    provider = "gemini" if use_gemini else "openai"
+    history = history or get_job_history()
+
+    store = get_result_store()
+    version = pipeline_version(use_gemini=use_gemini, chunk_count=chunk_count)
+    stored_job = store.contains(file_sha256(pdf_path), version) if store is not None else None
+
+    if use_gemini:
+        chunks = StatementGeminiService.chunk_page_ranges(pages, chunk_count)
+        # Each chunk is uploaded, parsed and categorized; the first is uploaded again
+        # for personal information
+        calls = {"parse": len(chunks), "categorize": len(chunks), "personal_info": 1 if chunks else 0}
+        uploads = len(chunks) + calls["personal_info"]
+    else:
+        # The OpenAI pipeline sends every page image, and the front page once more
+        chunks = [(page, page) for page in range(1, pages + 1)]
+        calls = {"parse": pages, "personal_info": 1 if pages else 0}
+        uploads = pages + calls["personal_info"]
+    calls["summary"] = 1 if pages else 0
+    if stored_job is not None:
+        calls = {stage: 0 for stage in calls}
+        uploads = 0
+
+    past = [job for job in history.jobs(provider) if job.get("pages")]
+    history_pages = sum(job["pages"] for job in past)
+    tokens = {}
+    if past:
+        # Tokens per page of each stage and seconds per page of the job, over recent jobs
+        for stage in calls:
+            totals = [job["stages"].get(stage, {}) for job in past]
+            tokens[stage] = {
+                field: round(sum(total.get(field, 0) for total in totals) * pages / history_pages)
+                for field in _TOKEN_FIELDS
+            }
+        seconds = sum(job["seconds"] for job in past) * pages / history_pages
+        basis = f"history of {len(past)} {provider} job(s)"
+    else:
+        first_chunk_pages = chunks[0][1] - chunks[0][0] + 1 if chunks else 0
+        parse_output = DEFAULT_OUTPUT_TOKENS["parse"] * pages
+        for stage, count in calls.items():
+            tokens[stage] = _default_tokens(stage, pages, count, first_chunk_pages, parse_output)
+        seconds = uploads * (DEFAULT_CALL_SECONDS["upload"] + DEFAULT_CALL_SECONDS["file_active_wait"])
+        seconds += sum(DEFAULT_CALL_SECONDS[stage] * count for stage, count in calls.items())
+        basis = "defaults"
+    if stored_job is not None:
+        tokens = {stage: {field: 0 for field in _TOKEN_FIELDS} for stage in calls}
+        seconds = 0.0
+
+    cost = 0.0
+    unpriced = set()
+    for stage, counts in tokens.items():
+        model = Settings.GEMINI_MODEL_ROUTES.get(stage, Settings.GEMINI_DEFAULT_MODEL) if use_gemini else Settings.ASSISTANT_ID
+        stage_cost = call_cost(model, **counts)
+        if stage_cost is None:
+            unpriced.add(model)
+        else:
+            cost += stage_cost
+
+    return {
+        "provider": provider,
+        "document": document,
+        "pipeline_version": version,
+        "stored_result": stored_job,
+        "chunks": [{"index": i, "pages": [first, last]} for i, (first, last) in enumerate(chunks, start=1)],
+        "uploads": uploads,
+        "model_calls": {**calls, "total": sum(calls.values())},
+        # Reconciliation may re-extract up to this many pages (an upload and two calls each)
+        "reextraction_max_pages": Settings.RECONCILIATION_MAX_PAGES if use_gemini and Settings.RECONCILIATION_ENABLED else 0,
+        "estimate": {
+            "tokens": {
+                **{field: sum(counts[field] for counts in tokens.values()) for field in _TOKEN_FIELDS},
+                "stages": tokens,
+            },
+            "cost_usd": round(cost, 6),
+            "unpriced_models": sorted(unpriced),
+            "seconds": round(seconds, 1),
+            "basis": basis,
+        },
+        "warnings": [] if document["text_layer"] or not pages else [
+            "The PDF has no text layer (scanned); extraction is more likely to need re-extraction"
+        ],
+    }
@@ -156,3 +156,16 @@ Return as a JSON object with the following structure:
 
 
 """
+
+GEMINI_STRUCTURED_OUTPUT_NOTE = """\
+
+Return the result as JSON that conforms to the supplied response schema.
+Ignore any instructions above about CSV formatting, headers or code fences.
+"""
+
+GEMINI_STRUCTURED_CATEGORISATION_NOTE = """\
+
+Return the result as JSON that conforms to the supplied response schema.
+Do not return the CSV file. Instead return exactly one assignment per input row,
+using the value of the row's Index column and one of the allowed categories.
+"""
@@ -0,0 +1,154 @@
+"""
+Running-balance reconciliation of extracted statement transactions.
+
+Every transaction row carries the balance printed on the statement, and the personal
+information carries the starting/finishing balance and the totals paid in/withdrawn.
+Walking the rows and applying each Amount/Direction to a running balance shows where
+rows were dropped or duplicated; each discontinuity is localised to the statement
+page(s) it sits between so that only those pages need to be re-extracted.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from backend.src.core.validation import (
+        BALANCE_TOLERANCE,
+        direction_sign,
+        parse_amount,
+        running_balance_breaks
+    )
+except ImportError:
+    from src.core.validation import (
+        BALANCE_TOLERANCE,
+        direction_sign,
+        parse_amount,
+        running_balance_breaks
+    )
+
+# (first page, last page) a row may have come from, 1-based and inclusive
+PageSpan = Tuple[int, int]
+
+
+@dataclass
+class Discontinuity:
+    """A row whose printed balance does not follow from the rows before it."""
+    index: int
+    expected_balance: float
+    printed_balance: float
+    pages: List[int]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "index": self.index,
+            "expected_balance": round(self.expected_balance, 2),
+            "printed_balance": round(self.printed_balance, 2),
+            "pages": self.pages,
+        }
+
+
+@dataclass
+class ReconciliationReport:
+    """Outcome of reconciling one statement."""
+    discontinuities: List[Discontinuity] = field(default_factory=list)
+    checks: Dict[str, bool] = field(default_factory=dict)
+    transitions_checked: int = 0
+
+    @property
+    def suspect_pages(self) -> List[int]:
+        """Pages that should be re-extracted, in page order."""
+        return sorted({page for discontinuity in self.discontinuities for page in discontinuity.pages})
+
+    @property
+    def confidence(self) -> float:
+        """
+        Fraction of checks that passed: every balance transition that could be checked
+        plus each statement level check (finishing balance, totals paid in / withdrawn).
+        """
+        total = self.transitions_checked + len(self.checks)
+        if total == 0:
+            return 0.0
+        passed = (self.transitions_checked - len(self.discontinuities)) + sum(self.checks.values())
+        return round(passed / total, 4)
+
+    @property
+    def balanced(self) -> bool:
+        """Whether every check passed."""
+        return not self.discontinuities and all(self.checks.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "balanced": self.balanced,
+            "confidence": self.confidence,
+            "discontinuities": [discontinuity.to_dict() for discontinuity in self.discontinuities],
+            "suspect_pages": self.suspect_pages,
+            "checks": dict(self.checks),
+        }
+
+
+def _personal_value(personal_info: Any, key: str) -> Optional[float]:
+    if not isinstance(personal_info, dict):
+        return None
+    return parse_amount(personal_info.get(key))
+
+
+def _close(a: float, b: float) -> bool:
+    return abs(a - b) <= BALANCE_TOLERANCE
+
+
+def reconcile(
+    transactions: List[Dict[str, Any]],
+    row_pages: List[PageSpan],
+    personal_info: Any = None
+) -> ReconciliationReport:
+    """
+    Reconcile the running balance of a statement's transactions.
+
+    Args:
+        transactions: Transaction dictionaries in statement order
+        row_pages: For each transaction, the span of pages it may have come from
+        personal_info: Structured personal information (dict); free text is ignored
+
+    Returns:
+        ReconciliationReport describing discontinuities and statement level checks
+    """
+    starting_balance = _personal_value(personal_info, "statementStartingBalance")
+    finishing_balance = _personal_value(personal_info, "statementFinishingBalance")
+
+    breaks, final_balance = running_balance_breaks(transactions, starting_balance=starting_balance)
+
+    report = ReconciliationReport()
+    report.transitions_checked = sum(
+        1 for index, transaction in enumerate(transactions)
+        if parse_amount(transaction.get('Balance')) is not None and (index > 0 or starting_balance is not None)
+    )
+
+    for index, expected, printed in breaks:
+        # The missing or duplicated rows sit between this row and the one before it
+        pages = set(range(row_pages[index][0], row_pages[index][1] + 1))
+        if index > 0:
+            pages.update(range(row_pages[index - 1][0], row_pages[index - 1][1] + 1))
+        report.discontinuities.append(Discontinuity(index, expected, printed, sorted(pages)))
+
+    if finishing_balance is not None and final_balance is not None:
+        report.checks["finishing_balance"] = _close(final_balance, finishing_balance)
+
+    paid_in = withdrawn = 0.0
+    for transaction in transactions:
+        amount = parse_amount(transaction.get('Amount'))
+        sign = direction_sign(transaction.get('Direction'))
+        if amount is None or sign is None:
+            continue
+        if sign > 0:
+            paid_in += abs(amount)
+        else:
+            withdrawn += abs(amount)
+
+    total_paid_in = _personal_value(personal_info, "totalPaidIn")
+    if total_paid_in is not None:
+        report.checks["total_paid_in"] = _close(paid_in, total_paid_in)
+    total_withdrawn = _personal_value(personal_info, "totalWithdrawn")
+    if total_withdrawn is not None:
+        report.checks["total_withdrawn"] = _close(withdrawn, total_withdrawn)
+
+    return report
@@ -0,0 +1,241 @@
+"""
+Durable store of completed statement results.
+
+/process used to work in a temporary directory and keep nothing, and the web
+route's job directories were never read again, so a statement submitted twice was
+processed twice and a result could not be fetched again later. Completed results are
+now kept in Settings.RESULT_STORE_DIR: an SQLite index (results.db) of blob files
+holding the result JSON, keyed by the document's SHA-256 and the pipeline version.
+
+* The pipeline version (pipeline_version()) covers everything that changes a result
+  for the same document: PIPELINE_REVISION, the prompts, the models and the options.
+  A stored result is only reused while all of them are unchanged.
+* Each stored result keeps the id of the job that produced it, by which it can be
+  fetched later.
+* A client's Idempotency-Key is remembered with the job it started, so retrying the
+  request returns that job instead of starting another.
+
+Only complete results are stored; a result cut short by its deadline is not reused.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+try:
+    from backend.src.config.settings import Settings
+    from backend.src.core import prompts
+    from backend.src.utils.exceptions import IdempotencyConflictError
+except ImportError:
+    from src.config.settings import Settings
+    from src.core import prompts
+    from src.utils.exceptions import IdempotencyConflictError
+
+logger = logging.getLogger(__name__)
+
+# Bump when a code change alters the results of the pipeline
+PIPELINE_REVISION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    job_id TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    pipeline_version TEXT NOT NULL,
+    blob TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS results_by_document ON results (sha256, pipeline_version);
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    idempotency_key TEXT PRIMARY KEY,
+    job_id TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    created REAL NOT NULL
+);
+"""
+
+_SELECT = "SELECT job_id, sha256, pipeline_version, blob, created FROM results"
+
+
+def file_sha256(path: str) -> str:
+    """Return the SHA-256 hex digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def pipeline_version(**options: Any) -> str:
+    """
+    Version of the pipeline a result was produced by, given the job's options that
+    change results (e.g. use_gemini, chunk_count).
+    """
+    digest = hashlib.sha256()
+    prompt_texts = {name: value for name, value in vars(prompts).items() if name.isupper() and isinstance(value, str)}
+    digest.update(json.dumps({
+        "prompts": prompt_texts,
+        "models": Settings.GEMINI_MODEL_ROUTES,
+        "escalation_model": Settings.GEMINI_ESCALATION_MODEL,
+        "structured_output": Settings.GEMINI_STRUCTURED_OUTPUT,
+        "reconciliation": Settings.RECONCILIATION_ENABLED,
+        "options": options,
+    }, sort_keys=True).encode("utf-8"))
+    return f"{PIPELINE_REVISION}.{digest.hexdigest()[:16]}"
+
+
+@dataclass
+class StoredResult:
+    """A completed result in the store."""
+    job_id: str
+    sha256: str
+    pipeline_version: str
+    created: float
+    result: Dict[str, Any]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The result as returned by GET /jobs/{id} once the job is no longer in memory."""
+        return {
+            "job_id": self.job_id,
+            "status": "succeeded",
+            "sha256": self.sha256,
+            "pipeline_version": self.pipeline_version,
+            "finished": self.created,
+            "result": self.result,
+        }
+
+
+class ResultStore:
+    """SQLite index of result blobs, by job id and by document and pipeline version."""
+
+    def __init__(self, directory: str):
+        """
+        Open the store in `directory`, creating it if needed.
+
+        Args:
+            directory: Directory holding results.db and the blobs/ directory
+        """
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.join(directory, "blobs"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(directory, "results.db"), check_same_thread=False)
+        with self._lock, self._db:
+            self._db.executescript(_SCHEMA)
+
+    def get(self, sha256: str, version: str) -> Optional[StoredResult]:
+        """Return the stored result of a document for a pipeline version, if any."""
+        stored = self._load(f"{_SELECT} WHERE sha256 = ? AND pipeline_version = ?", (sha256, version))
+        with self._lock:
+            if stored is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return stored
+
+    def contains(self, sha256: str, version: str) -> Optional[str]:
+        """
+        Return the id of the job whose result is stored for a document and pipeline
+        version, if any, without reading the result or counting a lookup.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT job_id FROM results WHERE sha256 = ? AND pipeline_version = ?",
+                (sha256, version)
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_job(self, job_id: str) -> Optional[StoredResult]:
+        """Return the stored result of a job, if any."""
+        return self._load(f"{_SELECT} WHERE job_id = ?", (job_id,))
+
+    def put(self, job_id: str, sha256: str, version: str, result: Dict[str, Any]) -> StoredResult:
+        """
+        Store a job's complete result. If the document already has a result for this
+        version (an identical job finished first), that result is kept and returned.
+        """
+        blob = os.path.join("blobs", sha256[:2], f"{job_id}.json")
+        path = os.path.join(self.directory, blob)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written in full before it is indexed, so an indexed blob is never partial
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(result, f, default=str)
+        os.replace(path + ".tmp", path)
+
+        created = time.time()
+        with self._lock, self._db:
+            inserted = self._db.execute(
+                "INSERT OR IGNORE INTO results (job_id, sha256, pipeline_version, blob, created)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (job_id, sha256, version, blob, created)
+            ).rowcount
+        if not inserted:
+            os.remove(path)
+            return self._load(f"{_SELECT} WHERE sha256 = ? AND pipeline_version = ?", (sha256, version))
+        logger.info(f"Stored result of job {job_id} for document {sha256[:12]}")
+        return StoredResult(job_id, sha256, version, created, result)
+
+    def claim_key(self, idempotency_key: str, job_id: str, sha256: str) -> str:
+        """
+        Remember that `idempotency_key` started `job_id`, unless it already started a job.
+
+        Returns:
+            The id of the job the key belongs to: `job_id`, or the earlier job
+
+        Raises:
+            IdempotencyConflictError: The key was used for a different document
+        """
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR IGNORE INTO idempotency_keys (idempotency_key, job_id, sha256, created)"
+                " VALUES (?, ?, ?, ?)",
+                (idempotency_key, job_id, sha256, time.time())
+            )
+            claimed_job_id, claimed_sha256 = self._db.execute(
+                "SELECT job_id, sha256 FROM idempotency_keys WHERE idempotency_key = ?",
+                (idempotency_key,)
+            ).fetchone()
+        if claimed_sha256 != sha256:
+            raise IdempotencyConflictError(f"Idempotency key {idempotency_key!r} was used for a different document")
+        return claimed_job_id
+
+    def stats(self) -> Dict[str, int]:
+        """Results stored, and lookups answered from the store or not."""
+        with self._lock:
+            stored = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            return {"stored": stored, "hits": self.hits, "misses": self.misses}
+
+    def _load(self, query: str, parameters: tuple) -> Optional[StoredResult]:
+        with self._lock:
+            row = self._db.execute(query, parameters).fetchone()
+        if row is None:
+            return None
+        job_id, sha256, version, blob, created = row
+        try:
+            with open(os.path.join(self.directory, blob), "r", encoding="utf-8") as f:
+                result = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Could not read the stored result of job {job_id}: {str(e)}")
+            return None
+        return StoredResult(job_id, sha256, version, created, result)
+
+
+_result_store: Optional[ResultStore] = None
+_result_store_lock = threading.Lock()
+
+
+def get_result_store() -> Optional[ResultStore]:
+    """Return the process-wide result store, or None when it is disabled."""
+    global _result_store
+    if not Settings.RESULT_STORE_ENABLED:
+        return None
+    with _result_store_lock:
+        if _result_store is None:
+            _result_store = ResultStore(Settings.RESULT_STORE_DIR)
+        return _result_store
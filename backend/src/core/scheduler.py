@@ -0,0 +1,301 @@
+"""
+Fair scheduling of jobs and provider calls.
+
+Interactive uploads from the web UI and bulk backfills used to share the provider quota
+first come, first served, so a large backfill queued ahead of an upload made the UI
+wait for all of it. Work is now queued in priority lanes (Settings.SCHEDULER_LANE_WEIGHTS):
+
+* Lanes are served by stride scheduling, in proportion to their weights. A lane that
+  was idle does not bank credit while it had nothing queued.
+* Within a lane, tenants take turns, and each tenant's work is served in order, so one
+  tenant's backfill does not starve another's.
+
+Two schedulers use this order. The worker's job queue (FairQueue) decides which job
+starts next. The call scheduler (FairScheduler) hands out Settings.SCHEDULER_CALL_SLOTS
+slots, one per provider call, so a running bulk job gives up its slot after every
+chunk call and waits behind any interactive job's calls for the next one. The lane and
+tenant of the running job are made current through a context variable, like the job's
+deadline and credential, and are inherited by its stage threads.
+
+Fairness holds within a process: backfills share the web tier's quota fairly when they
+are submitted to its worker in the bulk lane.
+"""
+
+import contextvars
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+try:
+    from backend.src.config.settings import Settings
+    from backend.src.core.deadlines import current_deadline, remaining_time
+    from backend.src.utils.exceptions import DeadlineExceededError
+    from backend.src.utils.metrics import IN_FLIGHT, QUEUE_DEPTH
+except ImportError:
+    from src.config.settings import Settings
+    from src.core.deadlines import current_deadline, remaining_time
+    from src.utils.exceptions import DeadlineExceededError
+    from src.utils.metrics import IN_FLIGHT, QUEUE_DEPTH
+
+_current_priority: contextvars.ContextVar = contextvars.ContextVar("job_priority", default=None)
+
+
+def lane_for(lane: Optional[str]) -> str:
+    """
+    Return `lane`, or the default lane when it is not given.
+
+    Raises:
+        ValueError: `lane` is not one of Settings.SCHEDULER_LANE_WEIGHTS
+    """
+    lane = lane or Settings.SCHEDULER_DEFAULT_LANE
+    if lane not in Settings.SCHEDULER_LANE_WEIGHTS:
+        raise ValueError(f"Unknown lane '{lane}', expected one of {sorted(Settings.SCHEDULER_LANE_WEIGHTS)}")
+    return lane
+
+
+def current_priority() -> Tuple[str, Optional[str]]:
+    """Return the (lane, tenant) of the job running in this context."""
+    return _current_priority.get() or (lane_for(None), None)
+
+
+@contextmanager
+def job_priority(lane: Optional[str] = None, tenant: Optional[str] = None):
+    """Make `lane` and `tenant` current for the job run in this block."""
+    token = _current_priority.set((lane_for(lane), tenant))
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+class _Lanes:
+    """Waiting entries by lane and tenant, taken in weighted-fair order."""
+
+    def __init__(self, weights: Dict[str, int]):
+        self.weights = dict(weights)
+        self._waiting = {lane: OrderedDict() for lane in self.weights}
+        self._pass = {lane: 0.0 for lane in self.weights}
+        self._clock = 0.0
+        self._served = {lane: 0 for lane in self.weights}
+        self._wait_total = {lane: 0.0 for lane in self.weights}
+        self._wait_max = {lane: 0.0 for lane in self.weights}
+
+    def push(self, entry: Any, lane: str, tenant: Optional[str]) -> None:
+        tenants = self._waiting[lane]
+        if not tenants:
+            self._pass[lane] = max(self._pass[lane], self._clock)
+        tenants.setdefault(tenant, deque()).append((entry, time.monotonic()))
+
+    def pop(self, lanes: Iterable[str] = None) -> Any:
+        """Take the next entry (from `lanes` only, if given), or None if there is none."""
+        candidates = [lane for lane in (lanes or self.weights) if self._waiting[lane]]
+        if not candidates:
+            return None
+        lane = min(candidates, key=lambda l: self._pass[l])
+        self._clock = self._pass[lane]
+        self._pass[lane] += 1.0 / max(1, self.weights[lane])
+
+        # The tenant served goes to the back of its lane
+        tenants = self._waiting[lane]
+        tenant, entries = next(iter(tenants.items()))
+        entry, enqueued = entries.popleft()
+        del tenants[tenant]
+        if entries:
+            tenants[tenant] = entries
+        self.record(lane, time.monotonic() - enqueued)
+        return entry
+
+    def remove(self, entry: Any, lane: str, tenant: Optional[str]) -> None:
+        """Withdraw an entry that is no longer waiting."""
+        entries = self._waiting[lane].get(tenant)
+        if not entries:
+            return
+        for item in entries:
+            if item[0] is entry:
+                entries.remove(item)
+                break
+        if not entries:
+            del self._waiting[lane][tenant]
+
+    def record(self, lane: str, wait: float) -> None:
+        """Count an entry of `lane` served after waiting `wait` seconds."""
+        self._served[lane] += 1
+        self._wait_total[lane] += wait
+        self._wait_max[lane] = max(self._wait_max[lane], wait)
+
+    def depth(self, lanes: Iterable[str] = None) -> int:
+        return sum(
+            len(entries)
+            for lane in (lanes or self.weights)
+            for entries in self._waiting[lane].values()
+        )
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        now = time.monotonic()
+        stats = {}
+        for lane, tenants in self._waiting.items():
+            oldest = min((entries[0][1] for entries in tenants.values()), default=now)
+            served = self._served[lane]
+            stats[lane] = {
+                "weight": self.weights[lane],
+                "waiting": sum(len(entries) for entries in tenants.values()),
+                "waiting_tenants": len(tenants),
+                "oldest_wait_seconds": round(now - oldest, 3),
+                "served": served,
+                "mean_wait_seconds": round(self._wait_total[lane] / served, 3) if served else 0.0,
+                "max_wait_seconds": round(self._wait_max[lane], 3),
+            }
+        return stats
+
+
+class FairQueue:
+    """
+    Job queue served in lane and tenant order. Offers the parts of queue.Queue the
+    worker uses (put, get, task_done, join, qsize).
+    """
+
+    def __init__(self, maxsize: int = 0, weights: Dict[str, int] = None):
+        """
+        Initialize the queue.
+
+        Args:
+            maxsize: Queued jobs before put() blocks (0 for unbounded)
+            weights: Weight of each lane (defaults to Settings.SCHEDULER_LANE_WEIGHTS)
+        """
+        self.maxsize = maxsize
+        self._lanes = _Lanes(weights or Settings.SCHEDULER_LANE_WEIGHTS)
+        self._unfinished = 0
+        self._condition = threading.Condition()
+
+    def put(self, item: Any, lane: str = None, tenant: str = None) -> None:
+        """Queue `item`, blocking while the queue is full."""
+        lane = lane_for(lane)
+        with self._condition:
+            self._condition.wait_for(lambda: not self.maxsize or self._lanes.depth() < self.maxsize)
+            self._lanes.push(item, lane, tenant)
+            self._unfinished += 1
+            self._condition.notify_all()
+
+    def get(self, lanes: Iterable[str] = None) -> Any:
+        """Take the next item, from `lanes` only if given, blocking until there is one."""
+        lanes = tuple(lanes) if lanes else None
+        with self._condition:
+            self._condition.wait_for(lambda: self._lanes.depth(lanes) > 0)
+            item = self._lanes.pop(lanes)
+            self._condition.notify_all()
+            return item
+
+    def task_done(self) -> None:
+        with self._condition:
+            self._unfinished -= 1
+            self._condition.notify_all()
+
+    def join(self) -> None:
+        """Block until every item put has been marked done."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._unfinished <= 0)
+
+    def qsize(self) -> int:
+        with self._condition:
+            return self._lanes.depth()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Queue depth and wait times per lane."""
+        with self._condition:
+            return self._lanes.stats()
+
+
+class FairScheduler:
+    """Limits concurrent provider calls, granting free slots in lane and tenant order."""
+
+    def __init__(self, slots: int, weights: Dict[str, int] = None):
+        """
+        Initialize the scheduler.
+
+        Args:
+            slots: Calls allowed at the same time
+            weights: Weight of each lane (defaults to Settings.SCHEDULER_LANE_WEIGHTS)
+        """
+        self.slots = max(1, slots)
+        self.running = 0
+        self._lanes = _Lanes(weights or Settings.SCHEDULER_LANE_WEIGHTS)
+        self._granted = set()
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def slot(self, lane: str = None, tenant: str = None):
+        """
+        Hold a call slot for the block, waiting for one if all are taken.
+
+        Args:
+            lane: Lane of the call (defaults to the current job's)
+            tenant: Tenant of the call (defaults to the current job's)
+
+        Raises:
+            DeadlineExceededError: The current job's deadline passed while waiting
+        """
+        if lane is None:
+            lane, job_tenant = current_priority()
+            tenant = tenant or job_tenant
+        self._acquire(lane_for(lane), tenant)
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.running -= 1
+                self._grant()
+
+    def _acquire(self, lane: str, tenant: Optional[str]) -> None:
+        with self._condition:
+            if self.running < self.slots and not self._lanes.depth():
+                self.running += 1
+                self._lanes.record(lane, 0.0)
+                return
+
+            ticket = object()
+            self._lanes.push(ticket, lane, tenant)
+            deadline = current_deadline()
+            while ticket not in self._granted:
+                time_left = remaining_time(deadline)
+                if time_left == 0.0:
+                    self._lanes.remove(ticket, lane, tenant)
+                    raise DeadlineExceededError("Job deadline expired while waiting for a provider call slot")
+                self._condition.wait(time_left)
+            self._granted.discard(ticket)
+
+    def _grant(self) -> None:
+        # Called with the condition held
+        while self.running < self.slots:
+            ticket = self._lanes.pop()
+            if ticket is None:
+                break
+            self._granted.add(ticket)
+            self.running += 1
+        self._condition.notify_all()
+
+    def depth(self) -> int:
+        """Calls waiting for a slot."""
+        with self._condition:
+            return self._lanes.depth()
+
+    def stats(self) -> Dict[str, Any]:
+        """Slots in use, and queue depth and wait times per lane."""
+        with self._condition:
+            return {"slots": self.slots, "running": self.running, "lanes": self._lanes.stats()}
+
+
+_call_scheduler: Optional[FairScheduler] = None
+_call_scheduler_lock = threading.Lock()
+
+
+def get_call_scheduler() -> FairScheduler:
+    """Return the process-wide scheduler of provider calls."""
+    global _call_scheduler
+    with _call_scheduler_lock:
+        if _call_scheduler is None:
+            _call_scheduler = FairScheduler(Settings.SCHEDULER_CALL_SLOTS)
+            QUEUE_DEPTH.set_function(_call_scheduler.depth, queue="provider_calls")
+            IN_FLIGHT.set_function(lambda: _call_scheduler.running, kind="provider_calls")
+        return _call_scheduler
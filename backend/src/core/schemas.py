@@ -0,0 +1,206 @@
+"""
+Typed response schemas for Gemini structured output.
+
+These models are passed to Gemini as the response schema (with the JSON MIME type)
+so that responses can be decoded directly into objects instead of being recovered
+from free text. Each model knows how to convert itself into the dictionary shape
+the rest of the pipeline (CSV export, web UI) already consumes.
+"""
+
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class TransactionCategory(str, Enum):
+    """Categories a transaction can be assigned to."""
+    ESSENTIAL_HOME = "Essential Home"
+    ESSENTIAL_HOUSEHOLD = "Essential Household"
+    NON_ESSENTIAL_HOUSEHOLD = "Non-Essential Household"
+    SALARY = "Salary"
+    NON_ESSENTIAL_ENTERTAINMENT = "Non-Essential Entertainment"
+    GAMBLING = "Gambling"
+    CASH_WITHDRAWAL = "Cash Withdrawal"
+    BANK_TRANSFER = "Bank Transfer"
+    UNKNOWN = "Unknown"
+
+
+TRANSACTION_CATEGORIES = [category.value for category in TransactionCategory]
+
+
+def _format_amount(value: Optional[float]) -> str:
+    """Format a monetary value the way the CSV pipeline expects it."""
+    if value is None:
+        return ''
+    return f"{value:.2f}"
+
+
+class Transaction(BaseModel):
+    """A single statement transaction."""
+    date: str = Field(description="Transaction date in dd-mm-yyyy format")
+    description: str = Field(description="Transaction description as printed on the statement")
+    amount: Optional[float] = Field(default=None, description="Transaction amount as a positive number")
+    direction: str = Field(description="Either 'paid in' or 'withdrawn'")
+    balance: Optional[float] = Field(
+        default=None,
+        description="Balance remaining after the transaction, negative when overdrawn"
+    )
+    page: Optional[int] = Field(
+        default=None,
+        description="1-based page number, within the attached document, on which the transaction is printed"
+    )
+
+    def to_row(self) -> Dict[str, Any]:
+        """
+        Convert to the transaction dictionary used throughout the pipeline.
+        The Page key is only present when the model reported the page.
+        """
+        row = {
+            'Date': self.date.strip(),
+            'Description': self.description.strip(),
+            'Amount': _format_amount(self.amount),
+            'Direction': self.direction.strip(),
+            'Balance': _format_amount(self.balance),
+            'Category': ''
+        }
+        if self.page is not None:
+            row['Page'] = self.page
+        return row
+
+
+class TransactionList(BaseModel):
+    """All transactions found in a statement (or statement chunk)."""
+    transactions: List[Transaction]
+
+    def to_rows(self) -> List[Dict[str, Any]]:
+        """Convert to a list of transaction dictionaries."""
+        return [transaction.to_row() for transaction in self.transactions]
+
+
+class CategoryAssignment(BaseModel):
+    """The category assigned to one input row."""
+    index: int = Field(description="Value of the Index column of the input row")
+    category: TransactionCategory
+
+
+class CategoryAssignmentList(BaseModel):
+    """Category assignments for a batch of transactions."""
+    assignments: List[CategoryAssignment]
+
+    def apply_to(self, transactions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Return copies of `transactions` with the assigned categories filled in.
+        Rows without an assignment keep an empty category.
+        """
+        categories = {assignment.index: assignment.category.value for assignment in self.assignments}
+        categorized = []
+        for index, transaction in enumerate(transactions):
+            row = dict(transaction)
+            row['Category'] = categories.get(index, '')
+            categorized.append(row)
+        return categorized
+
+
+class PersonalInfo(BaseModel):
+    """Account holder and statement level details."""
+    fullName: Optional[str] = None
+    address: Optional[str] = None
+    accountNumber: Optional[str] = None
+    sortCode: Optional[str] = None
+    statementStartingBalance: Optional[float] = None
+    statementFinishingBalance: Optional[float] = None
+    statementPeriod: Optional[str] = None
+    bankProvider: Optional[str] = None
+    totalPaidIn: Optional[float] = None
+    totalWithdrawn: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a plain dictionary."""
+        return self.model_dump()
+
+
+class SummaryPersonalInformation(BaseModel):
+    """Personal information block of the transaction summary."""
+    name: Optional[str] = None
+    address: Optional[str] = None
+    accountNumber: Optional[str] = None
+    sortCode: Optional[str] = None
+    statementStartingBalance: Optional[float] = None
+    statementFinishingBalance: Optional[float] = None
+
+
+class CategoryTotal(BaseModel):
+    """Total amount for one category."""
+    category: str
+    amount: float
+
+
+class CommentaryItem(BaseModel):
+    """One topic of the financial health commentary."""
+    topic: str = Field(description="camelCase topic name, e.g. overallBalance")
+    commentary: str
+
+
+class TransactionSummary(BaseModel):
+    """Summary of a statement's transactions."""
+    personalInformation: SummaryPersonalInformation
+    income: List[CategoryTotal]
+    outgoings: List[CategoryTotal]
+    generalSummaryAndFinancialHealthCommentary: List[CommentaryItem]
+    potentialRedFlagsAndConcerns: List[str]
+    recommendations: List[str]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to the summary JSON structure consumed by the web UI."""
+        return {
+            "personalInformation": self.personalInformation.model_dump(),
+            "summaryOfIncomeAndOutgoings": {
+                "income": {total.category: total.amount for total in self.income},
+                "outgoings": {total.category: total.amount for total in self.outgoings},
+            },
+            "generalSummaryAndFinancialHealthCommentary": {
+                item.topic: item.commentary for item in self.generalSummaryAndFinancialHealthCommentary
+            },
+            "potentialRedFlagsAndConcerns": list(self.potentialRedFlagsAndConcerns),
+            "recommendations": list(self.recommendations),
+        }
+
+
+class PassportData(BaseModel):
+    """Fields extracted from a passport."""
+    surname: Optional[str] = None
+    forename: Optional[str] = None
+    fullName: Optional[str] = None
+    dateOfBirth: Optional[str] = None
+    passportNumber: Optional[str] = None
+    issueDate: Optional[str] = None
+    expiryDate: Optional[str] = None
+    nationality: Optional[str] = None
+    placeOfBirth: Optional[str] = None
+    issuingAuthority: Optional[str] = None
+    gender: Optional[str] = None
+    photoDescription: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a plain dictionary, omitting fields that were not found."""
+        return self.model_dump(exclude_none=True)
+
+
+class DrivingLicenceData(BaseModel):
+    """Fields extracted from a driving licence."""
+    surname: Optional[str] = None
+    forename: Optional[str] = None
+    fullName: Optional[str] = None
+    address: Optional[str] = None
+    dateOfBirth: Optional[str] = None
+    licenceNumber: Optional[str] = None
+    issueDate: Optional[str] = None
+    expiryDate: Optional[str] = None
+    licenceCategories: Optional[List[str]] = None
+    issuingAuthority: Optional[str] = None
+    photoDescription: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a plain dictionary, omitting fields that were not found."""
+        return self.model_dump(exclude_none=True)
@@ -0,0 +1,123 @@
+"""
+Single-flight coalescing of identical jobs.
+
+Double-clicked uploads and integrations retrying on timeout deliver the same PDF
+twice within seconds, and each copy used to run the whole pipeline. Jobs are now
+keyed by the fingerprint of their document and result-affecting options
+(journal.job_fingerprint). While a job with a key is in flight, a second caller with
+the same key does not start its own run: it waits on the first job's future and
+receives a copy of the same result, so the duplicate makes no provider calls.
+
+Only jobs in flight are coalesced; once the first job returns, the next caller with
+the key runs afresh. A caller can also refuse the first job's result (e.g. a partial
+result cut short by that job's deadline) and run the job itself.
+"""
+
+import copy
+import logging
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    from backend.src.core.deadlines import remaining_time
+    from backend.src.utils.exceptions import DeadlineExceededError
+except ImportError:
+    from src.core.deadlines import remaining_time
+    from src.utils.exceptions import DeadlineExceededError
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; concurrent callers share its result."""
+
+    def __init__(self):
+        self.led = 0
+        self.coalesced = 0
+        # The future of each call in flight, with the object its caller shares with joiners
+        self._calls: Dict[str, Tuple[Future, Any]] = {}
+        self._lock = threading.Lock()
+
+    def do(
+        self,
+        key: str,
+        fn: Callable,
+        *args,
+        deadline: Optional[float] = None,
+        reusable: Optional[Callable[[Any], bool]] = None,
+        shared: Any = None,
+        on_join: Optional[Callable[[Any], None]] = None,
+        **kwargs
+    ) -> Any:
+        """
+        Return `fn(*args, **kwargs)`, or the result of the call already in flight for `key`.
+
+        The caller that runs the call gets its result; callers that join it get a deep
+        copy, so they can modify what they receive. An exception raised by the call is
+        raised to every caller.
+
+        Args:
+            key: Identity of the call
+            fn: The call to run
+            deadline: time.monotonic() deadline of a joining caller's wait
+            reusable: Whether a joining caller accepts the result of the call in flight;
+                when it does not, and its deadline has not passed, it runs `fn` itself
+            shared: Object of the running caller passed to on_join of the callers joining it
+            on_join: Called with the running caller's `shared` when this caller joins it
+
+        Raises:
+            DeadlineExceededError: The deadline passed while waiting for the call in flight
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                future = Future()
+                self._calls[key] = (future, shared)
+                self.led += 1
+            else:
+                future, leader_shared = call
+                self.coalesced += 1
+
+        if not leader:
+            logger.info(f"Identical job {key[:12]} already in flight, waiting for its result")
+            if on_join is not None:
+                on_join(leader_shared)
+            try:
+                result = future.result(timeout=remaining_time(deadline))
+            except FutureTimeoutError:
+                raise DeadlineExceededError("Job deadline expired while waiting for an identical job in flight")
+            if reusable is None or reusable(result) or remaining_time(deadline) == 0.0:
+                return copy.deepcopy(result)
+            logger.info(f"Result of identical job {key[:12]} not usable, running the job")
+            return fn(*args, **kwargs)
+
+        try:
+            result = fn(*args, **kwargs)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Calls in flight, calls run and calls answered from another's result."""
+        with self._lock:
+            return {"in_flight": len(self._calls), "led": self.led, "coalesced": self.coalesced}
+
+
+_single_flight: Optional[SingleFlight] = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight:
+    """Return the process-wide SingleFlight of statement jobs."""
+    global _single_flight
+    with _single_flight_lock:
+        if _single_flight is None:
+            _single_flight = SingleFlight()
+        return _single_flight
@@ -3,12 +3,9 @@
 import os
 import time
 import logging
-import tempfile
 import csv
-import shutil
-import json
 import io
-from typing import Dict, Any, List, Optional, Tuple, Union
+from typing import Callable, Dict, Any, List, Optional, Tuple, Union
 
 try:
     # Try importing from backend.src (when running from root directory)
@@ -16,7 +13,7 @@ try:
     from backend.src.utils.exceptions import FileProcessingError
     from backend.src.utils.pdf_utils import PDFConverter, ImageData
     from backend.src.services.openai_service import OpenAIAssistantService
-    from backend.src.services.gemini_service import GeminiService, CSV_HEADERS
+    from backend.src.services.gemini_service import StatementGeminiService, CSV_HEADERS
     from backend.src.core.prompts import (
         GEMINI_STATEMENT_PARSE,
         GEMINI_PERSONAL_INFO_PARSE,
@@ -24,13 +21,23 @@ try:
         GEMINI_TRANSACTION_CATEGORISATION
     )
     from backend.src.core.data_processor import DataProcessor
+    from backend.src.core.journal import open_journal
+    from backend.src.core.job_context import JobContext
+    from backend.src.core.deadlines import deadline_after, remaining_time
+    from backend.src.core.batch import aggregate_results, process_batch
+    from backend.src.core.planner import record_job
+    from backend.src.utils.artifact_writer import get_artifact_writer
+    from backend.src.utils.metrics import JOBS, STAGE_SECONDS
+    from backend.src.utils.profiling import JobProfile, profiling, write_reports
+    from backend.src.utils.tracing import Trace, span, tracing
+    from backend.src.utils.usage import Usage, accounting, current_usage
 except ImportError:
     # Try importing from src (when running from backend directory)
     from src.config.settings import Settings
     from src.utils.exceptions import FileProcessingError
     from src.utils.pdf_utils import PDFConverter, ImageData
     from src.services.openai_service import OpenAIAssistantService
-    from src.services.gemini_service import GeminiService, CSV_HEADERS
+    from src.services.gemini_service import StatementGeminiService, CSV_HEADERS
     from src.core.prompts import (
         GEMINI_STATEMENT_PARSE,
         GEMINI_PERSONAL_INFO_PARSE,
@@ -38,13 +45,19 @@ except ImportError:
         GEMINI_TRANSACTION_CATEGORISATION
     )
     from src.core.data_processor import DataProcessor
+    from src.core.journal import open_journal
+    from src.core.job_context import JobContext
+    from src.core.deadlines import deadline_after, remaining_time
+    from src.core.batch import aggregate_results, process_batch
+    from src.core.planner import record_job
+    from src.utils.artifact_writer import get_artifact_writer
+    from src.utils.metrics import JOBS, STAGE_SECONDS
+    from src.utils.profiling import JobProfile, profiling, write_reports
+    from src.utils.tracing import Trace, span, tracing
+    from src.utils.usage import Usage, accounting, current_usage
 
 logger = logging.getLogger(__name__)
 
-# Global in-memory stores when file storage is disabled
-in_memory_transactions = []  # List to collect transaction JSON responses
-in_memory_personal_info = None  # To hold the personal info extraction JSON
-
 class StatementProcessor:
     """Core functionality for processing financial statements."""
     
@@ -60,16 +73,17 @@ class StatementProcessor:
             self.openai_service = OpenAIAssistantService()
         return self.openai_service
     
-    def _get_gemini_service(self) -> GeminiService:
+    def _get_gemini_service(self) -> StatementGeminiService:
         """Get the Gemini service."""
         if not self.gemini_service:
-            self.gemini_service = GeminiService()
+            self.gemini_service = StatementGeminiService()
         return self.gemini_service
     
     def process_front_page_personal_info(
         self,
         front_image: ImageData,
-        use_gemini: bool = False
+        use_gemini: bool = False,
+        context: Optional[JobContext] = None
     ) -> Dict[str, Any]:
         """
         Process the front page image to extract personal information.
@@ -77,10 +91,14 @@ class StatementProcessor:
         Args:
             front_image: Front page image data (file path or in-memory tuple)
             use_gemini: Whether to use Gemini instead of OpenAI
+            context: The job's context; the result is also kept on it
             
         Returns:
             Dictionary containing extracted personal information
         """
+        owns_context = context is None
+        if owns_context:
+            context = JobContext()
         try:
             if use_gemini:
                 # Use Gemini for personal info extraction
@@ -89,8 +107,8 @@ class StatementProcessor:
                 if isinstance(front_image, tuple):
                     # front_image is (pseudo_filename, image_bytes)
                     file_name, _ = front_image
-                    # Save to a temporary file for Gemini processing
-                    temp_path = os.path.join(os.getcwd(), "temp_front_page.jpg")
+                    # Save to the job's scratch space for Gemini processing
+                    temp_path = os.path.join(context.scratch_dir, "temp_front_page.jpg")
                     with open(temp_path, "wb") as f:
                         f.write(front_image[1])
                     original_identifier = file_name
@@ -105,10 +123,6 @@ class StatementProcessor:
                     pdf_path=file_path,
                     page_image_path=file_path if file_path.endswith(('.jpg', '.jpeg', '.png')) else None
                 )
-                
-                # Clean up temporary file if created
-                if isinstance(front_image, tuple) and os.path.exists(temp_path):
-                    os.remove(temp_path)
                     
             else:
                 # Use OpenAI for personal info extraction
@@ -133,22 +147,25 @@ class StatementProcessor:
                 
             logger.info(f"Personal information extraction response: {personal_info}")
             
-            # Store in memory if file storage is disabled
-            global in_memory_personal_info
-            in_memory_personal_info = personal_info
+            # Keep the result with the job
+            context.personal_info = personal_info
             
             return personal_info
             
         except Exception as e:
             logger.error(f"Error processing front page personal info: {str(e)}")
             raise FileProcessingError(f"Error processing front page personal info: {str(e)}")
+        finally:
+            if owns_context:
+                context.close()
             
     def process_statement_pages(
         self,
         image_files: List[ImageData],
         use_gemini: bool = False,
         output_csv: Optional[str] = None,
-        export_raw_responses: bool = False
+        export_raw_responses: bool = False,
+        context: Optional[JobContext] = None
     ) -> List[Dict[str, Any]]:
         """
         Process statement pages to extract transaction data.
@@ -157,11 +174,18 @@ class StatementProcessor:
             image_files: List of image data (file paths or in-memory tuples)
             use_gemini: Whether to use Gemini instead of OpenAI
             output_csv: Path to save the output CSV (optional)
-            export_raw_responses: Whether to export raw responses (overrides Settings.EXPORT_RAW_GEMINI_RESPONSES)
+            export_raw_responses: Whether to export raw responses (in addition to Settings.EXPORT_RAW_GEMINI_RESPONSES)
+            context: The job's context; the transactions are also collected on it
             
         Returns:
             List of transaction dictionaries
         """
+        owns_context = context is None
+        if owns_context:
+            context = JobContext(
+                output_dir=os.path.dirname(output_csv) if output_csv else None,
+                export_raw_responses=export_raw_responses or Settings.EXPORT_RAW_GEMINI_RESPONSES
+            )
         try:
             all_transactions = []
             
@@ -173,14 +197,10 @@ class StatementProcessor:
                 # So we need to convert the image files back to a PDF
                 if isinstance(image_files[0], tuple):
                     # image_files contains (pseudo_filename, image_bytes) tuples
-                    # Save to temporary files for Gemini processing
-                    temp_dir = os.path.join(os.getcwd(), "temp_images")
-                    if not os.path.exists(temp_dir):
-                        os.makedirs(temp_dir)
-                        
+                    # Save to the job's scratch space for Gemini processing
                     temp_files = []
                     for i, (file_name, file_bytes) in enumerate(image_files):
-                        temp_path = os.path.join(temp_dir, f"temp_page_{i}.jpg")
+                        temp_path = os.path.join(context.scratch_dir, f"temp_page_{i}.jpg")
                         with open(temp_path, "wb") as f:
                             f.write(file_bytes)
                         temp_files.append(temp_path)
@@ -197,25 +217,18 @@ class StatementProcessor:
                     
                 logger.info(f"Processing statement with Gemini")
                 
-                # Determine output directory for raw responses
-                output_dir = None
-                if output_csv:
-                    output_dir = os.path.dirname(output_csv)
-                
                 # Get both transactions and raw response
                 transactions, raw_response = gemini.process_pdf_statement_with_raw_response(
                     pdf_path=pdf_path,
                     prompt_template=GEMINI_STATEMENT_PARSE,
-                    export_raw_responses=export_raw_responses,
-                    output_dir=output_dir
+                    context=context
                 )
                 
                 # Save the raw response if output_csv is provided
                 if output_csv and raw_response:
                     raw_output_path = output_csv.replace(".csv", "_raw.txt")
-                    with open(raw_output_path, "w", encoding="utf-8") as f:
-                        f.write(raw_response)
-                    logger.info(f"Raw response saved to {raw_output_path}")
+                    get_artifact_writer().write(raw_output_path, raw_response)
+                    logger.info(f"Raw response queued for {raw_output_path}")
                 
                 # Add transactions to the result
                 all_transactions.extend(transactions)
@@ -238,11 +251,6 @@ class StatementProcessor:
                     # Parse categorized CSV back to transactions
                     all_transactions = gemini.parse_csv_to_transactions(categorized_csv)
                     logger.info(f"Successfully categorized {len(all_transactions)} transactions")
-                
-                # Clean up temporary files
-                if isinstance(image_files[0], tuple) and os.path.exists(temp_dir):
-                    shutil.rmtree(temp_dir)
-                    logger.info(f"Removed temporary directory: {temp_dir}")
             else:
                 # Use OpenAI for transaction extraction
                 openai = self._get_openai_service()
@@ -278,10 +286,6 @@ class StatementProcessor:
                         
                     all_transactions.extend(transactions)
                     
-                    # Store in memory if file storage is disabled
-                    global in_memory_transactions
-                    in_memory_transactions.extend(transactions)
-                    
                     # Add a small delay to avoid rate limiting
                     time.sleep(1)
                     
@@ -291,19 +295,31 @@ class StatementProcessor:
                     transactions=all_transactions,
                     output_file=output_csv
                 )
+            
+            # Keep the transactions with the job
+            context.transactions.extend(all_transactions)
                 
             return all_transactions
             
         except Exception as e:
             logger.error(f"Error processing statement pages: {str(e)}")
             raise FileProcessingError(f"Error processing statement pages: {str(e)}")
+        finally:
+            if owns_context:
+                context.close()
             
     def process_pdf_statement(
         self,
         pdf_path: str,
         output_dir: str,
         use_gemini: bool = False,
-        chunk_count: int = 3
+        chunk_count: int = 3,
+        resume: bool = False,
+        deadline_seconds: Optional[float] = None,
+        on_progress: Optional[Callable[[str, str, Dict[str, Any]], None]] = None,
+        include_trace: bool = False,
+        profile: bool = False,
+        profile_dir: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Process a PDF statement and extract transactions and personal information.
@@ -313,10 +329,62 @@ class StatementProcessor:
             output_dir: Directory to save output files
             use_gemini: Whether to use Gemini instead of OpenAI
             chunk_count: Number of chunks to split the PDF into
+            resume: Skip the Gemini stages already recorded in the job journal in output_dir
+            deadline_seconds: Return within this many seconds, with whatever stages completed
+                (defaults to Settings.JOB_DEADLINE_SECONDS)
+            on_progress: Called with (stage, status, details) as the Gemini stages start
+                and complete (see JobContext.emit)
+            include_trace: Return the job's trace timeline (see utils/tracing.py) in "trace"
+            profile: Profile the CPU and memory use of each stage (see utils/profiling.py),
+                also done for every job when Settings.PROFILING_ENABLED is set
+            profile_dir: Directory for the profile reports (defaults to output_dir)
             
         Returns:
-            Dictionary containing the extracted data
+            Dictionary containing the extracted data; with Gemini, "complete" is False
+            and "incomplete" lists the unfinished stages if the deadline expired. "usage"
+            holds the tokens and cost of the job's model calls (see utils/usage.py), and
+            "profile" the figures of each stage of a profiled job.
         """
+        # The job's spans are recorded when tracing is enabled or the caller wants them;
+        # the timeline is saved as trace.json, failed jobs included
+        trace = Trace(os.path.basename(pdf_path)) if Settings.TRACE_ENABLED or include_trace else None
+        job_profile = JobProfile() if Settings.PROFILING_ENABLED or profile else None
+        started = time.perf_counter()
+        try:
+            with tracing(trace), accounting(Usage()), profiling(job_profile), \
+                    span("job", provider="gemini" if use_gemini else "openai"):
+                result = self._process_pdf_statement(
+                    pdf_path, output_dir, use_gemini, chunk_count, resume, deadline_seconds, on_progress
+                )
+        finally:
+            if trace is not None and Settings.ENABLE_FILE_STORAGE and os.path.isdir(output_dir):
+                get_artifact_writer().write_json(os.path.join(output_dir, "trace.json"), trace.to_dict())
+            if job_profile is not None:
+                write_reports(job_profile, profile_dir or output_dir)
+        # Complete runs from the start feed the planner's estimates (core/planner.py);
+        # profiled runs are slowed down by the profilers
+        if result["complete"] and not resume and job_profile is None:
+            record_job(pdf_path, use_gemini, chunk_count, time.perf_counter() - started, result["usage"])
+        if include_trace:
+            result["trace"] = trace.to_dict()
+        if job_profile is not None:
+            result["profile"] = job_profile.summary()
+        return result
+
+    def _process_pdf_statement(
+        self,
+        pdf_path: str,
+        output_dir: str,
+        use_gemini: bool,
+        chunk_count: int,
+        resume: bool,
+        deadline_seconds: Optional[float],
+        on_progress: Optional[Callable[[str, str, Dict[str, Any]], None]]
+    ) -> Dict[str, Any]:
+        """Run a process_pdf_statement job in the caller's trace."""
+        context = None
+        provider = "gemini" if use_gemini else "openai"
+        started = time.perf_counter()
         try:
             logger.info(f"Processing PDF statement: {pdf_path}")
             
@@ -324,70 +392,29 @@ class StatementProcessor:
             if not os.path.exists(output_dir):
                 os.makedirs(output_dir)
             
+            context = self._open_job_context(pdf_path, output_dir, use_gemini, chunk_count, resume, deadline_seconds)
+            if on_progress is not None:
+                context.listeners.append(on_progress)
+            
             # Process with Gemini or OpenAI
             if use_gemini:
                 # Get the Gemini service
                 gemini = self._get_gemini_service()
                 
-                # Create a temporary directory for storing sub-PDFs
-                temp_dir = tempfile.mkdtemp()
-                logger.info(f"Created temporary directory: {temp_dir}")
+                # Split, parse and categorize each chunk, extract personal information,
+                # reconcile the running balance and summarise
+                gemini_result = gemini.process_document(pdf_path, chunk_count=chunk_count, context=context)
+                all_transactions = gemini_result["transactions"]
+                personal_info = gemini_result["personal_info"]
+                summary = gemini_result["summary"]
+                reconciliation = gemini_result["reconciliation"]
+                incomplete = gemini_result["incomplete"]
                 
-                try:
-                    # Step 1: Split the PDF into chunks
-                    logger.info(f"Splitting PDF into {chunk_count} chunks")
-                    smaller_pdfs = gemini.split_pdf_into_subpdfs(pdf_path, chunk_count, temp_dir)
-                    
-                    # Store the first chunk path for additional processing later
-                    first_chunk_path = smaller_pdfs[0] if smaller_pdfs else None
-                    
-                    # Step 2: Process each chunk for transactions
-                    all_transactions = []
-                    
-                    logger.info("Starting processing of sub-PDFs...")
-                    for i, chunk_path in enumerate(smaller_pdfs, start=1):
-                        logger.info(f"Processing chunk {i}/{len(smaller_pdfs)} for transactions")
-                        # Get the raw response and transactions
-                        chunk_transactions, raw_response = gemini.process_pdf_statement_with_raw_response(
-                            pdf_path=chunk_path,
-                            prompt_template=GEMINI_STATEMENT_PARSE
-                        )
-                        all_transactions.extend(chunk_transactions)
-                        
-                        # Save the raw response to a file if file storage is enabled
-                        if Settings.ENABLE_FILE_STORAGE:
-                            raw_response_file = os.path.join(output_dir, f"raw_response_chunk_{i}.csv")
-                            logger.info(f"Saving raw Gemini response for chunk {i} to: {raw_response_file}")
-                            with open(raw_response_file, "w", encoding="utf-8") as f:
-                                f.write(raw_response)
-                    
-                    # Save all transactions to CSV
-                    output_csv = os.path.join(output_dir, "transactions.csv") if Settings.ENABLE_FILE_STORAGE else None
-                    if output_csv:
-                        logger.info(f"Saving {len(all_transactions)} transactions to CSV: {output_csv}")
-                        with open(output_csv, "w", newline="", encoding="utf-8") as csvfile:
-                            writer = csv.DictWriter(csvfile, fieldnames=CSV_HEADERS)
-                            writer.writeheader()
-                            writer.writerows(all_transactions)
-                    
-                    # Step 3: Extract personal information from the first chunk
-                    logger.info("Starting additional processing for the first chunk to extract personal information...")
-                    personal_info = gemini.extract_personal_info(
-                        pdf_path=first_chunk_path,
-                        prompt_template=GEMINI_PERSONAL_INFO_PARSE
-                    )
-                    
-                    # Step 4: Generate transaction summary
-                    logger.info("Sending final transactions to Gemini for transaction summary...")
-                    summary = gemini.generate_transaction_summary(
-                        transactions=all_transactions,
-                        prompt_template=GEMINI_TRANSACTION_SUMMARY
-                    )
-                    
-                finally:
-                    # Clean up temporary directory
-                    shutil.rmtree(temp_dir, ignore_errors=True)
-                    logger.info(f"Removed temporary directory: {temp_dir}")
+                # Save all transactions to CSV
+                output_csv = os.path.join(output_dir, "transactions.csv") if Settings.ENABLE_FILE_STORAGE else None
+                if output_csv:
+                    logger.info(f"Queueing {len(all_transactions)} transactions for CSV: {output_csv}")
+                    get_artifact_writer().write_csv(output_csv, all_transactions, CSV_HEADERS)
             else:
                 # For OpenAI, we need to convert PDF to images
                 converter = PDFConverter()
@@ -448,13 +475,12 @@ class StatementProcessor:
                 # Save transactions to CSV
                 output_csv = os.path.join(output_dir, "transactions.csv") if Settings.ENABLE_FILE_STORAGE else None
                 if output_csv:
-                    logger.info(f"Saving {len(transactions)} transactions to CSV: {output_csv}")
-                    with open(output_csv, "w", newline="", encoding="utf-8") as csvfile:
-                        writer = csv.DictWriter(csvfile, fieldnames=CSV_HEADERS)
-                        writer.writeheader()
-                        writer.writerows(transactions)
+                    logger.info(f"Queueing {len(transactions)} transactions for CSV: {output_csv}")
+                    get_artifact_writer().write_csv(output_csv, transactions, CSV_HEADERS)
                 
                 all_transactions = transactions
+                reconciliation = None
+                incomplete = []
             
             # Merge personal information and transactions
             output_json = os.path.join(output_dir, "result.json") if Settings.ENABLE_FILE_STORAGE else None
@@ -463,25 +489,155 @@ class StatementProcessor:
                 "transactions": all_transactions,
                 "summary": summary
             }
+            if reconciliation is not None:
+                result["reconciliation"] = reconciliation
+            result["complete"] = not incomplete
+            result["incomplete"] = incomplete
+            usage = current_usage()
+            if usage is not None:
+                result["usage"] = usage.to_dict()
             
             # Save the result to a JSON file
             if output_json:
-                with open(output_json, "w", encoding="utf-8") as f:
-                    json.dump(result, f, indent=2)
-                logger.info(f"Saved result to JSON: {output_json}")
+                get_artifact_writer().write_json(output_json, result)
+                logger.info(f"Queued result for JSON: {output_json}")
             
+            JOBS.inc(provider=provider, outcome="complete" if result["complete"] else "partial")
             return result
             
         except Exception as e:
             logger.error(f"Error processing PDF statement: {str(e)}")
+            JOBS.inc(provider=provider, outcome="failed")
             raise FileProcessingError(f"Error processing PDF statement: {str(e)}")
+        finally:
+            if context is not None:
+                context.close()
+            STAGE_SECONDS.observe(time.perf_counter() - started, provider=provider, stage="job")
+
+    def process_pdf_batch(
+        self,
+        documents: List[Dict[str, Any]],
+        output_dir: str,
+        use_gemini: bool = False,
+        chunk_count: int = 3,
+        deadline_seconds: Optional[float] = None,
+        concurrency: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Process several PDF statements as one batch (see core/batch.py).
+        
+        Args:
+            documents: The statements, each a dictionary with the "path" of the PDF and
+                its "filename"; any other fields are returned with its result
+            output_dir: Directory to save output files, one subdirectory per document
+            use_gemini: Whether to use Gemini instead of OpenAI
+            chunk_count: Number of chunks to split each PDF into
+            deadline_seconds: Return within this many seconds, with whatever stages of
+                each document completed
+            concurrency: Documents processed at the same time (defaults to
+                Settings.BATCH_DOCUMENT_CONCURRENCY)
+            
+        Returns:
+            Dictionary with "documents", the result or error of each document in the
+            order given, and "summary", the aggregate across statements
+        """
+        logger.info(f"Processing batch of {len(documents)} PDF statement(s)")
+        deadline = deadline_after(deadline_seconds)
+        
+        def run_document(document: Dict[str, Any]) -> Dict[str, Any]:
+            # Documents that start late get what is left of the batch's deadline
+            # (a moment at least, as 0 would mean no deadline)
+            seconds = None if deadline is None else max(remaining_time(deadline), 0.001)
+            return self.process_pdf_statement(
+                pdf_path=document["path"],
+                output_dir=document["output_dir"],
+                use_gemini=use_gemini,
+                chunk_count=chunk_count,
+                deadline_seconds=seconds
+            )
+        
+        results = process_batch(
+            run_document,
+            [
+                {**document, "output_dir": os.path.join(output_dir, f"document_{i}")}
+                for i, document in enumerate(documents, start=1)
+            ],
+            concurrency
+        )
+        for result in results:
+            del result["path"], result["output_dir"]
+        return {"documents": results, "summary": aggregate_results(results)}
+
+    def _open_job_context(
+        self,
+        pdf_path: str,
+        output_dir: str,
+        use_gemini: bool,
+        chunk_count: int,
+        resume: bool = False,
+        deadline_seconds: Optional[float] = None
+    ) -> JobContext:
+        """
+        Create the context of a process_pdf_statement job: its checkpoint journal
+        (Gemini only), its deadline and, when file storage is enabled, its artifact archive.
+        """
+        context = JobContext(
+            output_dir=output_dir,
+            export_raw_responses=Settings.ENABLE_FILE_STORAGE or Settings.EXPORT_RAW_GEMINI_RESPONSES
+        )
+        if deadline_seconds is not None:
+            context.deadline = deadline_after(deadline_seconds)
+        
+        # Completed stages are journaled in output_dir so the job can be resumed
+        if use_gemini and Settings.JOB_JOURNAL_ENABLED:
+            context.journal = open_journal(output_dir, pdf_path, resume=resume, chunk_count=chunk_count)
+        
+        # Artifacts of the job are streamed into one archive in the background
+        if Settings.ENABLE_FILE_STORAGE and Settings.ARTIFACT_ARCHIVE_ENABLED:
+            context.artifacts = get_artifact_writer().open_job(output_dir, context.job_id, append=resume)
+        return context
+
+    def resume_pdf_statement(
+        self,
+        pdf_path: str,
+        output_dir: str,
+        chunk_count: int = 3,
+        deadline_seconds: Optional[float] = None,
+        profile: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Resume an interrupted Gemini job, re-running only the stages missing from the
+        job journal in `output_dir`. Falls back to a full run if there is no journal
+        for this PDF and chunk count. Also completes jobs cut short by their deadline.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            output_dir: Output directory of the interrupted job
+            chunk_count: Number of chunks the job was split into
+            deadline_seconds: Deadline of the resumed run
+            profile: Profile the CPU and memory use of each stage of the resumed run
+            
+        Returns:
+            Dictionary containing the extracted data
+        """
+        logger.info(f"Resuming PDF statement: {pdf_path}")
+        return self.process_pdf_statement(
+            pdf_path,
+            output_dir,
+            use_gemini=True,
+            chunk_count=chunk_count,
+            resume=True,
+            deadline_seconds=deadline_seconds,
+            profile=profile
+        )
 
     def process_pdf_statement_with_gemini(
         self,
         pdf_path: str,
         output_dir: str,
         chunk_count: int = 3,
-        output_json: Optional[str] = None
+        output_json: Optional[str] = None,
+        deadline_seconds: Optional[float] = None
     ) -> Dict[str, Any]:
         """
         Process a PDF statement using Gemini.
@@ -491,6 +647,7 @@ class StatementProcessor:
             output_dir: Directory to save output files
             chunk_count: Number of chunks to split the PDF into
             output_json: Path to save the output JSON file
+            deadline_seconds: Return within this many seconds, with whatever stages completed
             
         Returns:
             Dictionary containing the result
@@ -501,73 +658,36 @@ class StatementProcessor:
             # Get the Gemini service
             gemini = self._get_gemini_service()
             
-            # Create a temporary directory for storing sub-PDFs
-            temp_dir = tempfile.mkdtemp()
-            logger.info(f"Created temporary directory: {temp_dir}")
-            
-            try:
-                # Step 1: Split the PDF into chunks
-                logger.info(f"Splitting PDF into {chunk_count} chunks")
-                smaller_pdfs = gemini.split_pdf_into_subpdfs(pdf_path, chunk_count, temp_dir)
-                
-                # Process each chunk for transactions
-                all_transactions = []
-                
-                logger.info("Starting processing of sub-PDFs...")
-                for i, chunk_path in enumerate(smaller_pdfs, start=1):
-                    logger.info(f"Processing chunk {i}/{len(smaller_pdfs)} for transactions")
-                    # Get the raw response and transactions
-                    chunk_transactions, raw_response = gemini.process_pdf_statement_with_raw_response(
-                        pdf_path=chunk_path,
-                        prompt_template=GEMINI_STATEMENT_PARSE
-                    )
-                    all_transactions.extend(chunk_transactions)
-                    
-                    # Save the raw response to a file if file storage is enabled
-                    if Settings.ENABLE_FILE_STORAGE:
-                        raw_response_file = os.path.join(output_dir, f"raw_response_chunk_{i}.csv")
-                        logger.info(f"Saving raw Gemini response for chunk {i} to: {raw_response_file}")
-                        with open(raw_response_file, "w", encoding="utf-8") as f:
-                            f.write(raw_response)
+            # Split, parse, categorize, reconcile and summarise the statement
+            with self._open_job_context(pdf_path, output_dir, True, chunk_count, deadline_seconds=deadline_seconds) as context, \
+                    accounting(Usage()) as usage:
+                gemini_result = gemini.process_document(pdf_path, chunk_count=chunk_count, context=context)
+                transactions = gemini_result["transactions"]
+                personal_info = gemini_result["personal_info"]
+                summary = gemini_result["summary"]
                 
                 # Save all transactions to CSV
                 if Settings.ENABLE_FILE_STORAGE:
                     csv_path = os.path.join(output_dir, "transactions.csv")
-                    logger.info(f"Saving {len(all_transactions)} transactions to CSV: {csv_path}")
-                    with open(csv_path, "w", newline="", encoding="utf-8") as csvfile:
-                        writer = csv.DictWriter(csvfile, fieldnames=CSV_HEADERS)
-                        writer.writeheader()
-                        writer.writerows(all_transactions)
+                    logger.info(f"Queueing {len(transactions)} transactions for CSV: {csv_path}")
+                    get_artifact_writer().write_csv(csv_path, transactions, CSV_HEADERS)
                 
-                transactions = all_transactions
-            finally:
-                # Clean up: remove all sub-PDFs in the temp directory
-                shutil.rmtree(temp_dir, ignore_errors=True)
-                logger.info(f"Removed temporary directory: {temp_dir}")
-            
-            # Extract personal information from the PDF
-            logger.info("Step 2: Extracting personal information from PDF")
-            personal_info = gemini.extract_personal_info(pdf_path)
-            logger.info("Personal information extracted")
-            
-            # Generate transaction summary
-            logger.info("Step 3: Generating transaction summary")
-            summary = gemini.generate_transaction_summary(transactions)
-            logger.info("Transaction summary generated")
-            
-            # Combine results
-            result = {
-                "personal_info": personal_info,
-                "transactions": transactions,
-                "summary": summary
-            }
-            
-            # Save result to JSON
-            if output_json or Settings.ENABLE_FILE_STORAGE:
-                json_path = output_json or os.path.join(output_dir, "result.json")
-                logger.info(f"Saving result to JSON: {json_path}")
-                with open(json_path, "w", encoding="utf-8") as f:
-                    json.dump(result, f, indent=2)
+                # Combine results
+                result = {
+                    "personal_info": personal_info,
+                    "transactions": transactions,
+                    "summary": summary,
+                    "reconciliation": gemini_result["reconciliation"],
+                    "complete": gemini_result["complete"],
+                    "incomplete": gemini_result["incomplete"],
+                    "usage": usage.to_dict()
+                }
+                
+                # Save result to JSON
+                if output_json or Settings.ENABLE_FILE_STORAGE:
+                    json_path = output_json or os.path.join(output_dir, "result.json")
+                    logger.info(f"Queueing result for JSON: {json_path}")
+                    get_artifact_writer().write_json(json_path, result)
             
             return result
             
@@ -0,0 +1,171 @@
+"""Validation of extracted transactions, used to decide when to escalate to a stronger model."""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from backend.src.core.schemas import TRANSACTION_CATEGORIES, TransactionCategory
+except ImportError:
+    from src.core.schemas import TRANSACTION_CATEGORIES, TransactionCategory
+
+DATE_FORMAT = "%d-%m-%Y"
+
+# Direction values the models produce for money entering / leaving the account
+PAID_IN_DIRECTIONS = {"paid in", "in", "credit", "deposit"}
+WITHDRAWN_DIRECTIONS = {"withdrawn", "out", "debit", "payment", "paid out"}
+
+# Balances are compared to the penny
+BALANCE_TOLERANCE = 0.01
+
+
+def parse_amount(value: Any) -> Optional[float]:
+    """
+    Parse a monetary value as written by the models ("1,234.50", "£12", "(5.00)", "12.00 OD").
+    Returns None when the value is empty or not a number.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    text = str(value).strip().replace(',', '').replace('£', '')
+    if not text:
+        return None
+
+    negative = False
+    if text.startswith('(') and text.endswith(')'):
+        negative, text = True, text[1:-1]
+    upper = text.upper()
+    for suffix in (" OD", "OD", " DR", "DR"):
+        if upper.endswith(suffix):
+            negative, text = True, text[:-len(suffix)]
+            break
+
+    try:
+        amount = float(text.strip())
+    except ValueError:
+        return None
+    return -abs(amount) if negative else amount
+
+
+def direction_sign(direction: Any) -> Optional[int]:
+    """Return +1 for money paid in, -1 for money withdrawn, None if unrecognised."""
+    normalized = str(direction or '').strip().lower()
+    if normalized in PAID_IN_DIRECTIONS:
+        return 1
+    if normalized in WITHDRAWN_DIRECTIONS:
+        return -1
+    return None
+
+
+def is_valid_date(value: Any) -> bool:
+    """Whether `value` is a dd-mm-yyyy date."""
+    try:
+        datetime.strptime(str(value or '').strip(), DATE_FORMAT)
+        return True
+    except ValueError:
+        return False
+
+
+def transaction_issues(transaction: Dict[str, Any], check_category: bool = False) -> List[str]:
+    """
+    Return the validation problems with a single transaction dictionary.
+
+    Args:
+        transaction: Transaction dictionary with the CSV_HEADERS keys
+        check_category: Whether the Category field must hold a known category
+
+    Returns:
+        List of human readable issues (empty when the row is valid)
+    """
+    issues = []
+    if not is_valid_date(transaction.get('Date')):
+        issues.append(f"bad date {transaction.get('Date')!r}")
+    if parse_amount(transaction.get('Amount')) is None:
+        issues.append(f"bad amount {transaction.get('Amount')!r}")
+    if direction_sign(transaction.get('Direction')) is None:
+        issues.append(f"unknown direction {transaction.get('Direction')!r}")
+    if check_category and transaction.get('Category') not in TRANSACTION_CATEGORIES:
+        issues.append(f"unknown category {transaction.get('Category')!r}")
+    return issues
+
+
+def running_balance_breaks(
+    transactions: List[Dict[str, Any]],
+    starting_balance: Optional[float] = None,
+    tolerance: float = BALANCE_TOLERANCE
+) -> Tuple[List[Tuple[int, float, float]], Optional[float]]:
+    """
+    Walk the rows applying Amount/Direction to a running balance and report every row
+    whose printed Balance disagrees with it. Rows without a printed balance (many
+    statements only print one per day) carry the running total forward; after a break
+    the walk resynchronises on the printed balance.
+
+    Args:
+        transactions: Transaction dictionaries in statement order
+        starting_balance: Balance before the first row, if known
+        tolerance: Largest difference treated as equal
+
+    Returns:
+        Tuple containing (list of (row index, expected balance, printed balance),
+        final running balance or None if it could not be determined)
+    """
+    breaks = []
+    running = starting_balance
+    for index, transaction in enumerate(transactions):
+        balance = parse_amount(transaction.get('Balance'))
+        amount = parse_amount(transaction.get('Amount'))
+        sign = direction_sign(transaction.get('Direction'))
+
+        expected = None
+        if running is not None and amount is not None and sign is not None:
+            expected = running + sign * abs(amount)
+
+        if balance is None:
+            running = expected
+            continue
+        if expected is not None and abs(expected - balance) > tolerance:
+            breaks.append((index, expected, balance))
+        running = balance
+    return breaks, running
+
+
+def balance_mismatches(transactions: List[Dict[str, Any]], tolerance: float = BALANCE_TOLERANCE) -> List[int]:
+    """
+    Return the indices of rows whose Balance does not follow from the previous balance
+    and the Amount/Direction of the rows in between.
+    """
+    breaks, _ = running_balance_breaks(transactions, tolerance=tolerance)
+    return [index for index, _, _ in breaks]
+
+
+def invalid_category_rows(transactions: List[Dict[str, Any]]) -> List[int]:
+    """
+    Return the indices of rows whose Category is missing, not a known category or
+    "Unknown" (the model could not categorize the row).
+    """
+    return [
+        index for index, transaction in enumerate(transactions)
+        if transaction.get('Category') not in TRANSACTION_CATEGORIES
+        or transaction.get('Category') == TransactionCategory.UNKNOWN.value
+    ]
+
+
+def chunk_issue_count(transactions: List[Dict[str, Any]], has_text: bool = True) -> int:
+    """
+    Score a parsed chunk by its number of problems (lower is better): invalid rows plus
+    balance discontinuities.
+
+    An empty chunk counts as one problem, so that it is retried, only when its pages
+    have text: cover and terms pages legitimately hold no transactions. Rows missing
+    from a scanned chunk show up as a balance jump between its neighbours, which
+    reconciliation re-extracts.
+
+    Args:
+        transactions: The chunk's transaction dictionaries
+        has_text: Whether the chunk's pages have a text layer
+    """
+    if not transactions:
+        return 1 if has_text else 0
+    invalid_rows = sum(1 for transaction in transactions if transaction_issues(transaction))
+    return invalid_rows + len(balance_mismatches(transactions))
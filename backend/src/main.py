@@ -3,6 +3,7 @@
 import os
 import sys
 import argparse
+import json
 import logging
 from pathlib import Path
 
@@ -10,6 +11,7 @@ from pathlib import Path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
 from backend.src.config.settings import Settings
+from backend.src.core.planner import plan_statement
 from backend.src.core.statement_processor import StatementProcessor
 from backend.src.utils.logging_utils import setup_logger
 
@@ -23,6 +25,10 @@ def main():
     parser.add_argument("--output", type=str, help="Directory to save output files")
     parser.add_argument("--use-gemini", action="store_true", help="Use Gemini instead of OpenAI")
     parser.add_argument("--chunk-count", type=int, default=3, help="Number of chunks to split the PDF into (default: 3)")
+    parser.add_argument("--resume", action="store_true", help="Resume an interrupted Gemini job from the journal in the output directory")
+    parser.add_argument("--deadline", type=float, help="Return partial results after this many seconds (default: JOB_DEADLINE_SECONDS)")
+    parser.add_argument("--plan", action="store_true", help="Print the estimated calls, tokens, cost and time of the job without running it")
+    parser.add_argument("--profile", action="store_true", help="Profile the CPU and memory use of each stage into the output directory (profile_*)")
     
     args = parser.parse_args()
     
@@ -34,6 +40,11 @@ def main():
     if not os.path.exists(args.pdf):
         logger.error(f"PDF file not found: {args.pdf}")
         return
+
+    # Dry run: inspect the PDF and estimate the job without contacting any provider
+    if args.plan:
+        print(json.dumps(plan_statement(args.pdf, use_gemini=args.use_gemini, chunk_count=args.chunk_count), indent=2))
+        return
         
     # Set default output directory if not provided
     output_dir = args.output if args.output else os.path.dirname(args.pdf)
@@ -45,14 +56,27 @@ def main():
     # Process the PDF statement
     try:
         processor = StatementProcessor()
-        result = processor.process_pdf_statement(
-            pdf_path=args.pdf,
-            output_dir=output_dir,
-            use_gemini=args.use_gemini,
-            chunk_count=args.chunk_count
-        )
+        if args.resume:
+            result = processor.resume_pdf_statement(
+                pdf_path=args.pdf,
+                output_dir=output_dir,
+                chunk_count=args.chunk_count,
+                deadline_seconds=args.deadline,
+                profile=args.profile
+            )
+        else:
+            result = processor.process_pdf_statement(
+                pdf_path=args.pdf,
+                output_dir=output_dir,
+                use_gemini=args.use_gemini,
+                chunk_count=args.chunk_count,
+                deadline_seconds=args.deadline,
+                profile=args.profile
+            )
         
         logger.info(f"Successfully processed PDF statement: {args.pdf}")
+        if result and not result.get("complete", True):
+            logger.warning(f"Deadline expired; incomplete stages: {', '.join(result['incomplete'])} (rerun with --resume to finish)")
         logger.info(f"Output saved to: {output_dir}")
         
         # Print a summary of the results
@@ -0,0 +1,112 @@
+"""
+Process-wide registry of provider API clients.
+
+Every Gemini and OpenAI service used to construct its own SDK client, and with it its
+own HTTP connection pool, so a job touching the statement, passport and driving
+licence services opened (and TLS-handshook) separate connections for each. Services
+now ask this registry for a client instead: there is one client per provider and API
+key, shared by every service in the process, whose keep-alive pool is sized to the
+configured request concurrency.
+"""
+
+import logging
+import threading
+from typing import Any, Dict, Tuple
+
+try:
+    from backend.src.config.settings import Settings
+    from backend.src.utils.lazy_import import lazy_import
+except ImportError:
+    from src.config.settings import Settings
+    from src.utils.lazy_import import lazy_import
+
+genai = lazy_import("google.genai")
+types = lazy_import("google.genai.types")
+openai = lazy_import("openai")
+httpx = lazy_import("httpx")
+
+logger = logging.getLogger(__name__)
+
+_clients: Dict[Tuple[str, str], Any] = {}
+_lock = threading.Lock()
+
+
+def _pool_limits():
+    """Connection limits shared by every provider client."""
+    return httpx.Limits(
+        max_connections=Settings.HTTP_POOL_SIZE,
+        max_keepalive_connections=Settings.HTTP_POOL_SIZE,
+        keepalive_expiry=Settings.HTTP_KEEPALIVE_SECONDS,
+    )
+
+
+def _create_gemini_client(api_key: str):
+    try:
+        return genai.Client(
+            api_key=api_key,
+            http_options=types.HttpOptions(client_args={"limits": _pool_limits()}),
+        )
+    except Exception as e:
+        # google-genai releases without client_args still keep one pool per client
+        logger.debug(f"Could not size the Gemini connection pool, using SDK defaults: {str(e)}")
+        return genai.Client(api_key=api_key)
+
+
+def _create_openai_client(api_key: str):
+    http_client_class = getattr(openai, "DefaultHttpxClient", None) or httpx.Client
+    return openai.OpenAI(
+        api_key=api_key,
+        timeout=Settings.REQUEST_TIMEOUT,
+        http_client=http_client_class(limits=_pool_limits()),
+    )
+
+
+def _get_client(provider: str, api_key: str, factory):
+    with _lock:
+        client = _clients.get((provider, api_key))
+        if client is None:
+            client = factory(api_key)
+            _clients[(provider, api_key)] = client
+            logger.info(f"Created shared {provider} client (pool size {Settings.HTTP_POOL_SIZE})")
+        return client
+
+
+def get_gemini_client(api_key: str = None):
+    """
+    Return the shared genai.Client for an API key.
+
+    Args:
+        api_key: Gemini API key (defaults to the first of Settings.GEMINI_API_KEYS)
+    """
+    api_key = api_key or next(iter(Settings.GEMINI_API_KEYS), "")
+    if not api_key:
+        raise ValueError("GEMINI_API_KEY environment variable is not set")
+    return _get_client("gemini", api_key, _create_gemini_client)
+
+
+def get_openai_client(api_key: str = None):
+    """
+    Return the shared openai.OpenAI client for an API key.
+
+    Args:
+        api_key: OpenAI API key (defaults to Settings.OPENAI_API_KEY)
+    """
+    api_key = api_key or Settings.OPENAI_API_KEY
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY environment variable is not set")
+    return _get_client("openai", api_key, _create_openai_client)
+
+
+def close_clients() -> None:
+    """Close every shared client and its connection pool."""
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        close = getattr(client, "close", None)
+        if close is None:
+            continue
+        try:
+            close()
+        except Exception as e:
+            logger.debug(f"Error closing client: {str(e)}")
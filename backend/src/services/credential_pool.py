@@ -0,0 +1,237 @@
+"""
+Pool of Gemini API credentials.
+
+A single GEMINI_API_KEY capped throughput at one project's quota. Settings.GEMINI_API_KEYS
+may now list several keys, and each job is assigned the least-loaded one when it
+starts. The assignment is sticky: files a job uploads are only visible to the key that
+uploaded them, so every request of the job goes out with the same key. The key is made
+current for the job's code (and the stage threads it starts) through a context
+variable, and the Gemini services pick the matching shared client from the registry.
+
+Requests, tokens and in-flight calls are counted per key. A key that is answered with
+429 (quota exhausted) cools down for Settings.GEMINI_KEY_COOLDOWN_SECONDS, during which
+new jobs are assigned other keys.
+"""
+
+import contextvars
+import functools
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+try:
+    from backend.src.config.settings import Settings
+except ImportError:
+    from src.config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+_current_credential: contextvars.ContextVar = contextvars.ContextVar("gemini_credential", default=None)
+
+
+@dataclass
+class Credential:
+    """One API key and its usage counters."""
+    api_key: str
+    requests: int = 0
+    tokens: int = 0
+    in_flight: int = 0
+    jobs: int = 0
+    rate_limited: int = 0
+    cooldown_until: float = 0.0
+
+    @property
+    def label(self) -> str:
+        """The key, masked for logs and stats."""
+        return f"...{self.api_key[-4:]}"
+
+    def cooling_down(self, now: float = None) -> bool:
+        """Whether the key is cooling down after a 429."""
+        return self.cooldown_until > (time.monotonic() if now is None else now)
+
+
+def current_credential() -> Optional[Credential]:
+    """Return the credential of the job running in this context, if any."""
+    return _current_credential.get()
+
+
+def token_count(response: Any) -> int:
+    """Total tokens reported in a Gemini response's usage metadata (0 if absent)."""
+    usage = getattr(response, "usage_metadata", None)
+    return getattr(usage, "total_token_count", 0) or 0
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """Whether a provider error is a 429 (rate limit or exhausted quota)."""
+    return getattr(error, "code", None) == 429 or getattr(error, "status_code", None) == 429
+
+
+def with_job_credential(method):
+    """
+    Decorator for service entry points that upload files and then reference them:
+    the call runs as one job of the process-wide pool (see CredentialPool.job), so
+    every request it makes uses the same key.
+    """
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with get_credential_pool().job():
+            return method(*args, **kwargs)
+    return wrapper
+
+
+class CredentialPool:
+    """Assigns API keys to jobs and accounts for their use."""
+
+    def __init__(self, api_keys: List[str], cooldown_seconds: float = None):
+        """
+        Initialize the pool.
+
+        Args:
+            api_keys: The keys to share out (duplicates are ignored)
+            cooldown_seconds: How long a key answered with 429 gets no new jobs
+                (defaults to Settings.GEMINI_KEY_COOLDOWN_SECONDS)
+        """
+        self.cooldown_seconds = Settings.GEMINI_KEY_COOLDOWN_SECONDS if cooldown_seconds is None else cooldown_seconds
+        self.credentials: List[Credential] = [Credential(key) for key in dict.fromkeys(api_keys)]
+        self._assignments: Dict[str, Credential] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, job_id: str) -> Credential:
+        """
+        Return the credential of a job, assigning one on first use.
+
+        A new job gets the key with the fewest jobs and in-flight requests, then the
+        fewest tokens used, among keys not cooling down. When every key is cooling
+        down, the one that recovers first is used.
+
+        Raises:
+            ValueError: The pool has no keys
+        """
+        with self._lock:
+            credential = self._assignments.get(job_id)
+            if credential is not None:
+                return credential
+            if not self.credentials:
+                raise ValueError("GEMINI_API_KEY environment variable is not set")
+
+            now = time.monotonic()
+            available = [c for c in self.credentials if not c.cooling_down(now)]
+            if available:
+                credential = min(available, key=lambda c: (c.jobs + c.in_flight, c.tokens))
+            else:
+                credential = min(self.credentials, key=lambda c: c.cooldown_until)
+            credential.jobs += 1
+            self._assignments[job_id] = credential
+        logger.debug(f"Assigned Gemini key {credential.label} to job {job_id}")
+        return credential
+
+    def release(self, job_id: str) -> None:
+        """Forget a finished job's assignment."""
+        with self._lock:
+            credential = self._assignments.pop(job_id, None)
+            if credential is not None:
+                credential.jobs -= 1
+
+    def for_key(self, api_key: str) -> Optional[Credential]:
+        """Return the pool's credential for `api_key`, if it is in the pool."""
+        for credential in self.credentials:
+            if credential.api_key == api_key:
+                return credential
+        return None
+
+    @contextmanager
+    def job(self, job_id: str = None):
+        """
+        Run a block with a job's credential current.
+
+        Within a job that already has a credential (a nested service call), that
+        credential is kept. Otherwise one is acquired for `job_id` (a one-off id by
+        default) and released when the block exits.
+
+        Yields:
+            The job's Credential
+        """
+        credential = _current_credential.get()
+        if credential is not None:
+            yield credential
+            return
+
+        job_id = job_id or uuid.uuid4().hex
+        credential = self.acquire(job_id)
+        token = _current_credential.set(credential)
+        try:
+            yield credential
+        finally:
+            _current_credential.reset(token)
+            self.release(job_id)
+
+    @contextmanager
+    def request(self, credential: Optional[Credential]):
+        """
+        Account one API request made with `credential`. A 429 raised from the block
+        puts the key into cooldown; the error is re-raised.
+        """
+        if credential is None:
+            yield
+            return
+
+        with self._lock:
+            credential.in_flight += 1
+            credential.requests += 1
+        try:
+            yield
+        except Exception as e:
+            if is_rate_limited(e):
+                self.cool_down(credential)
+            raise
+        finally:
+            with self._lock:
+                credential.in_flight -= 1
+
+    def record_tokens(self, credential: Optional[Credential], tokens: int) -> None:
+        """Add the tokens of a completed request to `credential`."""
+        if credential is None or not tokens:
+            return
+        with self._lock:
+            credential.tokens += tokens
+
+    def cool_down(self, credential: Credential) -> None:
+        """Give `credential` no new jobs for the cooldown period."""
+        with self._lock:
+            credential.rate_limited += 1
+            credential.cooldown_until = time.monotonic() + self.cooldown_seconds
+        logger.warning(f"Gemini key {credential.label} was rate limited, cooling down for {self.cooldown_seconds}s")
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Usage counters of every key."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "key": c.label,
+                    "jobs": c.jobs,
+                    "in_flight": c.in_flight,
+                    "requests": c.requests,
+                    "tokens": c.tokens,
+                    "rate_limited": c.rate_limited,
+                    "cooldown_seconds": round(max(0.0, c.cooldown_until - now), 1),
+                }
+                for c in self.credentials
+            ]
+
+
+_pool: Optional[CredentialPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_credential_pool() -> CredentialPool:
+    """Return the process-wide pool of Settings.GEMINI_API_KEYS."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = CredentialPool(Settings.GEMINI_API_KEYS)
+        return _pool
@@ -6,18 +6,14 @@ services for different document types like financial statements and identity doc
 """
 
 import os
+import copy
 import time
 import json
 import csv
 import io
 import logging
 from pathlib import Path
-from dotenv import load_dotenv
-from google import genai
-from google.genai import types
-from PyPDF2 import PdfReader, PdfWriter
-import shutil
-import tempfile
+from pydantic import ValidationError as SchemaValidationError
 
 # Import prompts from the core module
 try:
@@ -26,18 +22,75 @@ try:
         GEMINI_STATEMENT_PARSE,
         GEMINI_PERSONAL_INFO_PARSE,
         GEMINI_TRANSACTION_SUMMARY,
-        GEMINI_TRANSACTION_CATEGORISATION
+        GEMINI_TRANSACTION_CATEGORISATION,
+        GEMINI_STRUCTURED_OUTPUT_NOTE,
+        GEMINI_STRUCTURED_CATEGORISATION_NOTE
     )
+    from backend.src.core.schemas import (
+        TransactionList,
+        CategoryAssignmentList,
+        PersonalInfo,
+        TransactionSummary
+    )
+    from backend.src.core.validation import chunk_issue_count, invalid_category_rows
+    from backend.src.core.reconciliation import reconcile
+    from backend.src.core.job_context import JobContext
+    from backend.src.core.deadlines import check_deadline, deadline_after, deadline_scope, remaining_time, run_within
+    from backend.src.core.journal import job_fingerprint
+    from backend.src.core.result_store import pipeline_version
+    from backend.src.core.scheduler import get_call_scheduler
+    from backend.src.core.single_flight import get_single_flight
+    from backend.src.utils.artifact_writer import get_artifact_writer
+    from backend.src.utils.remote_files import get_remote_file_manager
     from backend.src.config.settings import Settings
+    from backend.src.services.prompt_cache import get_prompt_cache
+    from backend.src.services.client_registry import get_gemini_client
+    from backend.src.services.credential_pool import current_credential, get_credential_pool, is_rate_limited, token_count, with_job_credential
+    from backend.src.utils.metrics import IN_FLIGHT, PROMPT_CACHE_LOOKUPS, PROVIDER_CALLS, PROVIDER_RETRIES, RATE_LIMITED, STAGE_SECONDS
+    from backend.src.utils.tracing import span
+    from backend.src.utils.usage import record_usage
+    from backend.src.utils.exceptions import APIError, DataProcessingError, DeadlineExceededError, SchemaDecodeError
+    from backend.src.utils.lazy_import import lazy_import
 except ImportError:
     # Try importing from src (when running from backend directory)
     from src.core.prompts import (
         GEMINI_STATEMENT_PARSE,
         GEMINI_PERSONAL_INFO_PARSE,
         GEMINI_TRANSACTION_SUMMARY,
-        GEMINI_TRANSACTION_CATEGORISATION
+        GEMINI_TRANSACTION_CATEGORISATION,
+        GEMINI_STRUCTURED_OUTPUT_NOTE,
+        GEMINI_STRUCTURED_CATEGORISATION_NOTE
+    )
+    from src.core.schemas import (
+        TransactionList,
+        CategoryAssignmentList,
+        PersonalInfo,
+        TransactionSummary
     )
+    from src.core.validation import chunk_issue_count, invalid_category_rows
+    from src.core.reconciliation import reconcile
+    from src.core.job_context import JobContext
+    from src.core.deadlines import check_deadline, deadline_after, deadline_scope, remaining_time, run_within
+    from src.core.journal import job_fingerprint
+    from src.core.result_store import pipeline_version
+    from src.core.scheduler import get_call_scheduler
+    from src.core.single_flight import get_single_flight
+    from src.utils.artifact_writer import get_artifact_writer
+    from src.utils.remote_files import get_remote_file_manager
     from src.config.settings import Settings
+    from src.services.prompt_cache import get_prompt_cache
+    from src.services.client_registry import get_gemini_client
+    from src.services.credential_pool import current_credential, get_credential_pool, is_rate_limited, token_count, with_job_credential
+    from src.utils.metrics import IN_FLIGHT, PROMPT_CACHE_LOOKUPS, PROVIDER_CALLS, PROVIDER_RETRIES, RATE_LIMITED, STAGE_SECONDS
+    from src.utils.tracing import span
+    from src.utils.usage import record_usage
+    from src.utils.exceptions import APIError, DataProcessingError, DeadlineExceededError, SchemaDecodeError
+    from src.utils.lazy_import import lazy_import
+
+# Provider SDK and PDF library are imported on first use
+types = lazy_import("google.genai.types")
+genai_errors = lazy_import("google.genai.errors")
+PyPDF2 = lazy_import("PyPDF2")
 
 # CSV Headers for statement processing
 CSV_HEADERS = ['Date', 'Description', 'Amount', 'Direction', 'Balance', 'Category']
@@ -72,40 +125,73 @@ class GeminiService:
     
     def __init__(self):
         """Initialize the Gemini service with API credentials."""
-        # Load environment variables
-        load_dotenv()
-        
-        # Get API key
-        self.api_key = os.environ.get("GEMINI_API_KEY")
-        if not self.api_key:
+        # Default API key, used outside of a job (.env is loaded once by the settings module)
+        if not Settings.GEMINI_API_KEYS:
             raise ValueError("GEMINI_API_KEY environment variable is not set")
+        self._api_key = Settings.GEMINI_API_KEYS[0]
             
-        # Initialize Gemini client
-        self.client = genai.Client(api_key=self.api_key)
+        # Shared client, reusing the process-wide connection pool
+        self._client = get_gemini_client(self._api_key)
         logger.info("Gemini client initialized successfully")
+
+    @property
+    def api_key(self) -> str:
+        """The API key of the job running in this context (see credential_pool), else the default key."""
+        credential = current_credential()
+        return credential.api_key if credential else self._api_key
+
+    @property
+    def client(self):
+        """The shared client for api_key; uploads are only visible to the key that made them."""
+        credential = current_credential()
+        return get_gemini_client(credential.api_key) if credential else self._client
+
+    @property
+    def prompt_cache(self):
+        """Static prompts are registered once per process and API key, and referenced by handle."""
+        return get_prompt_cache(self.api_key, self.client)
+
+    @staticmethod
+    def model_for(stage: str) -> str:
+        """
+        Returns the model routed to a pipeline stage.
+
+        Args:
+            stage: One of the Settings.GEMINI_MODEL_ROUTES keys (parse, categorize, ...)
+
+        Returns:
+            The Gemini model name
+        """
+        return Settings.GEMINI_MODEL_ROUTES.get(stage, Settings.GEMINI_DEFAULT_MODEL)
         
     def split_pdf_into_subpdfs(self, original_pdf_path: str, chunk_count: int, temp_dir: str) -> list:
         """
         Splits the PDF at `original_pdf_path` into `chunk_count` smaller PDFs,
         storing them in `temp_dir`. Returns a list of file paths for the sub-PDFs.
         """
+        return [path for path, _, _ in self.split_pdf_with_page_ranges(original_pdf_path, chunk_count, temp_dir)]
+
+    @STAGE_SECONDS.time(provider="local", stage="split")
+    @span("split")
+    def split_pdf_with_page_ranges(self, original_pdf_path: str, chunk_count: int, temp_dir: str) -> list:
+        """
+        Splits the PDF at `original_pdf_path` into `chunk_count` smaller PDFs,
+        storing them in `temp_dir`.
+
+        Returns:
+            List of (sub-PDF path, first page, last page) tuples, pages 1-based and inclusive
+        """
         logger.info(f"Splitting PDF \"{original_pdf_path}\" into {chunk_count} sub-PDFs...")
-        reader = PdfReader(original_pdf_path)
-        total_pages = len(reader.pages)
+        reader = PyPDF2.PdfReader(original_pdf_path)
         base_name = Path(original_pdf_path).stem
         extension = Path(original_pdf_path).suffix
 
-        pages_per_chunk = max(1, (total_pages + chunk_count - 1) // chunk_count)
-        subpdf_paths = []
-        start_page = 0
-        chunk_idx = 1
-
-        while start_page < total_pages and chunk_idx <= chunk_count:
-            end_page = min(start_page + pages_per_chunk, total_pages)
-            logger.info(f"Creating sub-PDF #{chunk_idx}: pages {start_page + 1} to {end_page}...")
+        subpdfs = []
+        for chunk_idx, (first_page, last_page) in enumerate(self.chunk_page_ranges(len(reader.pages), chunk_count), start=1):
+            logger.info(f"Creating sub-PDF #{chunk_idx}: pages {first_page} to {last_page}...")
             
-            writer = PdfWriter()
-            for i in range(start_page, end_page):
+            writer = PyPDF2.PdfWriter()
+            for i in range(first_page - 1, last_page):
                 writer.add_page(reader.pages[i])
 
             # Write the sub-PDF to disk in the temp directory
@@ -115,19 +201,72 @@ class GeminiService:
             with open(subpdf_path, "wb") as f:
                 writer.write(f)
 
-            subpdf_paths.append(subpdf_path)
+            subpdfs.append((subpdf_path, first_page, last_page))
+
+        logger.info(f"Completed splitting PDF into {len(subpdfs)} sub-PDFs")
+        return subpdfs
+
+    @staticmethod
+    def chunk_page_ranges(total_pages: int, chunk_count: int) -> list:
+        """
+        Pages of each chunk when a PDF of `total_pages` pages is split into `chunk_count`
+        chunks (fewer when there are fewer pages than chunks).
+
+        Returns:
+            List of (first page, last page) tuples, pages 1-based and inclusive
+        """
+        pages_per_chunk = max(1, (total_pages + chunk_count - 1) // chunk_count)
+        ranges = []
+        start_page = 0
+        while start_page < total_pages and len(ranges) < chunk_count:
+            end_page = min(start_page + pages_per_chunk, total_pages)
+            ranges.append((start_page + 1, end_page))
             start_page = end_page
-            chunk_idx += 1
+        return ranges
+
+    def extract_pdf_page(self, original_pdf_path: str, page: int, temp_dir: str) -> str:
+        """
+        Writes a single page of the PDF at `original_pdf_path` to its own PDF in `temp_dir`.
+
+        Args:
+            original_pdf_path: Path to the source PDF
+            page: 1-based page number
+            temp_dir: Directory to write the page PDF to
+
+        Returns:
+            Path to the single-page PDF
+        """
+        reader = PyPDF2.PdfReader(original_pdf_path)
+        writer = PyPDF2.PdfWriter()
+        writer.add_page(reader.pages[page - 1])
+
+        page_path = os.path.join(temp_dir, f"{Path(original_pdf_path).stem}_page_{page}.pdf")
+        with open(page_path, "wb") as f:
+            writer.write(f)
+        return page_path
 
-        logger.info(f"Completed splitting PDF into {len(subpdf_paths)} sub-PDFs")
-        return subpdf_paths
+    @staticmethod
+    def pdf_has_text(pdf_path: str) -> bool:
+        """Whether any page of the PDF at `pdf_path` has extractable text (True when unreadable)."""
+        try:
+            return any((page.extract_text() or "").strip() for page in PyPDF2.PdfReader(pdf_path).pages)
+        except Exception as e:
+            logger.warning(f"Could not read the text of {pdf_path}: {str(e)}")
+            return True
     
-    def upload_to_gemini(self, file_path: str) -> object:
+    @STAGE_SECONDS.time(provider="gemini", stage="upload")
+    @span("upload")
+    def upload_to_gemini(self, file_path: str, context: JobContext = None) -> object:
         """
         Uploads a file to Gemini and returns the file object.
+
+        The upload is registered with the remote file manager. With a context it is
+        deleted once the job is closed; otherwise the caller releases it with
+        release_uploads() when it is done with the file.
         
         Args:
             file_path: Path to the file to upload
+            context: The job the upload belongs to
             
         Returns:
             The uploaded file object
@@ -137,9 +276,28 @@ class GeminiService:
         # Upload the file to Gemini
         file_obj = self.client.files.upload(file=file_path)
         logger.info(f"Uploaded file '{file_obj.display_name}' as: {file_obj.uri}")
-        
+
+        get_remote_file_manager().track(
+            "gemini", self.client, file_obj.name,
+            size_bytes=getattr(file_obj, "size_bytes", None) or os.path.getsize(file_path),
+            job_id=context.job_id if context else None
+        )
+        if context is not None and context.closed:
+            # Uploaded by a stage that outlived its job's deadline
+            self.release_uploads(file_obj)
         return file_obj
+
+    def release_uploads(self, *file_objs) -> None:
+        """
+        Queues uploaded files for background deletion.
+
+        Args:
+            file_objs: File objects returned by upload_to_gemini
+        """
+        get_remote_file_manager().release("gemini", *(f.name for f in file_objs if f is not None))
     
+    @STAGE_SECONDS.time(provider="gemini", stage="file_active_wait")
+    @span("file_active_wait")
     def wait_for_files_active(self, files: list) -> None:
         """
         Waits for the given files to be active (state=ACTIVE) with periodic logging.
@@ -152,8 +310,13 @@ class GeminiService:
         for file_obj in files:
             current_file = self.client.files.get(name=file_obj.name)
             while current_file.state.name == "PROCESSING":
-                logger.info("...still processing, waiting 10 seconds...")
-                time.sleep(10)
+                # Stop polling once the job's deadline has passed
+                check_deadline(f"file {file_obj.name} became ACTIVE")
+                time_left = remaining_time()
+                delay = 10 if time_left is None else min(10, time_left)
+                logger.info(f"...still processing, waiting {delay:.0f} seconds...")
+                with span("poll_sleep", file=file_obj.name):
+                    time.sleep(delay)
                 current_file = self.client.files.get(name=file_obj.name)
             if current_file.state.name != "ACTIVE":
                 raise Exception(
@@ -162,7 +325,7 @@ class GeminiService:
                 )
         logger.info("All file(s) ready")
     
-    def generate_content(self, prompt: str, file_obj: object, max_output_tokens: int = 400000, export_path: str = None) -> str:
+    def generate_content(self, prompt: str, file_obj: object, max_output_tokens: int = 400000, export_path: str = None, model: str = None) -> str:
         """
         Generates content using Gemini with the given prompt and file.
         
@@ -170,7 +333,8 @@ class GeminiService:
             prompt: The prompt to use
             file_obj: The file object to process
             max_output_tokens: Maximum number of tokens to generate
-            export_path: Path to export the raw response (if Settings.EXPORT_RAW_GEMINI_RESPONSES is True)
+            export_path: Path to export the raw response to (None to skip the export)
+            model: The Gemini model to use (defaults to Settings.GEMINI_DEFAULT_MODEL)
             
         Returns:
             The generated text response
@@ -178,27 +342,139 @@ class GeminiService:
         logger.info("Sending prompt with file to Gemini...")
         
         # Generate content
-        response = self.client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=[prompt, file_obj],
-            config=types.GenerateContentConfig(max_output_tokens=max_output_tokens),
-        )
+        response = self._generate(prompt, file_obj, model=model, max_output_tokens=max_output_tokens)
         
         # Export raw response if enabled and export_path is provided
-        if export_path and Settings.EXPORT_RAW_GEMINI_RESPONSES:
+        self._export_raw_response(response.text, export_path)
+
+        return response.text
+
+    def generate_structured(self, prompt: str, contents: object, schema: type, max_output_tokens: int = 400000, export_path: str = None, model: str = None) -> tuple:
+        """
+        Generates content constrained to a response schema and decodes it.
+
+        Args:
+            prompt: The prompt to use
+            contents: The file object or text to process alongside the prompt
+            schema: Pydantic model class describing the expected JSON response
+            max_output_tokens: Maximum number of tokens to generate
+            export_path: Path to export the raw response to (None to skip the export)
+            model: The Gemini model to use (defaults to Settings.GEMINI_DEFAULT_MODEL)
+
+        Returns:
+            Tuple containing (decoded schema instance, raw JSON response text)
+
+        Raises:
+            SchemaDecodeError: The response does not match the schema
+        """
+        logger.info(f"Sending prompt to Gemini with {schema.__name__} response schema...")
+
+        response = self._generate(
+            prompt + GEMINI_STRUCTURED_OUTPUT_NOTE,
+            contents,
+            model=model,
+            max_output_tokens=max_output_tokens,
+            response_mime_type="application/json",
+            response_schema=schema,
+        )
+
+        self._export_raw_response(response.text, export_path)
+
+        # The SDK decodes into the schema for us; fall back to validating the text
+        parsed = getattr(response, "parsed", None)
+        if not isinstance(parsed, schema):
             try:
-                # Create directory if it doesn't exist
-                os.makedirs(os.path.dirname(export_path), exist_ok=True)
-                
-                # Write response to file
-                with open(export_path, 'w', encoding='utf-8') as f:
-                    f.write(response.text)
-                logger.info(f"Raw Gemini response exported to: {export_path}")
+                parsed = schema.model_validate_json(response.text or "")
+            except SchemaValidationError as e:
+                raise SchemaDecodeError(
+                    f"Gemini response did not match {schema.__name__}: {str(e)}",
+                    response_text=response.text or ""
+                )
+
+        return parsed, response.text
+
+    def _generate(self, prompt: str, contents: object, model: str = None, **config_kwargs) -> object:
+        """
+        Sends one generate_content request with `prompt` as a cached or inline system instruction.
+
+        Args:
+            prompt: The static prompt for this request
+            contents: The file object or text to process
+            model: The Gemini model to use (defaults to Settings.GEMINI_DEFAULT_MODEL)
+            **config_kwargs: Additional GenerateContentConfig fields
+
+        Returns:
+            The Gemini response object
+        """
+        model = model or Settings.GEMINI_DEFAULT_MODEL
+        check_deadline("the Gemini request")
+
+        # Requests and tokens are counted against the job's key; a 429 cools the key down.
+        # The call waits for a slot in its job's lane, so bulk jobs yield between calls.
+        pool = get_credential_pool()
+        credential = current_credential() or pool.for_key(self.api_key)
+        with get_call_scheduler().slot(), pool.request(credential):
+            try:
+                with STAGE_SECONDS.time(provider="gemini", stage="generate"), span("generate", model=model):
+                    response = self._send(prompt, contents, model, config_kwargs)
             except Exception as e:
-                logger.warning(f"Failed to export raw Gemini response: {str(e)}")
-        
-        return response.text
-    
+                outcome = "rate_limited" if is_rate_limited(e) else "error"
+                if outcome == "rate_limited":
+                    RATE_LIMITED.inc(provider="gemini")
+                PROVIDER_CALLS.inc(provider="gemini", model=model, outcome=outcome)
+                raise
+        PROVIDER_CALLS.inc(provider="gemini", model=model, outcome="ok")
+        pool.record_tokens(credential, token_count(response))
+        # Tokens and cost of the call, for the current stage and job
+        record_usage("gemini", model, response)
+        return response
+
+    def _send(self, prompt: str, contents: object, model: str, config_kwargs: dict) -> object:
+        # Within a job deadline the request times out when the deadline does, so a
+        # call the job has stopped waiting for does not run on in the background
+        time_left = remaining_time()
+        if time_left is not None:
+            check_deadline("the Gemini request")
+            config_kwargs.setdefault("http_options", types.HttpOptions(timeout=max(1000, int(time_left * 1000))))
+
+        cache_name = self.prompt_cache.get(model, prompt)
+        PROMPT_CACHE_LOOKUPS.inc(result="hit" if cache_name else "miss")
+        if cache_name:
+            try:
+                return self.client.models.generate_content(
+                    model=model,
+                    contents=[contents],
+                    config=types.GenerateContentConfig(cached_content=cache_name, **config_kwargs),
+                )
+            except genai_errors.ClientError as e:
+                if e.code not in (400, 403, 404):
+                    raise
+                # The handle may have expired server-side; drop it and send the prompt inline
+                logger.warning(f"Cached prompt {cache_name} rejected ({e.code}), retrying inline")
+                self.prompt_cache.invalidate(model, prompt)
+                PROVIDER_RETRIES.inc(provider="gemini", reason="cache_rejected")
+
+        return self.client.models.generate_content(
+            model=model,
+            contents=[contents],
+            config=types.GenerateContentConfig(system_instruction=prompt, **config_kwargs),
+        )
+
+    def _export_raw_response(self, text: str, export_path: str = None) -> None:
+        """
+        Queues a raw Gemini response for `export_path` on the background artifact writer.
+        Callers only pass a path when raw response export is enabled for the job (see
+        JobContext.export_path); paths in a job's output directory end up in its archive.
+
+        Args:
+            text: The raw response text
+            export_path: Path to export the raw response to
+        """
+        if not export_path:
+            return
+        get_artifact_writer().write(export_path, text or "")
+        logger.info(f"Raw Gemini response queued for export to: {export_path}")
+
     def process_document(self, pdf_path: str, chunk_count: int = 3) -> dict:
         """
         Base method for processing a document with Gemini.
@@ -213,61 +489,51 @@ class GeminiService:
         """
         raise NotImplementedError("Subclasses must implement process_document()")
 
-    def process_pdf_statement_with_raw_response(self, pdf_path: str, prompt_template: str = GEMINI_STATEMENT_PARSE, export_raw_responses: bool = False, output_dir: str = None) -> tuple:
+    @with_job_credential
+    def process_pdf_statement_with_raw_response(self, pdf_path: str, prompt_template: str = GEMINI_STATEMENT_PARSE, export_raw_responses: bool = False, output_dir: str = None, context: JobContext = None) -> tuple:
         """
         Process a PDF statement and return both the transactions and the raw CSV response.
         
         Args:
             pdf_path: Path to the PDF file
             prompt_template: Template for the prompt to send to Gemini
-            export_raw_responses: Whether to export raw responses (overrides Settings.EXPORT_RAW_GEMINI_RESPONSES)
+            export_raw_responses: Whether to export raw responses (in addition to Settings.EXPORT_RAW_GEMINI_RESPONSES)
             output_dir: Directory to export raw responses to (if None, uses the directory of pdf_path)
+            context: The job's context; export_raw_responses and output_dir are ignored when given
             
         Returns:
             Tuple containing (list of transaction dictionaries, raw CSV response)
         """
         logger.info(f"Processing PDF statement with raw response: {pdf_path}")
         
-        # Determine output directory for raw responses
-        if export_raw_responses and output_dir is None:
-            output_dir = os.path.dirname(pdf_path)
-        
-        # Override Settings.EXPORT_RAW_GEMINI_RESPONSES if export_raw_responses is True
-        original_export_setting = Settings.EXPORT_RAW_GEMINI_RESPONSES
-        if export_raw_responses:
-            Settings.EXPORT_RAW_GEMINI_RESPONSES = True
+        owns_context = context is None
+        if owns_context:
+            context = JobContext(
+                output_dir=output_dir or os.path.dirname(pdf_path),
+                export_raw_responses=export_raw_responses or Settings.EXPORT_RAW_GEMINI_RESPONSES
+            )
         
         try:
             # Upload the PDF to Gemini
-            pdf_obj = self.upload_to_gemini(pdf_path)
+            pdf_obj = self.upload_to_gemini(pdf_path, context)
             
             # Wait for the file to be active
             self.wait_for_files_active([pdf_obj])
             
-            # Prepare export path
-            export_path = None
-            if Settings.EXPORT_RAW_GEMINI_RESPONSES and output_dir:
-                export_path = os.path.join(output_dir, "raw_gemini_statement_parse.txt")
-            
             # Process with the provided prompt template
-            response_text = self.generate_content(
-                prompt_template, 
+            transactions, response_text = self.extract_transactions(
                 pdf_obj,
-                export_path=export_path
+                prompt_template=prompt_template,
+                export_path=context.export_path("raw_gemini_statement_parse.txt")
             )
-            
-            # Extract CSV from the response
-            csv_content = self.extract_csv_from_response(response_text)
-            
-            # Parse the CSV to transactions
-            transactions = self.parse_csv_to_transactions(csv_content)
-            
-            # Return both the transactions and the raw CSV response
-            return transactions, response_text
         finally:
-            # Restore original export setting
-            Settings.EXPORT_RAW_GEMINI_RESPONSES = original_export_setting
+            # Release the upload and scratch space of a context created for this call
+            if owns_context:
+                context.close()
 
+        # Return both the transactions and the raw response
+        return transactions, response_text
+    
     def extract_csv_from_response(self, text: str) -> str:
         """
         Returns the CSV content from the response, handling both code-fenced and raw CSV.
@@ -357,14 +623,15 @@ class GeminiService:
 
         return transactions
 
-    def categorize_transactions(self, transactions_csv: str, prompt_template: str = GEMINI_TRANSACTION_CATEGORISATION, export_path: str = None) -> str:
+    def categorize_transactions(self, transactions_csv: str, prompt_template: str = GEMINI_TRANSACTION_CATEGORISATION, export_path: str = None, model: str = None) -> str:
         """
         Categorize transactions using Gemini.
         
         Args:
             transactions_csv: CSV string containing transaction data
             prompt_template: Prompt template for categorization
-            export_path: Path to export the raw response (if Settings.EXPORT_RAW_GEMINI_RESPONSES is True)
+            export_path: Path to export the raw response to (None to skip the export)
+            model: The Gemini model to use (defaults to the categorize route)
             
         Returns:
             CSV string with categorized transactions
@@ -373,27 +640,18 @@ class GeminiService:
         
         try:
             # Send to Gemini with the categorization prompt
-            response = self.client.models.generate_content(
-                model="gemini-2.0-flash",
-                contents=[prompt_template, transactions_csv],
-                config=types.GenerateContentConfig(max_output_tokens=400000),
+            response = self._generate(
+                prompt_template,
+                transactions_csv,
+                model=model or self.model_for("categorize"),
+                max_output_tokens=400000
             )
             
             # Extract CSV from response
             categorized_csv = response.text
             
-            # Export raw response if enabled and export_path is provided
-            if export_path and Settings.EXPORT_RAW_GEMINI_RESPONSES:
-                try:
-                    # Create directory if it doesn't exist
-                    os.makedirs(os.path.dirname(export_path), exist_ok=True)
-                    
-                    # Write response to file
-                    with open(export_path, 'w', encoding='utf-8') as f:
-                        f.write(categorized_csv)
-                    logger.info(f"Raw categorization response exported to: {export_path}")
-                except Exception as e:
-                    logger.warning(f"Failed to export raw categorization response: {str(e)}")
+            # Export raw response if export_path is provided
+            self._export_raw_response(categorized_csv, export_path)
             
             logger.info(f"Successfully categorized transactions")
             
@@ -402,169 +660,745 @@ class GeminiService:
             logger.exception(f"Error categorizing transactions: {str(e)}")
             raise APIError(f"Error categorizing transactions: {str(e)}")
 
+    @staticmethod
+    def transactions_to_csv(transactions: list, fieldnames: list = CSV_HEADERS, include_index: bool = False) -> str:
+        """
+        Serialise transaction dictionaries to CSV text with a header row.
+
+        Args:
+            transactions: List of transaction dictionaries
+            fieldnames: Columns to write (other keys are dropped)
+            include_index: Whether to prepend an Index column with the row position
+
+        Returns:
+            CSV text
+        """
+        csv_content = io.StringIO()
+        columns = (['Index'] + list(fieldnames)) if include_index else list(fieldnames)
+        writer = csv.DictWriter(csv_content, fieldnames=columns, extrasaction='ignore')
+        writer.writeheader()
+        for index, transaction in enumerate(transactions):
+            row = {k: v for k, v in transaction.items() if k in fieldnames}
+            if include_index:
+                row['Index'] = index
+            writer.writerow(row)
+        return csv_content.getvalue()
+
+    def extract_transactions(self, file_obj: object, prompt_template: str = GEMINI_STATEMENT_PARSE, export_path: str = None, model: str = None) -> tuple:
+        """
+        Extract the transactions from an uploaded statement file.
+        Uses a response schema when Settings.GEMINI_STRUCTURED_OUTPUT is enabled,
+        otherwise recovers CSV from the free-text response.
+
+        Args:
+            file_obj: The uploaded statement (or statement chunk)
+            prompt_template: Prompt template for statement parsing
+            export_path: Path to export the raw response
+            model: The Gemini model to use (defaults to the parse route)
+
+        Returns:
+            Tuple containing (list of transaction dictionaries, raw response text)
+        """
+        model = model or self.model_for("parse")
+        if Settings.GEMINI_STRUCTURED_OUTPUT:
+            try:
+                parsed, response_text = self.generate_structured(
+                    prompt_template,
+                    file_obj,
+                    TransactionList,
+                    export_path=export_path,
+                    model=model
+                )
+                return parsed.to_rows(), response_text
+            except DataProcessingError as e:
+                logger.warning(f"Error decoding structured transactions: {e}")
+                return [], ""
+
+        response_text = self.generate_content(prompt_template, file_obj, export_path=export_path, model=model)
+        csv_content = self.extract_csv_from_response(response_text)
+        return self.parse_csv_to_transactions(csv_content), response_text
+
+    def categorize_transaction_rows(self, transactions: list, prompt_template: str = GEMINI_TRANSACTION_CATEGORISATION, export_path: str = None, model: str = None) -> list:
+        """
+        Assign a category to each transaction dictionary.
+
+        Args:
+            transactions: List of transaction dictionaries
+            prompt_template: Prompt template for categorization
+            export_path: Path to export the raw response
+            model: The Gemini model to use (defaults to the categorize route)
+
+        Returns:
+            List of transaction dictionaries with the Category field filled in
+        """
+        if not Settings.GEMINI_STRUCTURED_OUTPUT:
+            categorized_csv = self.categorize_transactions(
+                self.transactions_to_csv(transactions, CSV_HEADERS_WITHOUT_CATEGORY),
+                prompt_template=prompt_template,
+                export_path=export_path,
+                model=model
+            )
+            return self.parse_csv_to_transactions(categorized_csv)
+
+        logger.info(f"Categorizing {len(transactions)} transactions with Gemini")
+        try:
+            assignments, _ = self.generate_structured(
+                prompt_template + GEMINI_STRUCTURED_CATEGORISATION_NOTE,
+                self.transactions_to_csv(transactions, CSV_HEADERS_WITHOUT_CATEGORY, include_index=True),
+                CategoryAssignmentList,
+                export_path=export_path,
+                model=model or self.model_for("categorize")
+            )
+        except DataProcessingError:
+            raise
+        except Exception as e:
+            logger.exception(f"Error categorizing transactions: {str(e)}")
+            raise APIError(f"Error categorizing transactions: {str(e)}")
+
+        logger.info("Successfully categorized transactions")
+        return assignments.apply_to(transactions)
+
+    @with_job_credential
+    @STAGE_SECONDS.time(provider="gemini", stage="personal_info")
+    @span("personal_info")
+    def extract_personal_info(self, pdf_path: str = None, prompt_template: str = GEMINI_PERSONAL_INFO_PARSE, page_image_path: str = None, file_obj: object = None, export_path: str = None, model: str = None):
+        """
+        Extract personal information from a statement.
+
+        Args:
+            pdf_path: Path to the statement (or its first chunk); ignored when file_obj is given
+            prompt_template: Prompt template for personal information extraction
+            page_image_path: Path to an image of the front page, used instead of pdf_path if given
+            file_obj: An already uploaded and ACTIVE file to use
+            export_path: Path to export the raw response
+            model: The Gemini model to use (defaults to the personal_info route)
+
+        Returns:
+            Dictionary of personal information when structured output is enabled,
+            otherwise the raw comma delimited response text
+        """
+        uploaded = None
+        if file_obj is None:
+            file_obj = uploaded = self.upload_to_gemini(page_image_path or pdf_path)
+
+        try:
+            if uploaded is not None:
+                self.wait_for_files_active([file_obj])
+
+            model = model or self.model_for("personal_info")
+            if Settings.GEMINI_STRUCTURED_OUTPUT:
+                try:
+                    personal_info, _ = self.generate_structured(
+                        prompt_template,
+                        file_obj,
+                        PersonalInfo,
+                        export_path=export_path,
+                        model=model
+                    )
+                    return personal_info.to_dict()
+                except DataProcessingError as e:
+                    logger.warning(f"Error decoding structured personal information: {e}")
+                    return {}
+
+            return self.generate_content(prompt_template, file_obj, export_path=export_path, model=model).strip()
+        finally:
+            self.release_uploads(uploaded)
+
+    @STAGE_SECONDS.time(provider="gemini", stage="summary")
+    @span("summary")
+    def generate_transaction_summary(self, transactions: list, prompt_template: str = GEMINI_TRANSACTION_SUMMARY, personal_info=None, export_path: str = None, model: str = None) -> dict:
+        """
+        Generate a summary of the transactions.
+
+        Args:
+            transactions: List of transaction dictionaries
+            prompt_template: Prompt template for the summary
+            personal_info: Personal information to prepend to the transactions (dict or text)
+            export_path: Path to export the raw response
+            model: The Gemini model to use (defaults to the summary route)
+
+        Returns:
+            Dictionary containing the summary
+        """
+        logger.info(f"Generating transaction summary for {len(transactions)} transactions")
+        csv_content = self.transactions_to_csv(transactions)
+
+        # Add personal info to the top
+        if personal_info:
+            if isinstance(personal_info, dict):
+                personal_info = json.dumps(personal_info)
+            csv_content = f"# Personal Information: {personal_info}\n{csv_content}"
+
+        model = model or self.model_for("summary")
+        if Settings.GEMINI_STRUCTURED_OUTPUT:
+            try:
+                summary, _ = self.generate_structured(
+                    prompt_template,
+                    csv_content,
+                    TransactionSummary,
+                    export_path=export_path,
+                    model=model
+                )
+                return summary.to_dict()
+            except SchemaDecodeError as e:
+                # Shown as the summary, so keep the model's text rather than the error
+                logger.warning(f"Error decoding structured summary: {e}")
+                return {"raw_summary": e.response_text}
+
+        summary_response = self.generate_content(prompt_template, csv_content, export_path=export_path, model=model)
+        try:
+            # Try to parse as JSON
+            return json.loads(summary_response)
+        except json.JSONDecodeError:
+            # If not valid JSON, use the raw text
+            return {"raw_summary": summary_response}
+
+    @with_job_credential
+    def extract_document_fields(self, file_path: str, prompt_template: str, schema: type, model: str = None, deadline_seconds: float = None) -> dict:
+        """
+        Extract the fields of an identity document image (passport, driving licence).
+
+        Args:
+            file_path: Path to the document image
+            prompt_template: Prompt template for the document type
+            schema: Pydantic model class of the document's fields, with a to_dict() method
+            model: The Gemini model to use (defaults to Settings.GEMINI_DEFAULT_MODEL)
+            deadline_seconds: Deadline of the upload, the wait for it and the request
+                (defaults to Settings.IDENTITY_DEADLINE_SECONDS)
+
+        Returns:
+            Dictionary of the fields found, or {"raw_response": text} when the response
+            could not be decoded
+        """
+        if deadline_seconds is None:
+            deadline_seconds = Settings.IDENTITY_DEADLINE_SECONDS
+        with deadline_scope(deadline_after(deadline_seconds)):
+            file_obj = self.upload_to_gemini(file_path)
+            try:
+                self.wait_for_files_active([file_obj])
+                if Settings.GEMINI_STRUCTURED_OUTPUT:
+                    try:
+                        parsed, _ = self.generate_structured(prompt_template, file_obj, schema, max_output_tokens=4000, model=model)
+                        return parsed.to_dict()
+                    except SchemaDecodeError as e:
+                        logger.warning(f"Error decoding structured {schema.__name__}: {e}")
+                        return {"raw_response": e.response_text}
+
+                response_text = self.generate_content(prompt_template, file_obj, max_output_tokens=4000, model=model)
+                # The JSON object may be wrapped in markdown code blocks
+                json_start = response_text.find('{')
+                json_end = response_text.rfind('}') + 1
+                if json_start < 0 or json_end <= json_start:
+                    logger.warning("No JSON content found in the response")
+                    return {"raw_response": response_text}
+                try:
+                    return json.loads(response_text[json_start:json_end])
+                except json.JSONDecodeError as e:
+                    logger.warning(f"Failed to parse response as JSON: {str(e)}")
+                    return {"raw_response": response_text}
+            finally:
+                self.release_uploads(file_obj)
+
 
 class StatementGeminiService(GeminiService):
     """
     Specialized service for processing financial statements with Gemini.
     """
+
+    @STAGE_SECONDS.time(provider="gemini", stage="parse")
+    @span("parse")
+    def parse_chunk(self, pdf_obj: object, export_path: str = None, pdf_path: str = None) -> list:
+        """
+        Extract the transactions from one uploaded chunk on the routed parse model,
+        re-running the chunk on Settings.GEMINI_ESCALATION_MODEL if the result fails
+        validation (bad dates, amounts or directions, balance discontinuities, no rows
+        from pages with text).
+
+        Args:
+            pdf_obj: The uploaded chunk
+            export_path: Path to export the raw response
+            pdf_path: Local copy of the chunk, checked for text when no rows are found
+
+        Returns:
+            List of transaction dictionaries
+        """
+        transactions, _ = self.extract_transactions(
+            pdf_obj,
+            prompt_template=GEMINI_STATEMENT_PARSE,
+            export_path=export_path
+        )
+
+        # Cover and terms pages legitimately hold no transactions
+        has_text = bool(transactions) or pdf_path is None or self.pdf_has_text(pdf_path)
+        issues = chunk_issue_count(transactions, has_text)
+        escalation_model = Settings.GEMINI_ESCALATION_MODEL
+        if not issues or not Settings.GEMINI_ESCALATION_ENABLED or escalation_model == self.model_for("parse"):
+            return transactions
+
+        logger.info(f"Chunk failed validation with {issues} issue(s), escalating to {escalation_model}")
+        PROVIDER_RETRIES.inc(provider="gemini", reason="escalation")
+        escalated, _ = self.extract_transactions(
+            pdf_obj,
+            prompt_template=GEMINI_STATEMENT_PARSE,
+            export_path=export_path.replace(".txt", "_escalated.txt") if export_path else None,
+            model=escalation_model
+        )
+
+        # Keep whichever attempt validates better
+        escalated_issues = chunk_issue_count(escalated, has_text)
+        if escalated_issues < issues:
+            logger.info(f"Using escalated result for chunk ({escalated_issues} issue(s))")
+            return escalated
+        return transactions
+
+    @STAGE_SECONDS.time(provider="gemini", stage="categorize")
+    @span("categorize")
+    def categorize_chunk(self, transactions: list, export_path: str = None) -> list:
+        """
+        Categorize the transactions of one chunk on the routed categorize model and
+        re-categorize only the rows left without a known category, or categorized as
+        "Unknown", on Settings.GEMINI_ESCALATION_MODEL.
+
+        Args:
+            transactions: List of transaction dictionaries
+            export_path: Path to export the raw response
+
+        Returns:
+            List of transaction dictionaries with the Category field filled in
+        """
+        categorized = self.categorize_transaction_rows(transactions, export_path=export_path)
+
+        escalation_model = Settings.GEMINI_ESCALATION_MODEL
+        if not Settings.GEMINI_ESCALATION_ENABLED or escalation_model == self.model_for("categorize"):
+            return categorized
+
+        failed_rows = invalid_category_rows(categorized)
+        if not failed_rows or len(categorized) != len(transactions):
+            return categorized
+
+        logger.info(f"{len(failed_rows)} row(s) have no valid category, escalating them to {escalation_model}")
+        PROVIDER_RETRIES.inc(provider="gemini", reason="escalation")
+        recategorized = self.categorize_transaction_rows(
+            [transactions[index] for index in failed_rows],
+            export_path=export_path.replace(".txt", "_escalated.txt") if export_path else None,
+            model=escalation_model
+        )
+        if len(recategorized) == len(failed_rows):
+            for index, row in zip(failed_rows, recategorized):
+                categorized[index] = row
+        return categorized
+    
+    @staticmethod
+    def _assign_pages(transactions: list, first_page: int, last_page: int) -> list:
+        """
+        Convert the chunk-relative Page reported by the model into a page of the whole
+        document, dropping page numbers that fall outside the chunk.
+        """
+        for transaction in transactions:
+            page = transaction.get('Page')
+            if page is None:
+                continue
+            absolute_page = first_page + int(page) - 1
+            if first_page <= absolute_page <= last_page:
+                transaction['Page'] = absolute_page
+            else:
+                transaction.pop('Page')
+        return transactions
+
+    @staticmethod
+    def _flatten_chunks(chunks: list) -> tuple:
+        """
+        Concatenate the chunk transactions in document order.
+
+        Returns:
+            Tuple containing (list of transaction dictionaries, list of (first, last)
+            page spans each row may have come from)
+        """
+        transactions, row_pages = [], []
+        for chunk in chunks:
+            first_page, last_page = chunk["pages"]
+            for transaction in chunk["transactions"]:
+                page = transaction.get('Page')
+                transactions.append(transaction)
+                row_pages.append((page, page) if page is not None else (first_page, last_page))
+        return transactions, row_pages
+
+    def extract_page(self, pdf_path: str, page: int, context: JobContext) -> list:
+        """
+        Parse and categorize a single page of the statement.
+
+        Args:
+            pdf_path: Path to the full statement
+            page: 1-based page number
+            context: The job's context (scratch space and raw response export)
+
+        Returns:
+            List of categorized transaction dictionaries, with Page set to `page`
+        """
+        page_path = self.extract_pdf_page(pdf_path, page, context.scratch_dir)
+        page_obj = self.upload_to_gemini(page_path, context)
+        self.wait_for_files_active([page_obj])
+
+        transactions = self.parse_chunk(
+            page_obj,
+            export_path=context.export_path(f"raw_gemini_statement_parse_page_{page}.txt")
+        )
+        if transactions:
+            transactions = self.categorize_chunk(
+                transactions,
+                export_path=context.export_path(f"raw_gemini_categorization_page_{page}.txt")
+            )
+        for transaction in transactions:
+            transaction['Page'] = page
+        return transactions
+
+    def reconcile_chunks(self, chunks: list, personal_info, pdf_path: str, context: JobContext):
+        """
+        Reconcile the running balance across all chunks and re-extract only the pages
+        around each discontinuity, keeping a re-extraction only when it reduces the
+        number of discontinuities. Chunks are updated in place.
+
+        Args:
+            chunks: List of {"pages": (first, last), "transactions": [...]} in document order
+            personal_info: Personal information (used for the starting/finishing balance and totals)
+            pdf_path: Path to the full statement
+            context: The job's context
+
+        Returns:
+            The final ReconciliationReport
+        """
+        report = reconcile(*self._flatten_chunks(chunks), personal_info=personal_info)
+        logger.info(
+            f"Reconciliation: {len(report.discontinuities)} discontinuity(ies), "
+            f"confidence {report.confidence:.2f}"
+        )
+
+        page_budget = Settings.RECONCILIATION_MAX_PAGES
+        attempted = set()
+        while report.discontinuities and page_budget > 0:
+            candidates = [page for page in report.suspect_pages if page not in attempted]
+            if not candidates:
+                break
+            page = candidates[0]
+            chunk = next(chunk for chunk in chunks if chunk["pages"][0] <= page <= chunk["pages"][1])
+            first_page, last_page = chunk["pages"]
+
+            # Without page attribution a page's rows cannot be told apart, so the whole
+            # chunk is rebuilt page by page instead
+            attributed = all(transaction.get('Page') is not None for transaction in chunk["transactions"])
+            pages = [page] if attributed else list(range(first_page, last_page + 1))
+            if len(pages) > page_budget:
+                attempted.update(pages)
+                continue
+            attempted.update(pages)
+            page_budget -= len(pages)
+
+            logger.info(f"Re-extracting page(s) {pages} to resolve balance discontinuities")
+            PROVIDER_RETRIES.inc(len(pages), provider="gemini", reason="reextract_page")
+            reextracted = {
+                number: self.extract_page(pdf_path, number, context)
+                for number in pages
+            }
+            if attributed:
+                rows = chunk["transactions"]
+                replacement = (
+                    [row for row in rows if row['Page'] < page]
+                    + reextracted[page]
+                    + [row for row in rows if row['Page'] > page]
+                )
+            else:
+                replacement = [row for number in pages for row in reextracted[number]]
+
+            original = chunk["transactions"]
+            chunk["transactions"] = replacement
+            candidate = reconcile(*self._flatten_chunks(chunks), personal_info=personal_info)
+            if len(candidate.discontinuities) < len(report.discontinuities):
+                logger.info(
+                    f"Re-extraction reduced discontinuities from {len(report.discontinuities)} "
+                    f"to {len(candidate.discontinuities)}"
+                )
+                report = candidate
+            else:
+                chunk["transactions"] = original
+
+        return report
     
-    def process_document(self, pdf_path: str, chunk_count: int = 3, export_raw_responses: bool = False, output_dir: str = None) -> dict:
+    @IN_FLIGHT.track_inprogress(kind="chunks")
+    def process_chunk(self, subpdf_path: str, index: int, first_page: int, last_page: int, context: JobContext) -> list:
+        """
+        Parse and categorize one chunk of the statement, journaling each step.
+
+        Args:
+            subpdf_path: Path to the chunk
+            index: 1-based chunk number
+            first_page: First page of the statement in the chunk
+            last_page: Last page of the statement in the chunk
+            context: The job's context
+
+        Returns:
+            List of categorized transaction dictionaries
+        """
+        journal = context.journal
+        if journal and journal.has("parse", index):
+            logger.info(f"Chunk {index} already parsed, using journaled transactions")
+            chunk_transactions = journal.get("parse", index)
+        else:
+            # Upload chunk to Gemini
+            pdf_obj = self.upload_to_gemini(subpdf_path, context)
+            
+            # Wait for the file to be active
+            self.wait_for_files_active([pdf_obj])
+            
+            # Process with GEMINI_STATEMENT_PARSE prompt
+            chunk_transactions = self.parse_chunk(
+                pdf_obj,
+                export_path=context.export_path(f"raw_gemini_statement_parse_chunk_{index}.txt"),
+                pdf_path=subpdf_path
+            )
+            self._assign_pages(chunk_transactions, first_page, last_page)
+            if journal:
+                journal.record("parse", chunk_transactions, key=index)
+        context.emit(f"chunk:{index}", "parsed", pages=[first_page, last_page], transactions=copy.deepcopy(chunk_transactions))
+        
+        # Categorize transactions for this chunk immediately
+        if chunk_transactions:
+            logger.info(f"Categorizing transactions for chunk {index}...")
+            chunk_transactions = self.categorize_chunk(
+                chunk_transactions,
+                export_path=context.export_path(f"raw_gemini_categorization_chunk_{index}.txt")
+            )
+            logger.info(f"Successfully categorized {len(chunk_transactions)} transactions for chunk {index}")
+        else:
+            logger.info(f"No transactions found in chunk {index}, skipping categorization")
+        if journal:
+            journal.record("categorize", chunk_transactions, key=index)
+        return chunk_transactions
+
+    def process_document(self, pdf_path: str, chunk_count: int = 3, export_raw_responses: bool = False, output_dir: str = None, context: JobContext = None) -> dict:
+        """
+        Process a financial statement PDF with Gemini.
+
+        An identical job already in flight in this process is joined instead of run
+        again: this call waits for it, within the context's deadline, and returns a copy
+        of its result. Jobs are identical when they have the same document, chunk count
+        and pipeline version (prompts, models, ...), whatever their output directories,
+        so double-clicked uploads and retries are coalesced. The joining job gets the
+        running job's progress events and its journal is seeded from the result; its
+        caller writes the outputs into its own directory as usual. Raw responses are
+        only exported by the job that ran. A partial result, cut short by the running
+        job's deadline, is not reused: this job runs itself unless its own deadline
+        has passed.
+
+        See _process_document for the arguments and result.
+        """
+        if not Settings.SINGLE_FLIGHT_ENABLED:
+            return self._process_document(pdf_path, chunk_count, export_raw_responses, output_dir, context)
+
+        deadline = context.deadline if context is not None else deadline_after(Settings.JOB_DEADLINE_SECONDS)
+        key = job_fingerprint(
+            pdf_path,
+            pipeline="statement",
+            chunk_count=chunk_count,
+            version=pipeline_version(use_gemini=True, chunk_count=chunk_count)
+        )
+        joined = []
+
+        def join(leader_context):
+            joined.append(leader_context)
+            if leader_context is not None and context is not None:
+                leader_context.listeners.append(
+                    lambda stage, status, details: context.emit(stage, status, **details)
+                )
+
+        result = get_single_flight().do(
+            key, self._process_document, pdf_path, chunk_count, export_raw_responses, output_dir, context,
+            deadline=deadline,
+            reusable=lambda result: result.get("complete", True),
+            shared=context,
+            on_join=join
+        )
+        if joined and context is not None:
+            context.transactions = result["transactions"]
+            context.personal_info = result["personal_info"]
+            if context.journal is not None and result.get("complete"):
+                self._seed_journal(context.journal, pdf_path, chunk_count, result)
+        return result
+
+    def _seed_journal(self, journal, pdf_path: str, chunk_count: int, result: dict) -> None:
+        """
+        Record the stages of a result computed by another job in this job's journal,
+        as if this job had run them (stages already in the journal are kept). The
+        transactions are split back into their chunks by page.
+        """
+        total_pages = len(PyPDF2.PdfReader(pdf_path).pages)
+        chunks = [
+            {"pages": [first_page, last_page], "transactions": []}
+            for first_page, last_page in self.chunk_page_ranges(total_pages, chunk_count)
+        ]
+        current = 0
+        for transaction in result["transactions"]:
+            page = transaction.get('Page')
+            if page is not None:
+                # Rows without a page stay in the chunk of the row before them
+                current = next(
+                    (i for i, chunk in enumerate(chunks) if chunk["pages"][0] <= page <= chunk["pages"][1]),
+                    current
+                )
+            chunks[current]["transactions"].append(transaction)
+
+        for index, chunk in enumerate(chunks, start=1):
+            if not journal.has("categorize", index):
+                journal.record("categorize", chunk["transactions"], key=index)
+        if not journal.has("personal_info"):
+            journal.record("personal_info", result["personal_info"])
+        if result.get("reconciliation") is not None and not journal.has("reconciliation"):
+            journal.record("reconciliation", {"chunks": chunks, "report": result["reconciliation"]})
+        if result.get("summary") is not None and not journal.has("summary"):
+            journal.record("summary", result["summary"])
+
+    @with_job_credential
+    def _process_document(self, pdf_path: str, chunk_count: int = 3, export_raw_responses: bool = False, output_dir: str = None, context: JobContext = None) -> dict:
         """
         Process a financial statement PDF with Gemini.
+
+        Every stage runs within the context's deadline. If it expires, the stage in
+        flight is abandoned (its requests time out at the deadline) and the chunks,
+        personal information and summary completed so far are returned, with
+        "complete" set to False and the unfinished stages listed in "incomplete".
+        Stages report their progress to the context's listeners as they start and complete.
         
         Args:
             pdf_path: Path to the PDF file to process
             chunk_count: Number of chunks to split the PDF into
-            export_raw_responses: Whether to export raw responses (overrides Settings.EXPORT_RAW_GEMINI_RESPONSES)
+            export_raw_responses: Whether to export raw responses (in addition to Settings.EXPORT_RAW_GEMINI_RESPONSES)
             output_dir: Directory to export raw responses to (if None, uses the directory of pdf_path)
+            context: The job's context (export options, scratch space, checkpoint journal,
+                deadline, progress listeners); export_raw_responses and output_dir are ignored when given. Stages
+                already in the context's journal are skipped and newly completed stages appended.
             
         Returns:
             A dictionary containing the processing results
         """
-        # Create a temporary directory for storing sub-PDFs
-        temp_dir = tempfile.mkdtemp()
-        logger.info(f"Created temporary directory: {temp_dir}")
-        
-        # Determine output directory for raw responses
-        if export_raw_responses and output_dir is None:
-            output_dir = os.path.dirname(pdf_path)
-        
-        # Override Settings.EXPORT_RAW_GEMINI_RESPONSES if export_raw_responses is True
-        original_export_setting = Settings.EXPORT_RAW_GEMINI_RESPONSES
-        if export_raw_responses:
-            Settings.EXPORT_RAW_GEMINI_RESPONSES = True
+        owns_context = context is None
+        if owns_context:
+            context = JobContext(
+                output_dir=output_dir or os.path.dirname(pdf_path),
+                export_raw_responses=export_raw_responses or Settings.EXPORT_RAW_GEMINI_RESPONSES
+            )
+        journal = context.journal
+        deadline = context.deadline
+
+        chunks = []
+        personal_info = None
+        reconciliation = None
+        summary = None
         
         try:
-            # Split the PDF into sub-PDFs
-            smaller_pdfs = self.split_pdf_into_subpdfs(pdf_path, chunk_count, temp_dir)
-            
-            # Process each sub-PDF
-            all_transactions = []
-            first_chunk_path = smaller_pdfs[0] if smaller_pdfs else None
-            
-            logger.info("Starting processing of sub-PDFs...")
-            for i, subpdf_path in enumerate(smaller_pdfs, start=1):
-                # Upload chunk to Gemini
-                pdf_obj = self.upload_to_gemini(subpdf_path)
-                
-                # Wait for the file to be active
-                self.wait_for_files_active([pdf_obj])
-                
-                # Prepare export path for this chunk
-                export_path = None
-                if Settings.EXPORT_RAW_GEMINI_RESPONSES and output_dir:
-                    export_path = os.path.join(output_dir, f"raw_gemini_statement_parse_chunk_{i}.txt")
-                
-                # Process with GEMINI_STATEMENT_PARSE prompt
-                response_text = self.generate_content(
-                    GEMINI_STATEMENT_PARSE, 
-                    pdf_obj,
-                    export_path=export_path
-                )
-                
-                # Extract CSV and parse transactions
-                csv_content = self.extract_csv_from_response(response_text)
-                chunk_transactions = self.parse_csv_to_transactions(csv_content)
+            # Split the PDF into sub-PDFs, remembering which pages each one holds
+            smaller_pdfs = self.split_pdf_with_page_ranges(pdf_path, chunk_count, context.scratch_dir)
+            first_chunk_path = smaller_pdfs[0][0] if smaller_pdfs else None
+
+            # Stages still to run; whatever is left when the deadline expires is reported
+            pending = [f"chunk:{i}" for i in range(1, len(smaller_pdfs) + 1)]
+            pending += ["personal_info", "reconciliation", "summary"]
+            context.emit("split", "completed", chunks=len(smaller_pdfs), stages=list(pending))
+
+            try:
+                logger.info("Starting processing of sub-PDFs...")
+                for i, (subpdf_path, first_page, last_page) in enumerate(smaller_pdfs, start=1):
+                    # Chunks categorized before a restart are taken from the journal
+                    if journal and journal.has("categorize", i):
+                        logger.info(f"Chunk {i} already processed, using journaled transactions")
+                        chunk_transactions = journal.get("categorize", i)
+                    else:
+                        context.emit(f"chunk:{i}", "started", pages=[first_page, last_page])
+                        with span("chunk", index=i, pages=[first_page, last_page]):
+                            chunk_transactions = run_within(
+                                deadline, f"chunk {i}",
+                                self.process_chunk, subpdf_path, i, first_page, last_page, context
+                            )
+                    chunks.append({"pages": (first_page, last_page), "transactions": chunk_transactions})
+                    pending.remove(f"chunk:{i}")
+                    context.emit(f"chunk:{i}", "completed", pages=[first_page, last_page], transactions=chunk_transactions)
                 
-                # Categorize transactions for this chunk immediately
-                if chunk_transactions:
-                    logger.info(f"Categorizing transactions for chunk {i}...")
-                    # Create a CSV from chunk transactions without categories
-                    csv_content = io.StringIO()
-                    writer = csv.DictWriter(csv_content, fieldnames=CSV_HEADERS_WITHOUT_CATEGORY)
-                    writer.writeheader()
-                    for transaction in chunk_transactions:
-                        # Create a copy without the Category field
-                        transaction_without_category = {k: v for k, v in transaction.items() if k != 'Category'}
-                        writer.writerow(transaction_without_category)
-                    
-                    # Prepare export path for categorization of this chunk
-                    categorization_export_path = None
-                    if Settings.EXPORT_RAW_GEMINI_RESPONSES and output_dir:
-                        categorization_export_path = os.path.join(output_dir, f"raw_gemini_categorization_chunk_{i}.txt")
+                # Process personal information from the first chunk
+                if journal and journal.has("personal_info"):
+                    logger.info("Personal information already extracted, using journaled result")
+                    personal_info = journal.get("personal_info")
+                elif first_chunk_path:
+                    logger.info("Processing first chunk for personal information...")
+                    context.emit("personal_info", "started")
                     
-                    # Categorize transactions for this chunk
-                    categorized_csv = self.categorize_transactions(
-                        csv_content.getvalue(),
-                        export_path=categorization_export_path
+                    # Process with GEMINI_PERSONAL_INFO_PARSE prompt
+                    personal_info = run_within(
+                        deadline, "personal information extraction",
+                        self.extract_personal_info,
+                        pdf_path=first_chunk_path,
+                        prompt_template=GEMINI_PERSONAL_INFO_PARSE,
+                        export_path=context.export_path("raw_gemini_personal_info.txt")
                     )
-                    
-                    # Parse categorized CSV back to transactions
-                    categorized_chunk_transactions = self.parse_csv_to_transactions(categorized_csv)
-                    logger.info(f"Successfully categorized {len(categorized_chunk_transactions)} transactions for chunk {i}")
-                    
-                    # Add categorized transactions to the main list
-                    all_transactions.extend(categorized_chunk_transactions)
-                else:
-                    logger.info(f"No transactions found in chunk {i}, skipping categorization")
-            
-            # Process personal information from the first chunk
-            personal_info = None
-            if first_chunk_path:
-                logger.info("Processing first chunk for personal information...")
-                
-                # Upload the first chunk again
-                first_chunk_obj = self.upload_to_gemini(first_chunk_path)
-                
-                # Wait for it to be active
-                self.wait_for_files_active([first_chunk_obj])
-                
-                # Prepare export path for personal info
-                personal_info_export_path = None
-                if Settings.EXPORT_RAW_GEMINI_RESPONSES and output_dir:
-                    personal_info_export_path = os.path.join(output_dir, "raw_gemini_personal_info.txt")
-                
-                # Process with GEMINI_PERSONAL_INFO_PARSE prompt
-                personal_info_response = self.generate_content(
-                    GEMINI_PERSONAL_INFO_PARSE, 
-                    first_chunk_obj,
-                    export_path=personal_info_export_path
-                )
-                personal_info = personal_info_response.strip()
-            
-            # Generate transaction summary
-            summary = None
-            if all_transactions:
-                # Create a CSV from all transactions
-                csv_content = io.StringIO()
-                writer = csv.DictWriter(csv_content, fieldnames=CSV_HEADERS)
-                writer.writeheader()
-                writer.writerows(all_transactions)
-                
-                # Add personal info to the top
-                if personal_info:
-                    csv_with_personal_info = f"# Personal Information: {personal_info}\n{csv_content.getvalue()}"
-                else:
-                    csv_with_personal_info = csv_content.getvalue()
-                
-                # Prepare export path for summary
-                summary_export_path = None
-                if Settings.EXPORT_RAW_GEMINI_RESPONSES and output_dir:
-                    summary_export_path = os.path.join(output_dir, "raw_gemini_summary.txt")
-                
-                # Generate summary
-                summary_response = self.generate_content(
-                    GEMINI_TRANSACTION_SUMMARY, 
-                    csv_with_personal_info,
-                    export_path=summary_export_path
-                )
+                    if journal:
+                        journal.record("personal_info", personal_info)
+                context.personal_info = personal_info
+                pending.remove("personal_info")
+                context.emit("personal_info", "completed", personal_info=personal_info)
+
+                # Check the running balance and re-extract only the pages that break it
+                if journal and journal.has("reconciliation"):
+                    logger.info("Reconciliation already completed, using journaled result")
+                    reconciled = journal.get("reconciliation")
+                    chunks, reconciliation = reconciled["chunks"], reconciled["report"]
+                elif Settings.RECONCILIATION_ENABLED and chunks:
+                    context.emit("reconciliation", "started")
+                    # Reconciled on a copy, so a re-extraction abandoned at the deadline
+                    # cannot change the chunks that are returned
+                    reconciled_chunks = copy.deepcopy(chunks)
+                    with span("reconciliation"):
+                        report = run_within(
+                            deadline, "reconciliation",
+                            self.reconcile_chunks, reconciled_chunks, personal_info, pdf_path, context
+                        )
+                    chunks, reconciliation = reconciled_chunks, report.to_dict()
+                    if journal:
+                        journal.record("reconciliation", {"chunks": chunks, "report": reconciliation})
+                pending.remove("reconciliation")
+                all_transactions, _ = self._flatten_chunks(chunks)
+                context.transactions = all_transactions
+                context.emit("reconciliation", "completed", report=reconciliation, transactions=all_transactions)
                 
-                try:
-                    # Try to parse as JSON
-                    summary = json.loads(summary_response)
-                except json.JSONDecodeError:
-                    # If not valid JSON, use the raw text
-                    summary = {"raw_summary": summary_response}
+                # Generate transaction summary
+                if journal and journal.has("summary"):
+                    logger.info("Summary already generated, using journaled result")
+                    summary = journal.get("summary")
+                elif all_transactions:
+                    context.emit("summary", "started")
+                    summary = run_within(
+                        deadline, "summary generation",
+                        self.generate_transaction_summary,
+                        all_transactions,
+                        prompt_template=GEMINI_TRANSACTION_SUMMARY,
+                        personal_info=personal_info,
+                        export_path=context.export_path("raw_gemini_summary.txt")
+                    )
+                    if journal:
+                        journal.record("summary", summary)
+                pending.remove("summary")
+                context.emit("summary", "completed", summary=summary)
+            except DeadlineExceededError as e:
+                logger.warning(f"{str(e)}; returning partial results, incomplete: {pending}")
+                context.incomplete = pending
+                context.emit("deadline", "expired", incomplete=list(pending))
             
+            all_transactions, _ = self._flatten_chunks(chunks)
             return {
                 "transactions": all_transactions,
                 "personal_info": personal_info,
-                "summary": summary
+                "summary": summary,
+                "reconciliation": reconciliation,
+                "complete": not context.incomplete,
+                "incomplete": list(context.incomplete)
             }
         finally:
-            # Restore original export setting
-            Settings.EXPORT_RAW_GEMINI_RESPONSES = original_export_setting
-            
-            # Clean up temporary directory
-            shutil.rmtree(temp_dir, ignore_errors=True)
-            logger.info(f"Removed temporary directory: {temp_dir}") 
\ No newline at end of file
+            # Release the scratch space of a context created for this call
+            if owns_context:
+                context.close()
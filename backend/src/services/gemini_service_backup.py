@@ -10,11 +10,11 @@ import tempfile
 import shutil
 from pathlib import Path
 from typing import Dict, Any, List, Optional, Union, Tuple
-from google import genai
 from google.genai import types
 from PyPDF2 import PdfReader, PdfWriter
 
 from backend.src.config.settings import Settings
+from backend.src.services.client_registry import get_gemini_client
 from backend.src.utils.exceptions import APIError
 from backend.src.core.prompts import (
     GEMINI_STATEMENT_PARSE,
@@ -58,7 +58,7 @@ class GeminiService:
         logger.debug(f"Using GEMINI_API_KEY: {api_key[:4]}{'*' * (len(api_key) - 8)}{api_key[-4:]}")
         
         try:
-            self.client = genai.Client(api_key=api_key)
+            self.client = get_gemini_client(api_key)
             logger.info("Gemini client initialized successfully.")
         except Exception as e:
             logger.exception(f"Failed to initialize Gemini client: {str(e)}")
@@ -10,7 +10,11 @@ import tempfile
 import shutil
 from typing import Dict, Any, Optional
 
+from backend.src.config.settings import Settings
+from backend.src.core.schemas import DrivingLicenceData, PassportData
+from backend.src.services.credential_pool import with_job_credential
 from backend.src.services.gemini_service import GeminiService
+from backend.src.utils.exceptions import DataProcessingError
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -85,6 +89,7 @@ class IdentityDocumentGeminiService(GeminiService):
         """Initialize the identity document service."""
         super().__init__()
         
+    @with_job_credential
     def process_document(self, pdf_path: str, document_type: str = "driving_license", chunk_count: int = 1) -> dict:
         """
         Process an identity document with Gemini.
@@ -104,6 +109,7 @@ class IdentityDocumentGeminiService(GeminiService):
         # Create a temporary directory for storing sub-PDFs
         temp_dir = tempfile.mkdtemp()
         logger.info(f"Created temporary directory: {temp_dir}")
+        pdf_obj = None
         
         try:
             # For identity documents, we typically don't need to split the PDF
@@ -123,14 +129,37 @@ class IdentityDocumentGeminiService(GeminiService):
             # Wait for the file to be active
             self.wait_for_files_active([pdf_obj])
             
-            # Select the appropriate prompt based on document type
+            # Select the appropriate prompt and schema based on document type
             if document_type == "driving_license":
                 prompt = GEMINI_DRIVING_LICENSE_PARSE
+                schema = DrivingLicenceData
             else:  # passport
                 prompt = GEMINI_PASSPORT_PARSE
+                schema = PassportData
+            
+            # Decode straight into the document schema when structured output is enabled
+            if Settings.GEMINI_STRUCTURED_OUTPUT:
+                try:
+                    document_data, _ = self.generate_structured(
+                        prompt,
+                        pdf_obj,
+                        schema,
+                        max_output_tokens=4000,
+                        model=self.model_for(document_type)
+                    )
+                    return {
+                        "document_type": document_type,
+                        "document_data": document_data.to_dict()
+                    }
+                except DataProcessingError as e:
+                    logger.error(f"Failed to decode structured response from Gemini: {e}")
+                    return {
+                        "document_type": document_type,
+                        "error": "Failed to parse response"
+                    }
             
             # Process with the selected prompt
-            response_text = self.generate_content(prompt, pdf_obj)
+            response_text = self.generate_content(prompt, pdf_obj, model=self.model_for(document_type))
             
             # Parse the JSON response
             try:
@@ -148,7 +177,8 @@ class IdentityDocumentGeminiService(GeminiService):
                 }
             
         finally:
-            # Clean up: remove all sub-PDFs in the temp directory
+            # Clean up: remove all sub-PDFs in the temp directory and the upload
+            self.release_uploads(pdf_obj)
             shutil.rmtree(temp_dir, ignore_errors=True)
             logger.info(f"Removed temporary directory: {temp_dir}")
     
@@ -5,10 +5,16 @@ import json
 import time
 import logging
 from typing import Dict, Any, Optional, List, Tuple, Union
-import openai
 
 from backend.src.config.settings import Settings
-from backend.src.utils.exceptions import AssistantError
+from backend.src.core.deadlines import remaining_time
+from backend.src.utils.exceptions import AssistantError, DeadlineExceededError
+from backend.src.services.client_registry import get_openai_client
+from backend.src.services.credential_pool import is_rate_limited
+from backend.src.utils.metrics import PROVIDER_CALLS, RATE_LIMITED, STAGE_SECONDS
+from backend.src.utils.remote_files import get_remote_file_manager
+from backend.src.utils.tracing import current_trace, span
+from backend.src.utils.usage import record_usage
 
 logger = logging.getLogger(__name__)
 
@@ -17,9 +23,18 @@ class OpenAIAssistantService:
     
     def __init__(self):
         """Initialize the OpenAI client with API key from settings."""
-        self.client = openai.OpenAI(api_key=Settings.OPENAI_API_KEY)
+        # Shared client, reusing the process-wide connection pool
+        self.client = get_openai_client(Settings.OPENAI_API_KEY)
         self.timeout = Settings.REQUEST_TIMEOUT
         
+    def _cancel_run(self, thread_id: str, run_id: str) -> None:
+        """Cancel an assistant run, ignoring runs that have already finished."""
+        try:
+            self.client.beta.threads.runs.cancel(thread_id=thread_id, run_id=run_id)
+            logger.info(f"Cancelled run {run_id}")
+        except Exception as e:
+            logger.warning(f"Could not cancel run {run_id}: {str(e)}")
+
     def send_file_to_assistant(
         self,
         file_bytes: bytes,
@@ -45,15 +60,21 @@ class OpenAIAssistantService:
         """
         if not assistant_id:
             assistant_id = Settings.ASSISTANT_ID
+        file_id = None
             
         try:
             # Upload the file to OpenAI
-            file_obj = self.client.files.create(
-                file=file_bytes,
-                purpose="assistants"
-            )
+            with STAGE_SECONDS.time(provider="openai", stage="upload"), span("upload"):
+                file_obj = self.client.files.create(
+                    file=file_bytes,
+                    purpose="assistants"
+                )
             file_id = file_obj.id
             logger.info(f"Uploaded file {file_name} with ID: {file_id}")
+            get_remote_file_manager().track(
+                "openai", self.client, file_id,
+                size_bytes=len(file_bytes) if isinstance(file_bytes, bytes) else 0
+            )
             
             # Create a thread
             thread = self.client.beta.threads.create()
@@ -79,6 +100,7 @@ class OpenAIAssistantService:
             
             # Wait for the run to complete
             start_time = time.time()
+            run_started = time.perf_counter()
             while True:
                 run = self.client.beta.threads.runs.retrieve(
                     thread_id=thread_id,
@@ -87,6 +109,12 @@ class OpenAIAssistantService:
                 
                 if run.status == "completed":
                     logger.info(f"Run completed in {time.time() - start_time:.2f} seconds")
+                    STAGE_SECONDS.observe(time.time() - start_time, provider="openai", stage="generate")
+                    trace = current_trace()
+                    if trace is not None:
+                        trace.add("generate", run_started, time.perf_counter(), model=assistant_id)
+                    PROVIDER_CALLS.inc(provider="openai", model=assistant_id, outcome="ok")
+                    record_usage("openai", getattr(run, "model", None) or assistant_id, run)
                     break
                     
                 if run.status in ["failed", "cancelled", "expired"]:
@@ -94,14 +122,21 @@ class OpenAIAssistantService:
                     if hasattr(run, "last_error") and run.last_error:
                         error_message += f", Error: {run.last_error}"
                     logger.error(error_message)
+                    PROVIDER_CALLS.inc(provider="openai", model=assistant_id, outcome="error")
                     raise AssistantError(error_message)
                     
                 if time.time() - start_time > self.timeout:
                     logger.error(f"Run timed out after {self.timeout} seconds")
                     raise AssistantError(f"Run timed out after {self.timeout} seconds")
+
+                if remaining_time() == 0.0:
+                    # The job's deadline has passed: stop the run rather than leave it going
+                    self._cancel_run(thread_id, run_id)
+                    raise DeadlineExceededError("Job deadline expired while waiting for the assistant run")
                     
                 logger.info(f"Run status: {run.status}, waiting...")
-                time.sleep(1)
+                with span("poll_sleep", run=run_id):
+                    time.sleep(1)
                 
             # Get the messages
             messages = self.client.beta.threads.messages.list(
@@ -138,15 +173,20 @@ class OpenAIAssistantService:
                     json.dump(response_json, f, indent=2)
                 logger.info(f"Saved response to: {output_path}")
                 
-            # Clean up
-            self.client.files.delete(file_id=file_id)
-            logger.info(f"Deleted file with ID: {file_id}")
-            
             return response_json
             
+        except DeadlineExceededError:
+            raise
         except Exception as e:
+            if is_rate_limited(e):
+                RATE_LIMITED.inc(provider="openai")
+                PROVIDER_CALLS.inc(provider="openai", model=assistant_id, outcome="rate_limited")
             logger.error(f"Error in send_file_to_assistant: {str(e)}")
             raise AssistantError(f"Error in send_file_to_assistant: {str(e)}")
+        finally:
+            # Deleted by the background sweeper instead of on the critical path
+            if file_id:
+                get_remote_file_manager().release("openai", file_id)
             
     def send_message_to_assistant(
         self,
@@ -190,6 +230,7 @@ class OpenAIAssistantService:
             
             # Wait for the run to complete
             start_time = time.time()
+            run_started = time.perf_counter()
             while True:
                 run = self.client.beta.threads.runs.retrieve(
                     thread_id=thread_id,
@@ -198,6 +239,12 @@ class OpenAIAssistantService:
                 
                 if run.status == "completed":
                     logger.info(f"Run completed in {time.time() - start_time:.2f} seconds")
+                    STAGE_SECONDS.observe(time.time() - start_time, provider="openai", stage="generate")
+                    trace = current_trace()
+                    if trace is not None:
+                        trace.add("generate", run_started, time.perf_counter(), model=assistant_id)
+                    PROVIDER_CALLS.inc(provider="openai", model=assistant_id, outcome="ok")
+                    record_usage("openai", getattr(run, "model", None) or assistant_id, run)
                     break
                     
                 if run.status in ["failed", "cancelled", "expired"]:
@@ -205,14 +252,21 @@ class OpenAIAssistantService:
                     if hasattr(run, "last_error") and run.last_error:
                         error_message += f", Error: {run.last_error}"
                     logger.error(error_message)
+                    PROVIDER_CALLS.inc(provider="openai", model=assistant_id, outcome="error")
                     raise AssistantError(error_message)
                     
                 if time.time() - start_time > self.timeout:
                     logger.error(f"Run timed out after {self.timeout} seconds")
                     raise AssistantError(f"Run timed out after {self.timeout} seconds")
+
+                if remaining_time() == 0.0:
+                    # The job's deadline has passed: stop the run rather than leave it going
+                    self._cancel_run(thread_id, run_id)
+                    raise DeadlineExceededError("Job deadline expired while waiting for the assistant run")
                     
                 logger.info(f"Run status: {run.status}, waiting...")
-                time.sleep(1)
+                with span("poll_sleep", run=run_id):
+                    time.sleep(1)
                 
             # Get the messages
             messages = self.client.beta.threads.messages.list(
@@ -241,6 +295,11 @@ class OpenAIAssistantService:
                 
             return response_json
             
+        except DeadlineExceededError:
+            raise
         except Exception as e:
+            if is_rate_limited(e):
+                RATE_LIMITED.inc(provider="openai")
+                PROVIDER_CALLS.inc(provider="openai", model=assistant_id, outcome="rate_limited")
             logger.error(f"Error in send_message_to_assistant: {str(e)}")
             raise AssistantError(f"Error in send_message_to_assistant: {str(e)}") 
\ No newline at end of file
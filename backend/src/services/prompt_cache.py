@@ -0,0 +1,172 @@
+"""
+Process-wide cache of Gemini cached-content handles for long static prompts.
+
+The statement prompts are identical on every call, so instead of resending them as the
+first content part each time they are registered once as cached content (a system
+instruction) and each request only references the cache handle. Handles are refreshed
+before their TTL runs out. When caching is unavailable (disabled, prompt below the
+model's minimum cacheable size, or the API rejects it) callers fall back to sending the
+prompt as a plain system instruction; after a transient API error (429, 5xx, timeout)
+registration is retried with a backoff.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+try:
+    from backend.src.config.settings import Settings
+    from backend.src.utils.lazy_import import lazy_import
+except ImportError:
+    from src.config.settings import Settings
+    from src.utils.lazy_import import lazy_import
+
+types = lazy_import("google.genai.types")
+
+logger = logging.getLogger(__name__)
+
+
+class PromptCache:
+    """Registers prompts as cached content and hands out their cache names."""
+
+    # Refresh a handle once less than this fraction of its TTL remains
+    REFRESH_FRACTION = 0.2
+    # Wait after a failed registration before trying again, doubled per failure in a row
+    RETRY_BACKOFF_SECONDS = 30.0
+    MAX_RETRY_BACKOFF_SECONDS = 900.0
+
+    def __init__(self, client, ttl_seconds: int = None, enabled: bool = None):
+        """
+        Initialize the prompt cache.
+
+        Args:
+            client: The genai.Client used to create and refresh cached content
+            ttl_seconds: Lifetime of each cached content entry
+            enabled: Whether to use server-side caching at all
+        """
+        self.client = client
+        self.ttl_seconds = ttl_seconds or Settings.GEMINI_PROMPT_CACHE_TTL_SECONDS
+        self.enabled = Settings.GEMINI_PROMPT_CACHE_ENABLED if enabled is None else enabled
+        self._entries: Dict[Tuple[str, str], Tuple[str, float]] = {}
+        # Prompts the API will never cache (below the minimum size, model unsupported)
+        self._unavailable = set()
+        # Prompts whose registration failed transiently: (failures in a row, retry time)
+        self._backoff: Dict[Tuple[str, str], Tuple[int, float]] = {}
+        # Prompts being created or refreshed by some thread
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(model: str, prompt: str) -> Tuple[str, str]:
+        return model, hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+    def get(self, model: str, prompt: str) -> Optional[str]:
+        """
+        Return the cached content name for `prompt` on `model`, creating or refreshing
+        it as needed. Returns None when the prompt must be sent inline instead.
+
+        The API calls are made outside the lock by one thread per prompt; meanwhile
+        other callers use the current handle while it lasts, or send the prompt inline.
+        """
+        if not self.enabled:
+            return None
+
+        key = self._key(model, prompt)
+        now = time.time()
+        with self._lock:
+            if key in self._unavailable:
+                return None
+            entry = self._entries.get(key)
+            if entry and entry[1] - now > self.ttl_seconds * self.REFRESH_FRACTION:
+                return entry[0]
+            live_name = entry[0] if entry and entry[1] > now else None
+            if key in self._pending:
+                return live_name
+            if live_name is None and now < self._backoff.get(key, (0, 0.0))[1]:
+                return None
+            self._pending.add(key)
+
+        try:
+            if live_name is not None and self._refresh(key, live_name):
+                return live_name
+            return self._create(key, model, prompt)
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+    def invalidate(self, model: str, prompt: str) -> None:
+        """Forget the handle for `prompt`, e.g. after the API reports it expired."""
+        with self._lock:
+            self._entries.pop(self._key(model, prompt), None)
+
+    @staticmethod
+    def _is_permanent(error: Exception) -> bool:
+        # 400 (prompt below the minimum cacheable size), 403 and 404 (caching not
+        # available for the model or project) will not change on retry; 429, 5xx and
+        # timeouts will
+        return getattr(error, "code", None) in (400, 403, 404)
+
+    def _create(self, key: Tuple[str, str], model: str, prompt: str) -> Optional[str]:
+        try:
+            cached = self.client.caches.create(
+                model=model,
+                config=types.CreateCachedContentConfig(
+                    display_name=f"prompt-{key[1][:16]}",
+                    system_instruction=prompt,
+                    ttl=f"{self.ttl_seconds}s",
+                ),
+            )
+        except Exception as e:
+            with self._lock:
+                if self._is_permanent(e):
+                    logger.info(f"Prompt caching unavailable for {model}, sending prompt inline: {str(e)}")
+                    self._unavailable.add(key)
+                    return None
+                failures = self._backoff.get(key, (0, 0.0))[0] + 1
+                delay = min(self.RETRY_BACKOFF_SECONDS * 2 ** (failures - 1), self.MAX_RETRY_BACKOFF_SECONDS)
+                self._backoff[key] = (failures, time.time() + delay)
+            logger.warning(f"Failed to cache prompt for {model}, sending it inline and retrying in {delay:.0f}s: {str(e)}")
+            return None
+
+        with self._lock:
+            self._entries[key] = (cached.name, time.time() + self.ttl_seconds)
+            self._backoff.pop(key, None)
+        logger.info(f"Registered cached prompt {cached.name} for {model}")
+        return cached.name
+
+    def _refresh(self, key: Tuple[str, str], name: str) -> bool:
+        try:
+            self.client.caches.update(
+                name=name,
+                config=types.UpdateCachedContentConfig(ttl=f"{self.ttl_seconds}s"),
+            )
+        except Exception as e:
+            logger.warning(f"Failed to refresh cached prompt {name}: {str(e)}")
+            with self._lock:
+                self._entries.pop(key, None)
+            return False
+
+        with self._lock:
+            self._entries[key] = (name, time.time() + self.ttl_seconds)
+        logger.debug(f"Refreshed cached prompt {name}")
+        return True
+
+
+_caches: Dict[str, PromptCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_prompt_cache(api_key: str, client) -> PromptCache:
+    """
+    Return the process-wide PromptCache for `api_key`, creating it on first use.
+    Cached content belongs to the API project, so one cache per key is shared by
+    every service instance.
+    """
+    with _caches_lock:
+        cache = _caches.get(api_key)
+        if cache is None:
+            cache = PromptCache(client)
+            _caches[api_key] = cache
+        return cache
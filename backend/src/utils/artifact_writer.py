@@ -0,0 +1,215 @@
+"""
+Background writer for job artifacts.
+
+Raw model responses, transaction CSVs and result JSON are debugging artifacts, so they
+are written off the request's critical path: callers enqueue the data and a single
+background thread writes it. Artifacts of a job whose archive is open are streamed
+into one compressed archive (`artifacts.zip`) in the job's output directory, with an
+`artifacts_index.json` listing every entry once the job is closed. Anything else is
+written as a plain file. The queue is bounded, so when the disk falls behind producers
+block instead of buffering without limit.
+"""
+
+import atexit
+import csv
+import hashlib
+import io
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import zipfile
+from typing import Any, Dict, List, Optional
+
+from backend.src.config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FILENAME = "artifacts.zip"
+INDEX_FILENAME = "artifacts_index.json"
+
+
+class JobArtifacts:
+    """The artifact archive of one job."""
+
+    def __init__(self, writer: "ArtifactWriter", output_dir: str, job_id: str, append: bool = False):
+        self.writer = writer
+        self.output_dir = os.path.abspath(output_dir)
+        self.job_id = job_id
+        self.archive_path = os.path.join(self.output_dir, ARCHIVE_FILENAME)
+        self.entries: List[Dict[str, Any]] = []
+        self.closed = threading.Event()
+        self._closing = False
+
+        # The archive is opened here so that it exists before the job's directory can go away
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._zip = None
+        if append and os.path.exists(self.archive_path):
+            try:
+                self._zip = zipfile.ZipFile(self.archive_path, "a", compression=zipfile.ZIP_DEFLATED)
+            except zipfile.BadZipFile:
+                # Left incomplete by a process that died; start a new one
+                logger.warning(f"Artifact archive {self.archive_path} is incomplete, replacing it")
+        if self._zip is None:
+            self._zip = zipfile.ZipFile(self.archive_path, "w", compression=zipfile.ZIP_DEFLATED)
+
+    def add(self, name: str, data: Any) -> None:
+        """Queue `data` (text or bytes) to be stored as `name` in the archive."""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self.writer.submit(("entry", self, name, data))
+
+    def close(self, wait: bool = False, timeout: float = None) -> None:
+        """
+        Queue the archive to be finalized and its index written.
+
+        Args:
+            wait: Block until everything queued for this job is on disk
+            timeout: Longest time to wait, in seconds
+        """
+        if not self._closing:
+            self._closing = True
+            # Later writes to the output directory go to plain files
+            self.writer._release(self)
+            self.writer.submit(("close", self, None, None))
+        if wait:
+            self.closed.wait(timeout)
+
+    def _write_entry(self, name: str, data: bytes) -> None:
+        info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        self._zip.writestr(info, data)
+        self.entries.append({
+            "name": name,
+            "size": len(data),
+            "compressed_size": self._zip.getinfo(name).compress_size,
+            "sha256": hashlib.sha256(data).hexdigest(),
+        })
+
+    def _finalize(self) -> None:
+        self._zip.close()
+        if os.path.isdir(self.output_dir):
+            index = {"job_id": self.job_id, "archive": ARCHIVE_FILENAME, "entries": self.entries}
+            with open(os.path.join(self.output_dir, INDEX_FILENAME), "w", encoding="utf-8") as f:
+                json.dump(index, f)
+        self.closed.set()
+
+
+class ArtifactWriter:
+    """Single background thread writing queued artifacts."""
+
+    def __init__(self, max_pending: int = None):
+        """
+        Initialize the writer.
+
+        Args:
+            max_pending: Number of queued writes after which producers block
+        """
+        self._queue = queue.Queue(maxsize=max_pending or Settings.ARTIFACT_QUEUE_SIZE)
+        self._archives: Dict[str, JobArtifacts] = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="artifact-writer", daemon=True)
+        self._thread.start()
+
+    def open_job(self, output_dir: str, job_id: str, append: bool = False) -> JobArtifacts:
+        """
+        Open the artifact archive of a job. Until it is closed, writes to paths in
+        `output_dir` are stored in the archive.
+
+        Args:
+            output_dir: The job's output directory
+            job_id: Identifier recorded in the index
+            append: Add to an existing archive (when resuming a job)
+        """
+        archive = JobArtifacts(self, output_dir, job_id, append=append)
+        with self._lock:
+            self._archives[archive.output_dir] = archive
+        return archive
+
+    def _release(self, archive: JobArtifacts) -> None:
+        with self._lock:
+            if self._archives.get(archive.output_dir) is archive:
+                del self._archives[archive.output_dir]
+
+    def write(self, path: str, data: Any) -> None:
+        """
+        Queue `data` (text or bytes) for `path`. Paths inside the output directory of an
+        open job archive are stored in the archive; others are written as plain files.
+        """
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        directory = os.path.dirname(os.path.abspath(path))
+        with self._lock:
+            archive = self._archives.get(directory)
+        if archive is not None:
+            archive.add(os.path.basename(path), data)
+        else:
+            self.submit(("file", None, path, data))
+
+    def write_json(self, path: str, obj: Any) -> None:
+        """Queue `obj` to be written to `path` as compact JSON."""
+        self.write(path, json.dumps(obj, separators=(",", ":")))
+
+    def write_csv(self, path: str, rows: List[Dict[str, Any]], fieldnames: List[str], preamble: str = None) -> None:
+        """
+        Queue transaction rows to be written to `path` as CSV.
+
+        Args:
+            path: Destination path
+            rows: Row dictionaries (keys not in fieldnames are ignored)
+            fieldnames: CSV columns
+            preamble: Optional line written before the header (e.g. "# Personal Information: ...")
+        """
+        content = io.StringIO()
+        if preamble:
+            content.write(f"{preamble}\n")
+        writer = csv.DictWriter(content, fieldnames=fieldnames, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+        self.write(path, content.getvalue())
+
+    def submit(self, operation: tuple) -> None:
+        """Queue an operation, blocking while the queue is full."""
+        if self._queue.full():
+            logger.debug("Artifact queue full, waiting for the writer to catch up")
+        self._queue.put(operation)
+
+    def flush(self) -> None:
+        """Block until every queued write has completed."""
+        self._queue.join()
+
+    def _run(self) -> None:
+        while True:
+            kind, archive, name, data = self._queue.get()
+            try:
+                if kind == "entry":
+                    archive._write_entry(name, data)
+                elif kind == "close":
+                    archive._finalize()
+                else:
+                    os.makedirs(os.path.dirname(os.path.abspath(name)), exist_ok=True)
+                    with open(name, "wb") as f:
+                        f.write(data or b"")
+            except Exception as e:
+                logger.warning(f"Failed to write artifact {name or (archive and archive.archive_path)}: {str(e)}")
+                if kind == "close":
+                    archive.closed.set()
+            finally:
+                self._queue.task_done()
+
+
+_writer: Optional[ArtifactWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_artifact_writer() -> ArtifactWriter:
+    """Return the process-wide ArtifactWriter, starting it on first use."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = ArtifactWriter()
+            # Don't lose queued artifacts when a CLI run exits
+            atexit.register(_writer.flush)
+        return _writer
@@ -28,6 +28,38 @@ class DataProcessingError(BackendError):
     """Exception raised for errors during data processing."""
     pass
 
+class SchemaDecodeError(DataProcessingError):
+    """Exception raised when a structured model response does not match its schema."""
+
+    def __init__(self, message: str, response_text: str = ""):
+        super().__init__(message)
+        # The model's raw response, for callers that can still use the text
+        self.response_text = response_text
+
 class ValidationError(BackendError):
     """Exception raised for validation errors."""
-    pass 
\ No newline at end of file
+    pass
+
+class DeadlineExceededError(BackendError):
+    """Exception raised when a job's deadline expires before a stage completes."""
+    pass
+
+class JobRejectedError(BackendError):
+    """Exception raised when a job is not admitted because the service is at capacity."""
+
+    def __init__(self, message: str, retry_after: int = None):
+        super().__init__(message)
+        # Suggested delay before resubmitting, in seconds
+        self.retry_after = retry_after
+
+class UploadRejectedError(ValidationError):
+    """Exception raised when an upload is too large or is not a PDF."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        # HTTP status the upload is rejected with
+        self.status_code = status_code
+
+class IdempotencyConflictError(ValidationError):
+    """Exception raised when an idempotency key is reused for a different document."""
+    pass
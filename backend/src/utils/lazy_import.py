@@ -0,0 +1,46 @@
+"""
+Deferred imports for heavy optional dependencies.
+
+Provider SDKs (google-genai, openai) and PDF/image libraries take a large share of
+interpreter start-up, and most entry points only ever use one of them. Modules bind
+them with `lazy_import` instead of a top-level import; the real module is imported
+the first time one of its attributes is accessed.
+"""
+
+import importlib
+import threading
+from types import ModuleType
+from typing import Optional
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access."""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module: Optional[ModuleType] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """
+    Return a stand-in for module `name` that imports it on first use.
+
+    Args:
+        name: Dotted module name, e.g. "google.genai.types"
+    """
+    return LazyModule(name)
@@ -0,0 +1,295 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+Processing time used to be visible only in log lines such as "Run completed in X
+seconds". The pipeline now records its metrics here and GET /metrics renders them
+for a Prometheus scraper, without a metrics server or client library:
+
+* STAGE_SECONDS: latency histograms of the pipeline stages (split, upload, the wait
+  for uploads to become ACTIVE, generate, parse, categorize, personal_info, summary,
+  rasterize and whole jobs), labelled with the provider.
+* Counters of provider calls, retries, rate-limited (429) calls, prompt cache
+  lookups, tokens and their cost (utils/usage.py) and jobs.
+* Gauges of queue depths and chunks in flight. Gauges owned by other objects (queues,
+  the call scheduler) are read through a callback when rendered.
+
+Metrics are per process; the worker answers a "metrics" request with its own.
+"""
+
+import math
+import threading
+import time
+from contextlib import ContextDecorator
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Histogram buckets in seconds, from a quick local stage to a multi-minute job
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    """A metric family: one value (or histogram) per combination of label values."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), registry: "Registry" = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        unknown = set(labels) - set(self.labelnames)
+        if unknown:
+            raise ValueError(f"Unknown label(s) {sorted(unknown)} for metric {self.name}")
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...], extra: Dict[str, str] = None) -> str:
+        pairs = [(name, value) for name, value in zip(self.labelnames, key) if value != ""]
+        pairs += list((extra or {}).items())
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{self._labels(key)} {_format_value(value)}" for key, value in sorted(self._values.items())]
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        return "\n".join(lines + self._samples())
+
+
+class Counter(_Metric):
+    """A count that only goes up."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class _InProgress(ContextDecorator):
+    def __init__(self, gauge: "Gauge", labels: Dict[str, object]):
+        self.gauge = gauge
+        self.labels = labels
+
+    def __enter__(self):
+        self.gauge.inc(**self.labels)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.gauge.dec(**self.labels)
+        return False
+
+
+class Gauge(_Metric):
+    """A value that goes up and down, set directly or read from a callback."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), registry: "Registry" = None):
+        super().__init__(name, documentation, labelnames, registry)
+        self._functions: Dict[Tuple[str, ...], Callable[[], float]] = {}
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        key = self._key(labels)
+        with self._lock:
+            function = self._functions.get(key)
+            if function is None:
+                return self._values.get(key, 0)
+        return function()
+
+    def set_function(self, function: Callable[[], float], **labels) -> None:
+        """Read the value from `function` whenever the metric is rendered."""
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = function
+
+    def track_inprogress(self, **labels) -> _InProgress:
+        """Context manager (or decorator) counting the blocks currently running."""
+        return _InProgress(self, labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+            functions = dict(self._functions)
+        for key, function in functions.items():
+            try:
+                values[key] = function()
+            except Exception:
+                # The owner of the value is gone or broken; leave the sample out
+                values.pop(key, None)
+        return [f"{self.name}{self._labels(key)} {_format_value(value)}" for key, value in sorted(values.items())]
+
+
+class _Timer(ContextDecorator):
+    def __init__(self, histogram: "Histogram", labels: Dict[str, object]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def _recreate_cm(self):
+        # Each decorated call times itself, so concurrent calls don't share a start time
+        return _Timer(self.histogram, self.labels)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class Histogram(_Metric):
+    """Observations counted in cumulative buckets, with their sum and count."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+        registry: "Registry" = None
+    ):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    def time(self, **labels) -> _Timer:
+        """Context manager (or decorator) observing the duration of a block in seconds."""
+        return _Timer(self, labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            counts, _ = self._values.get(self._key(labels), ([0] * len(self.buckets), 0.0))
+            return counts[-1]
+
+    def _samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, counts):
+                    lines.append(f"{self.name}_bucket{self._labels(key, {'le': _format_value(bound)})} {count}")
+                lines.append(f"{self.name}_sum{self._labels(key)} {_format_value(total)}")
+                lines.append(f"{self.name}_count{self._labels(key)} {counts[-1]}")
+        return lines
+
+
+class Registry:
+    """The metrics of the process, rendered together."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> None:
+        with self._lock:
+            if any(existing.name == metric.name for existing in self._metrics):
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics.append(metric)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics)
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+# Media type of Registry.render()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+STAGE_SECONDS = Histogram(
+    "statement_parser_stage_seconds",
+    "Duration of pipeline stages in seconds.",
+    ("provider", "stage")
+)
+PROVIDER_CALLS = Counter(
+    "statement_parser_provider_calls_total",
+    "Provider requests by model (assistant for OpenAI) and outcome (ok, error, rate_limited).",
+    ("provider", "model", "outcome")
+)
+PROVIDER_RETRIES = Counter(
+    "statement_parser_provider_retries_total",
+    "Provider requests repeated, by reason.",
+    ("provider", "reason")
+)
+RATE_LIMITED = Counter(
+    "statement_parser_rate_limited_total",
+    "Provider requests answered with 429.",
+    ("provider",)
+)
+PROMPT_CACHE_LOOKUPS = Counter(
+    "statement_parser_prompt_cache_lookups_total",
+    "Requests sent with a cached prompt (hit) or with the prompt inline (miss).",
+    ("result",)
+)
+TOKENS = Counter(
+    "statement_parser_tokens_total",
+    "Model tokens by stage and kind (prompt, output, cached); cached tokens are part of the prompt tokens.",
+    ("provider", "model", "stage", "kind")
+)
+COST_USD = Counter(
+    "statement_parser_cost_usd_total",
+    "Cost of model calls in USD at the prices of Settings.MODEL_PRICES.",
+    ("provider", "model", "stage")
+)
+JOBS = Counter(
+    "statement_parser_jobs_total",
+    "Statement jobs by provider and outcome (complete, partial, failed).",
+    ("provider", "outcome")
+)
+QUEUE_DEPTH = Gauge(
+    "statement_parser_queue_depth",
+    "Work waiting, by queue.",
+    ("queue",)
+)
+IN_FLIGHT = Gauge(
+    "statement_parser_in_flight",
+    "Work running, by kind (chunks, provider_calls).",
+    ("kind",)
+)
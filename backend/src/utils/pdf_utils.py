@@ -5,12 +5,16 @@ import logging
 import sys
 from pathlib import Path
 from typing import List, Tuple, Union
-from pdf2image import convert_from_path
-from PIL import Image
 from io import BytesIO
 
 # Import the settings so we can check our storage toggle
 from backend.src.config.settings import Settings
+from backend.src.utils.lazy_import import lazy_import
+from backend.src.utils.metrics import STAGE_SECONDS
+from backend.src.utils.tracing import span
+
+# pdf2image (and PIL with it) is imported on first conversion
+pdf2image = lazy_import("pdf2image")
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -19,6 +23,8 @@ ImageData = Union[str, Tuple[str, bytes]]
 
 class PDFConverter:
     @staticmethod
+    @STAGE_SECONDS.time(provider="local", stage="rasterize")
+    @span("rasterize")
     def pdf_to_images(pdf_path: str, output_dir: str, dpi: int = 600) -> Tuple[ImageData, List[ImageData]]:
         """
         Convert PDF file to high quality images without any contrast enhancement.
@@ -53,11 +59,11 @@ class PDFConverter:
                 logging.info(f"Using Poppler binaries from: {poppler_path}")
                 # Convert PDF to list of PIL Image objects
                 logging.info(f"Converting PDF to images: {pdf_path}")
-                images = convert_from_path(pdf_path, dpi=dpi, poppler_path=str(poppler_path))
+                images = pdf2image.convert_from_path(pdf_path, dpi=dpi, poppler_path=str(poppler_path))
             else:
                 # If Poppler path not found, try without specifying the path
                 logging.warning("Poppler path not found, trying without specifying the path")
-                images = convert_from_path(pdf_path, dpi=dpi)
+                images = pdf2image.convert_from_path(pdf_path, dpi=dpi)
                 
             logging.info(f"Converted {len(images)} pages from PDF")
 
@@ -0,0 +1,236 @@
+"""
+On-demand CPU and memory profiling of job stages.
+
+When a worker's memory balloons or its CPU pegs during rasterization or CSV parsing,
+the job used to be reproduced by hand under a profiler. A job can now be profiled
+in place (Settings.PROFILING_ENABLED, --profile on the command line, the
+X-Profile header of the API or the worker's "profile" option): every span of the
+job (utils/tracing.py) is then also run under cProfile and between two tracemalloc
+snapshots, and the job's artifacts get:
+
+* profile_<stage>.pstats and profile_<stage>.txt: the CPU profile of each stage,
+  loadable with pstats or snakeviz, and its top functions by cumulative time;
+* profile_allocations.txt: the source lines that allocated the most memory in each stage;
+* profile.json: per stage, its calls, seconds, the peak of Python allocations, the
+  growth of the resident set size (RSS) and the process's peak RSS after it.
+
+CPU time is attributed to the innermost stage: an outer stage's profiler is paused
+while a nested stage runs. Memory figures are per process, so stages of other jobs
+running at the same time are included. Python 3.12 and later allow one profiler at a
+time per process; a stage starting while another thread is profiled is then not
+CPU-profiled. Without a profile the spans check one context variable and do nothing
+else.
+"""
+
+import contextvars
+import cProfile
+import io
+import json
+import logging
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from backend.src.config.settings import Settings
+from backend.src.utils.artifact_writer import get_artifact_writer
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; peak RSS is then not reported
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+_current_profile: contextvars.ContextVar = contextvars.ContextVar("job_profile", default=None)
+# Stage runs open in each thread, innermost last
+_local = threading.local()
+# Profiles in progress; tracemalloc runs while there is at least one
+_tracing_users = 0
+_tracing_lock = threading.Lock()
+
+
+def _rss_bytes() -> Optional[int]:
+    """Current resident set size of the process (Linux only)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of the process so far."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class _StageRun:
+    """One run of a stage under the profilers."""
+
+    def __init__(self, profile: "JobProfile", name: str):
+        self.profile = profile
+        self.name = name
+        self.profiler: Optional[cProfile.Profile] = cProfile.Profile()
+        self.python_peak = 0
+
+    def start(self) -> None:
+        stack = _local.__dict__.setdefault("stack", [])
+        if stack:
+            stack[-1].pause()
+        stack.append(self)
+        self.rss_before = _rss_bytes()
+        if tracemalloc.is_tracing():
+            self.snapshot = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+        self.started = time.perf_counter()
+        self.resume()
+
+    def pause(self) -> None:
+        if self.profiler is not None:
+            self.profiler.disable()
+        if tracemalloc.is_tracing():
+            self.python_peak = max(self.python_peak, tracemalloc.get_traced_memory()[1])
+
+    def resume(self) -> None:
+        if self.profiler is None:
+            return
+        try:
+            self.profiler.enable()
+        except ValueError:
+            # Another thread is profiled (one profiler per process from Python 3.12)
+            self.profiler = None
+
+    def stop(self) -> None:
+        seconds = time.perf_counter() - self.started
+        self.pause()
+        stack = _local.stack
+        stack.pop()
+        allocations = []
+        if tracemalloc.is_tracing() and getattr(self, "snapshot", None) is not None:
+            allocations = tracemalloc.take_snapshot().compare_to(self.snapshot, "lineno")[:self.profile.top]
+        self.profile.add(self, seconds, allocations)
+        if stack:
+            # The outer stage's peak includes this one's
+            stack[-1].python_peak = max(stack[-1].python_peak, self.python_peak)
+            stack[-1].resume()
+
+
+class JobProfile:
+    """CPU profiles and memory statistics of one job's stages."""
+
+    def __init__(self, top: int = None):
+        """
+        Args:
+            top: Entries in each text report (defaults to Settings.PROFILE_TOP_ENTRIES)
+        """
+        self.top = top or Settings.PROFILE_TOP_ENTRIES
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self._stats: Dict[str, pstats.Stats] = {}
+        self._allocations: Dict[str, Dict[str, List[int]]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, run: _StageRun, seconds: float, allocations: list) -> None:
+        """Add a finished run of a stage."""
+        rss_after = _rss_bytes()
+        with self._lock:
+            stage = self.stages.setdefault(run.name, {"calls": 0, "seconds": 0.0, "python_peak_bytes": 0})
+            stage["calls"] += 1
+            stage["seconds"] += seconds
+            stage["python_peak_bytes"] = max(stage["python_peak_bytes"], run.python_peak)
+            if run.rss_before is not None and rss_after is not None:
+                stage["rss_growth_bytes"] = max(stage.get("rss_growth_bytes", 0), rss_after - run.rss_before)
+                stage["rss_after_bytes"] = rss_after
+            stage["peak_rss_bytes"] = _peak_rss_bytes()
+
+            if run.profiler is not None:
+                if run.name in self._stats:
+                    self._stats[run.name].add(run.profiler)
+                else:
+                    self._stats[run.name] = pstats.Stats(run.profiler)
+            totals = self._allocations.setdefault(run.name, {})
+            for stat in allocations:
+                size, count = totals.get(str(stat.traceback), [0, 0])
+                totals[str(stat.traceback)] = [size + stat.size_diff, count + stat.count_diff]
+
+    def summary(self) -> Dict[str, Any]:
+        """Calls, seconds and memory figures of each stage."""
+        with self._lock:
+            return {
+                name: {**stage, "seconds": round(stage["seconds"], 3)}
+                for name, stage in sorted(self.stages.items())
+            }
+
+    def reports(self) -> Dict[str, Any]:
+        """The report files of the profile, by file name (text or bytes)."""
+        files: Dict[str, Any] = {"profile.json": json.dumps(self.summary(), indent=2)}
+        allocation_lines = []
+        with self._lock:
+            for name, stats in sorted(self._stats.items()):
+                files[f"profile_{name}.pstats"] = marshal.dumps(stats.stats)
+                text = io.StringIO()
+                stats.stream = text
+                stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+                files[f"profile_{name}.txt"] = text.getvalue()
+            for name, totals in sorted(self._allocations.items()):
+                allocation_lines.append(f"== {name}")
+                top = sorted(totals.items(), key=lambda item: -item[1][0])[:self.top]
+                allocation_lines += [f"{size / 1024:+.1f} KiB ({count:+d} blocks) {line}" for line, (size, count) in top]
+        files["profile_allocations.txt"] = "\n".join(allocation_lines) + "\n"
+        return files
+
+
+def current_profile() -> Optional[JobProfile]:
+    """Return the profile of the job running in this context, if any."""
+    return _current_profile.get()
+
+
+def start_stage(name: str) -> Optional[_StageRun]:
+    """Start profiling a stage of the current job; None when it is not profiled."""
+    profile = _current_profile.get()
+    if profile is None:
+        return None
+    run = _StageRun(profile, name)
+    run.start()
+    return run
+
+
+@contextmanager
+def profiling(profile: Optional[JobProfile]):
+    """
+    Profile the stages of the job run in this block into `profile` (None for none),
+    with tracemalloc tracing while any job is profiled.
+    """
+    global _tracing_users
+    token = _current_profile.set(profile)
+    if profile is not None:
+        with _tracing_lock:
+            _tracing_users += 1
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+    try:
+        yield profile
+    finally:
+        _current_profile.reset(token)
+        if profile is not None:
+            with _tracing_lock:
+                _tracing_users -= 1
+                if _tracing_users == 0:
+                    tracemalloc.stop()
+
+
+def write_reports(profile: JobProfile, output_dir: str) -> None:
+    """Queue the profile's reports for the job's output directory (its archive when open)."""
+    writer = get_artifact_writer()
+    for filename, data in profile.reports().items():
+        writer.write(os.path.join(output_dir, filename), data)
+    logger.info(f"Queued profile of {len(profile.stages)} stage(s) for {output_dir}")
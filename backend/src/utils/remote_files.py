@@ -0,0 +1,229 @@
+"""
+Lifecycle of files uploaded to provider file stores.
+
+Statement chunks, page extracts and identity images are uploaded to the Gemini (or
+OpenAI) file store before they can be referenced in a request, and nothing removed
+them afterwards, so project storage filled up with stale uploads until new uploads
+failed. Every upload is now registered with the RemoteFileManager under the job that
+created it. When the job ends its files are queued for deletion, and a background
+thread deletes queued files in batched sweeps, off the request's critical path. On
+startup, files left behind by processes that died before cleaning up are swept as
+orphans.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.src.config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RemoteFile:
+    """A file in a provider's file store."""
+    provider: str
+    name: str
+    client: Any
+    size_bytes: int = 0
+    job_id: Optional[str] = None
+    created: float = 0.0
+
+
+class RemoteFileManager:
+    """Tracks uploaded files and deletes released ones in background sweeps."""
+
+    def __init__(self, batch_size: int = None, sweep_seconds: float = None, enabled: bool = None):
+        """
+        Initialize the manager.
+
+        Args:
+            batch_size: Largest number of files deleted in one sweep
+            sweep_seconds: Longest time a released file waits for its sweep
+            enabled: Delete released files (defaults to Settings.REMOTE_FILE_CLEANUP_ENABLED)
+        """
+        self.batch_size = batch_size or Settings.REMOTE_FILE_BATCH_SIZE
+        self.sweep_seconds = Settings.REMOTE_FILE_SWEEP_SECONDS if sweep_seconds is None else sweep_seconds
+        self.enabled = Settings.REMOTE_FILE_CLEANUP_ENABLED if enabled is None else enabled
+        self.deleted = 0
+        self.failed = 0
+        self._files: Dict[Tuple[str, str], RemoteFile] = {}
+        self._pending: List[RemoteFile] = []
+        self._in_flight = 0
+        self._flushing = False
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def track(self, provider: str, client: Any, name: str, size_bytes: int = 0, job_id: str = None) -> RemoteFile:
+        """
+        Register an uploaded file.
+
+        Args:
+            provider: "gemini" or "openai"
+            client: The client the file was uploaded with (used to delete it)
+            name: The file's remote name (Gemini) or id (OpenAI)
+            size_bytes: Size of the upload
+            job_id: The job the file belongs to; its files are released with release_job()
+        """
+        remote_file = RemoteFile(provider, name, client, size_bytes or 0, job_id, time.time())
+        with self._condition:
+            self._files[(provider, name)] = remote_file
+        return remote_file
+
+    def release(self, provider: str, *names: str) -> None:
+        """Queue tracked files, by remote name, for deletion in the next sweep."""
+        with self._condition:
+            for name in names:
+                remote_file = self._files.pop((provider, name), None)
+                if remote_file is not None:
+                    self._pending.append(remote_file)
+            self._schedule()
+
+    def release_job(self, job_id: str) -> int:
+        """
+        Queue every file of a job for deletion.
+
+        Returns:
+            The number of files queued
+        """
+        with self._condition:
+            files = [f for f in self._files.values() if f.job_id == job_id]
+            for remote_file in files:
+                del self._files[(remote_file.provider, remote_file.name)]
+            self._pending.extend(files)
+            self._schedule()
+        return len(files)
+
+    def sweep_orphans(self, client: Any, max_age_seconds: int = None) -> int:
+        """
+        Queue Gemini files older than `max_age_seconds` that no live job tracks.
+        Meant to run once at startup, for files left by processes that died.
+
+        OpenAI files are not swept: the assistants' own files live in the same store.
+
+        Args:
+            client: A genai.Client for the project to sweep
+            max_age_seconds: Minimum age of an orphan (defaults to Settings.REMOTE_FILE_ORPHAN_AGE_SECONDS)
+
+        Returns:
+            The number of files queued
+        """
+        if not self.enabled:
+            return 0
+        max_age_seconds = Settings.REMOTE_FILE_ORPHAN_AGE_SECONDS if max_age_seconds is None else max_age_seconds
+        cutoff = datetime.now(timezone.utc).timestamp() - max_age_seconds
+        orphans = []
+        try:
+            for file_obj in client.files.list():
+                create_time = getattr(file_obj, "create_time", None)
+                if create_time is None or create_time.timestamp() > cutoff:
+                    continue
+                with self._condition:
+                    if ("gemini", file_obj.name) in self._files:
+                        continue
+                orphans.append(RemoteFile("gemini", file_obj.name, client, getattr(file_obj, "size_bytes", 0) or 0))
+        except Exception as e:
+            logger.warning(f"Could not list remote files for the orphan sweep: {str(e)}")
+
+        if orphans:
+            logger.info(f"Queued {len(orphans)} orphaned remote file(s) for deletion")
+            with self._condition:
+                self._pending.extend(orphans)
+                self._schedule()
+        return len(orphans)
+
+    def stats(self) -> Dict[str, int]:
+        """Counts and bytes of files still in remote storage."""
+        with self._condition:
+            outstanding = list(self._files.values())
+            pending = list(self._pending)
+        return {
+            "outstanding_files": len(outstanding),
+            "outstanding_bytes": sum(f.size_bytes for f in outstanding),
+            "pending_deletion_files": len(pending) + self._in_flight,
+            "pending_deletion_bytes": sum(f.size_bytes for f in pending),
+            "deleted_files": self.deleted,
+            "failed_deletions": self.failed,
+        }
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Delete every queued file now and wait for the sweeps to finish.
+
+        Returns:
+            False if files were still queued when the timeout ran out
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            self._flushing = True
+            self._condition.notify_all()
+            while self._pending or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            self._flushing = False
+            return not (self._pending or self._in_flight)
+
+    def _schedule(self) -> None:
+        # Called with the condition held
+        if not self.enabled:
+            self._pending.clear()
+            return
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="remote-file-sweeper", daemon=True)
+            self._thread.start()
+        self._condition.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending)
+                # Let releases accumulate into a batch unless one is already full
+                self._condition.wait_for(
+                    lambda: len(self._pending) >= self.batch_size or self._flushing,
+                    timeout=self.sweep_seconds
+                )
+                batch = self._pending[:self.batch_size]
+                del self._pending[:self.batch_size]
+                self._in_flight = len(batch)
+
+            for remote_file in batch:
+                self._delete(remote_file)
+
+            with self._condition:
+                self._in_flight = 0
+                self._condition.notify_all()
+
+    def _delete(self, remote_file: RemoteFile) -> None:
+        try:
+            if remote_file.provider == "openai":
+                remote_file.client.files.delete(file_id=remote_file.name)
+            else:
+                remote_file.client.files.delete(name=remote_file.name)
+            self.deleted += 1
+            logger.debug(f"Deleted remote file {remote_file.name}")
+        except Exception as e:
+            # Gemini expires uploads on its own; a file that can't be deleted is left to that
+            self.failed += 1
+            logger.warning(f"Failed to delete remote file {remote_file.name}: {str(e)}")
+
+
+_manager: Optional[RemoteFileManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_remote_file_manager() -> RemoteFileManager:
+    """Return the process-wide RemoteFileManager."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = RemoteFileManager()
+            # Give queued deletions a chance to finish when a CLI run exits
+            atexit.register(_manager.flush, Settings.REMOTE_FILE_EXIT_TIMEOUT_SECONDS)
+        return _manager
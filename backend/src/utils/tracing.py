@@ -0,0 +1,140 @@
+"""
+Per-job trace timelines.
+
+The stage histograms (utils/metrics.py) say how long stages take across jobs, but
+not where the time of one slow job went: the file polls, a slow generate call or
+rasterizing the pages. A job now records a Trace, the spans of its stages (job,
+chunk, upload, file_active_wait and each poll sleep, generate, parse, categorize,
+...), which is exported in the Chrome trace-event format (trace.json next to the
+result, or in the result with include_trace) and can be opened in chrome://tracing
+or Perfetto.
+
+The trace of the running job is held in a context variable, so spans need no
+arguments threaded through the services and stage threads started with a copy of
+the context (run_within, batches) record into their job's trace. The innermost span
+is also made the current stage (current_stage()), to which provider calls attribute
+their tokens (utils/usage.py), and in a profiled job each span is profiled as a
+stage (utils/profiling.py). Outside a traced job span() does nothing else.
+"""
+
+import contextvars
+import os
+import threading
+import time
+from contextlib import ContextDecorator, contextmanager
+from typing import Any, Dict, List, Optional
+
+from backend.src.utils.profiling import start_stage
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("job_trace", default=None)
+_current_stage: contextvars.ContextVar = contextvars.ContextVar("job_stage", default=None)
+
+
+class Trace:
+    """The spans recorded by one job."""
+
+    def __init__(self, name: str = "job"):
+        self.name = name
+        self.spans: List[Dict[str, Any]] = []
+        self._threads: Dict[int, str] = {}
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, name: str, start: float, end: float, category: str = "stage", **args: Any) -> None:
+        """
+        Record a span.
+
+        Args:
+            name: The span's name, e.g. "generate"
+            start: time.perf_counter() when the span started
+            end: time.perf_counter() when the span ended
+            category: Category of the span (trace viewers can filter by it)
+            args: JSON-serializable facts about the span
+        """
+        thread = threading.current_thread()
+        span = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": round((start - self._origin) * 1e6, 1),
+            "dur": round((end - start) * 1e6, 1),
+            "pid": os.getpid(),
+            "tid": thread.ident,
+        }
+        if args:
+            span["args"] = args
+        with self._lock:
+            self.spans.append(span)
+            self._threads.setdefault(thread.ident, thread.name)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The trace in the Chrome trace-event (JSON object) format."""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span["ts"])
+            threads = dict(self._threads)
+        pid = os.getpid()
+        metadata = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": self.name}}]
+        metadata += [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in threads.items()
+        ]
+        return {"traceEvents": metadata + spans, "displayTimeUnit": "ms"}
+
+
+def current_trace() -> Optional[Trace]:
+    """Return the trace of the job running in this context, if any."""
+    return _current_trace.get()
+
+
+def current_stage() -> Optional[str]:
+    """Return the name of the innermost span open in this context, if any."""
+    return _current_stage.get()
+
+
+@contextmanager
+def tracing(trace: Optional[Trace]):
+    """Record the spans of the code run in this block into `trace` (None for none)."""
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+class span(ContextDecorator):
+    """
+    Context manager (or decorator) recording a block as a span of the current trace.
+
+    Args:
+        name: The span's name
+        category: Category of the span
+        args: JSON-serializable facts about the span
+    """
+
+    def __init__(self, name: str, category: str = "stage", **args: Any):
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def _recreate_cm(self):
+        # Each decorated call records its own span
+        return span(self.name, self.category, **self.args)
+
+    def __enter__(self):
+        self._stage_token = _current_stage.set(self.name)
+        self.trace = _current_trace.get()
+        if self.trace is not None:
+            self.start = time.perf_counter()
+        self._profiled = start_stage(self.name)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._profiled is not None:
+            self._profiled.stop()
+        _current_stage.reset(self._stage_token)
+        if self.trace is not None:
+            args = dict(self.args)
+            if exc_type is not None:
+                args["error"] = exc_type.__name__
+            self.trace.add(self.name, self.start, time.perf_counter(), self.category, **args)
+        return False
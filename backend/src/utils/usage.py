@@ -0,0 +1,142 @@
+"""
+Token and cost accounting.
+
+Provider responses report the tokens each call consumed, but the services kept only
+the response text, so the cost of a chunk size, prompt format or model tier could
+only be guessed. Every provider call now records its prompt, output and cached
+tokens (record_usage()):
+
+* against the current stage (the innermost span, see utils/tracing.py), e.g. parse
+  or categorize, and the model that answered;
+* into the Usage of the running job, returned in the job's result as "usage";
+* into the token and cost counters of utils/metrics.py.
+
+Costs are computed from Settings.MODEL_PRICES (USD per million tokens). Cached
+tokens are part of the prompt tokens and are charged at the cached price.
+"""
+
+import contextvars
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from backend.src.config.settings import Settings
+from backend.src.utils.metrics import COST_USD, TOKENS
+from backend.src.utils.tracing import current_stage
+
+_current_usage: contextvars.ContextVar = contextvars.ContextVar("job_usage", default=None)
+
+_FIELDS = ("calls", "prompt_tokens", "output_tokens", "cached_tokens")
+
+
+def usage_counts(response: Any) -> Dict[str, int]:
+    """
+    Token counts of a provider response: Gemini's usage_metadata or the usage of an
+    OpenAI run. Counts the response does not report are 0.
+    """
+    def count(usage: Any, *names: str) -> int:
+        return sum(getattr(usage, name, 0) or 0 for name in names)
+
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None:
+        return {
+            "prompt_tokens": count(usage, "prompt_token_count"),
+            # Thinking tokens are billed as output
+            "output_tokens": count(usage, "candidates_token_count", "thoughts_token_count"),
+            "cached_tokens": count(usage, "cached_content_token_count"),
+        }
+    usage = getattr(response, "usage", None)
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "prompt_tokens": count(usage, "prompt_tokens"),
+        "output_tokens": count(usage, "completion_tokens"),
+        "cached_tokens": count(details, "cached_tokens"),
+    }
+
+
+def call_cost(model: str, prompt_tokens: int, output_tokens: int, cached_tokens: int = 0) -> Optional[float]:
+    """Cost of a call in USD, or None when the model has no price in Settings.MODEL_PRICES."""
+    prices = Settings.MODEL_PRICES.get(model)
+    if prices is None:
+        return None
+    cached_price = prices.get("cached", prices["input"])
+    return (
+        (prompt_tokens - cached_tokens) * prices["input"]
+        + cached_tokens * cached_price
+        + output_tokens * prices["output"]
+    ) / 1_000_000
+
+
+class Usage:
+    """Tokens and cost of one job's provider calls, by stage and by model."""
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.models: Dict[str, Dict[str, Any]] = {}
+        self.unpriced = set()
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, model: str, counts: Dict[str, int], cost: Optional[float]) -> None:
+        """Add one call of `model` in `stage` with its token counts and cost."""
+        with self._lock:
+            for totals in (self.stages.setdefault(stage, {}), self.models.setdefault(model, {})):
+                totals["calls"] = totals.get("calls", 0) + 1
+                for field in _FIELDS[1:]:
+                    totals[field] = totals.get(field, 0) + counts.get(field, 0)
+                totals["cost_usd"] = totals.get("cost_usd", 0.0) + (cost or 0.0)
+            if cost is None:
+                self.unpriced.add(model)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Totals of the job, by stage and by model, with costs in USD."""
+        def rounded(totals: Dict[str, Any]) -> Dict[str, Any]:
+            return {**totals, "cost_usd": round(totals.get("cost_usd", 0.0), 6)}
+
+        with self._lock:
+            stages = {stage: rounded(totals) for stage, totals in sorted(self.stages.items())}
+            models = {model: rounded(totals) for model, totals in sorted(self.models.items())}
+            unpriced = sorted(self.unpriced)
+        job = {field: sum(totals.get(field, 0) for totals in stages.values()) for field in _FIELDS}
+        job["cost_usd"] = round(sum(totals["cost_usd"] for totals in stages.values()), 6)
+        return {**job, "stages": stages, "models": models, "unpriced_models": unpriced}
+
+
+def current_usage() -> Optional[Usage]:
+    """Return the Usage of the job running in this context, if any."""
+    return _current_usage.get()
+
+
+@contextmanager
+def accounting(usage: Optional[Usage]):
+    """Record the provider calls made in this block into `usage` (None for none)."""
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+
+
+def record_usage(provider: str, model: str, response: Any) -> Dict[str, int]:
+    """
+    Account for a completed provider call against the current stage and job.
+
+    Args:
+        provider: "gemini" or "openai"
+        model: The model (or OpenAI assistant) that answered
+        response: The provider's response (or OpenAI run)
+
+    Returns:
+        The call's token counts
+    """
+    counts = usage_counts(response)
+    stage = current_stage() or "other"
+    cost = call_cost(model, **counts)
+    for kind in ("prompt", "output", "cached"):
+        if counts[f"{kind}_tokens"]:
+            TOKENS.inc(counts[f"{kind}_tokens"], provider=provider, model=model, stage=stage, kind=kind)
+    if cost:
+        COST_USD.inc(cost, provider=provider, model=model, stage=stage)
+    usage = _current_usage.get()
+    if usage is not None:
+        usage.add(stage, model, counts, cost)
+    return counts
@@ -10,6 +10,7 @@ import threading
 from pathlib import Path
 from typing import Dict, Any, Optional
 
+import httpx
 import openai
 from openai import OpenAI
 
@@ -30,6 +31,32 @@ logging.getLogger("httpx").setLevel(logging.WARNING)
 logging.getLogger("httpcore").setLevel(logging.WARNING)
 
 
+# One OpenAI client (and keep-alive connection pool) per API key, shared by every
+# AssistantClient in the process
+_shared_clients: Dict[str, OpenAI] = {}
+_shared_clients_lock = threading.Lock()
+
+
+def get_shared_openai_client(api_key: str) -> OpenAI:
+    """Return the process-wide OpenAI client for an API key, creating it on first use.
+
+    The connection pool is sized to Config.MAX_CONCURRENT_REQUESTS so that every
+    concurrently processed image reuses a warm connection.
+
+    Args:
+        api_key: OpenAI API key
+    """
+    with _shared_clients_lock:
+        client = _shared_clients.get(api_key)
+        if client is None:
+            limits = httpx.Limits(max_connections=Config.MAX_CONCURRENT_REQUESTS,
+                                  max_keepalive_connections=Config.MAX_CONCURRENT_REQUESTS)
+            client = OpenAI(api_key=api_key,
+                            http_client=openai.DefaultHttpxClient(limits=limits))
+            _shared_clients[api_key] = client
+        return client
+
+
 class AssistantClient:
 
     def __init__(self, api_key: str, assistant_id: str):
@@ -39,7 +66,7 @@ class AssistantClient:
             api_key: OpenAI API key
             assistant_id: ID of the existing assistant to use
         """
-        self.client = OpenAI(api_key=api_key)
+        self.client = get_shared_openai_client(api_key)
         self.assistant_id = assistant_id
         self._lock = threading.Lock()
 
@@ -0,0 +1,38 @@
+import json
+import os
+import tempfile
+import unittest
+import zipfile
+
+from backend.src.utils.artifact_writer import ARCHIVE_FILENAME, INDEX_FILENAME, ArtifactWriter
+
+
+class TestArtifactWriter(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.writer = ArtifactWriter(max_pending=2)
+
+    def test_job_artifacts_are_archived_with_index(self):
+        archive = self.writer.open_job(self.output_dir, "job-1")
+        self.writer.write(os.path.join(self.output_dir, "raw.txt"), "raw response")
+        self.writer.write_json(os.path.join(self.output_dir, "result.json"), {"ok": True})
+        archive.close(wait=True, timeout=5)
+
+        with zipfile.ZipFile(os.path.join(self.output_dir, ARCHIVE_FILENAME)) as zf:
+            self.assertEqual(zf.read("raw.txt"), b"raw response")
+            self.assertEqual(json.loads(zf.read("result.json")), {"ok": True})
+        with open(os.path.join(self.output_dir, INDEX_FILENAME), encoding="utf-8") as f:
+            index = json.load(f)
+        self.assertEqual([entry["name"] for entry in index["entries"]], ["raw.txt", "result.json"])
+
+    def test_writes_without_open_archive_are_plain_files(self):
+        path = os.path.join(self.output_dir, "summary.txt")
+        self.writer.write(path, "summary")
+        self.writer.flush()
+
+        with open(path, encoding="utf-8") as f:
+            self.assertEqual(f.read(), "summary")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import threading
+import unittest
+
+from backend.src.core.batch import aggregate_results, process_batch
+from backend.src.core.scheduler import current_priority, job_priority
+
+
+def row(date, description, amount, direction, balance, category="Unknown"):
+    return {
+        "Date": date, "Description": description, "Amount": amount,
+        "Direction": direction, "Balance": balance, "Category": category
+    }
+
+
+def statement(filename, transactions, account="12345678", complete=True):
+    info = {"fullName": "Jane Doe", "sortCode": "11-22-33", "accountNumber": account}
+    data = {"personal_info": info, "transactions": transactions, "complete": complete}
+    return {"filename": filename, "success": True, "data": data}
+
+
+class TestProcessBatch(unittest.TestCase):
+    def test_documents_run_concurrently_in_the_callers_lane(self):
+        barrier = threading.Barrier(3, timeout=5)
+
+        def run_document(document):
+            if document["filename"] == "bad.pdf":
+                raise ValueError("boom")
+            barrier.wait()
+            return {"lane": current_priority()[0]}
+
+        documents = [{"filename": name} for name in ("a.pdf", "bad.pdf", "b.pdf", "c.pdf")]
+        with job_priority("bulk"):
+            results = process_batch(run_document, documents, concurrency=4)
+
+        self.assertEqual([result["filename"] for result in results], ["a.pdf", "bad.pdf", "b.pdf", "c.pdf"])
+        self.assertEqual(results[0]["data"], {"lane": "bulk"})
+        self.assertEqual(results[1], {"filename": "bad.pdf", "success": False, "error": "boom"})
+
+
+class TestAggregateResults(unittest.TestCase):
+    def test_overlapping_statements_are_counted_once(self):
+        overlap = row("31-01-2024", "RENT", "800.00", "withdrawn", "1200.00", "Essential Home")
+        documents = [
+            statement("jan.pdf", [
+                row("02-01-2024", "SALARY", "2000.00", "paid in", "2000.00", "Salary"),
+                overlap,
+            ]),
+            statement("feb.pdf", [
+                overlap,
+                row("03-02-2024", "COFFEE", "3.50", "withdrawn", "1196.50"),
+                row("03-02-2024", "COFFEE", "3.50", "withdrawn", "1196.50"),
+            ], complete=False),
+            {"filename": "mar.pdf", "success": False, "error": "boom"},
+        ]
+
+        summary = aggregate_results(documents)
+
+        self.assertEqual(summary["transactions"], 4)
+        self.assertEqual(summary["duplicate_transactions"], 1)
+        self.assertEqual(summary["total_paid_in"], 2000.0)
+        self.assertEqual(summary["total_withdrawn"], 807.0)
+        self.assertEqual(summary["period"], {"start": "02-01-2024", "end": "03-02-2024"})
+        self.assertEqual(summary["months"]["2024-02"], {"paid_in": 0.0, "withdrawn": 7.0})
+        self.assertEqual(summary["categories"]["Essential Home"]["withdrawn"], 800.0)
+        self.assertEqual(summary["failed"], ["mar.pdf"])
+        self.assertEqual(summary["incomplete"], ["feb.pdf"])
+        self.assertEqual(summary["applicants"], ["Jane Doe"])
+        self.assertEqual(summary["accounts"][0]["documents"], ["jan.pdf", "feb.pdf"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+
+from backend.src.services import client_registry
+
+
+class FakeClient:
+    def __init__(self, api_key):
+        self.api_key = api_key
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class TestClientRegistry(unittest.TestCase):
+    def tearDown(self):
+        client_registry.close_clients()
+
+    def test_clients_are_shared_per_provider_and_key(self):
+        first = client_registry._get_client("gemini", "key-a", FakeClient)
+        self.assertIs(client_registry._get_client("gemini", "key-a", FakeClient), first)
+        self.assertIsNot(client_registry._get_client("gemini", "key-b", FakeClient), first)
+        self.assertIsNot(client_registry._get_client("openai", "key-a", FakeClient), first)
+
+    def test_close_clients_releases_pools(self):
+        client = client_registry._get_client("openai", "key-a", FakeClient)
+        client_registry.close_clients()
+        self.assertTrue(client.closed)
+        self.assertIsNot(client_registry._get_client("openai", "key-a", FakeClient), client)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+
+from backend.src.services.credential_pool import CredentialPool, current_credential
+
+
+class RateLimited(Exception):
+    code = 429
+
+
+class TestCredentialPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = CredentialPool(["key-a", "key-b"], cooldown_seconds=60)
+
+    def test_jobs_are_spread_across_keys_and_stay_on_theirs(self):
+        first = self.pool.acquire("job-1")
+        second = self.pool.acquire("job-2")
+        self.assertNotEqual(first.api_key, second.api_key)
+        self.assertIs(self.pool.acquire("job-1"), first)
+
+        self.pool.release("job-1")
+        self.assertIs(self.pool.acquire("job-3"), first)
+
+    def test_nested_jobs_keep_the_outer_credential(self):
+        with self.pool.job() as outer:
+            with self.pool.job() as inner:
+                self.assertIs(inner, outer)
+            self.assertIs(current_credential(), outer)
+        self.assertIsNone(current_credential())
+        self.assertEqual(outer.jobs, 0)
+
+    def test_rate_limited_key_gets_no_new_jobs(self):
+        busy = self.pool.acquire("job-1")
+        with self.assertRaises(RateLimited):
+            with self.pool.request(busy):
+                raise RateLimited()
+        self.pool.release("job-1")
+
+        self.assertEqual(busy.rate_limited, 1)
+        self.assertEqual(busy.in_flight, 0)
+        for job_id in ("job-2", "job-3"):
+            self.assertIsNot(self.pool.acquire(job_id), busy)
+
+    def test_usage_is_counted_per_key(self):
+        credential = self.pool.acquire("job-1")
+        with self.pool.request(credential):
+            self.assertEqual(credential.in_flight, 1)
+        self.pool.record_tokens(credential, 120)
+
+        stats = {entry["key"]: entry for entry in self.pool.stats()}
+        self.assertEqual(stats["...ey-a"]["requests"] + stats["...ey-b"]["requests"], 1)
+        self.assertEqual(stats[credential.label]["tokens"], 120)
+        self.assertNotIn("key-a", str(stats))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import time
+import unittest
+
+from backend.src.core.deadlines import (
+    check_deadline,
+    deadline_after,
+    remaining_time,
+    run_within,
+)
+from backend.src.utils.exceptions import DeadlineExceededError
+
+
+class TestDeadlines(unittest.TestCase):
+    def test_no_deadline_runs_directly(self):
+        self.assertIsNone(deadline_after(0))
+        self.assertEqual(run_within(None, "stage", lambda x: x * 2, 21), 42)
+
+    def test_deadline_is_current_inside_the_stage(self):
+        deadline = deadline_after(5)
+        time_left = run_within(deadline, "stage", remaining_time)
+        self.assertGreater(time_left, 0)
+        self.assertLessEqual(time_left, 5)
+        # Outside the stage there is no current deadline
+        self.assertIsNone(remaining_time())
+
+    def test_slow_stage_is_abandoned_at_the_deadline(self):
+        started = time.monotonic()
+        with self.assertRaises(DeadlineExceededError):
+            run_within(deadline_after(0.1), "slow stage", time.sleep, 2)
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_expired_deadline_fails_before_starting(self):
+        deadline = time.monotonic() - 1
+        with self.assertRaises(DeadlineExceededError):
+            check_deadline("stage", deadline)
+        calls = []
+        with self.assertRaises(DeadlineExceededError):
+            run_within(deadline, "stage", calls.append, 1)
+        self.assertEqual(calls, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import subprocess
+import sys
+import unittest
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Cold-start budget for importing an entry module, in milliseconds
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", 1500))
+
+# Libraries that must only be imported when a job actually uses them
+LAZY_MODULES = ("openai", "google.genai", "PyPDF2", "pdf2image", "PIL")
+
+ENTRY_MODULES = (
+    "backend.src.core.statement_processor",
+    "backend.src.api.worker",
+)
+
+
+def measure_import(module: str):
+    """
+    Import `module` in a fresh interpreter under `python -X importtime`.
+
+    Returns:
+        (total import time in milliseconds, set of imported module names)
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise AssertionError(f"Importing {module} failed:\n{completed.stderr}")
+
+    total_us = 0
+    imported = set()
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _cumulative, name = line[len("import time:"):].split("|")
+        total_us += int(self_us)
+        imported.add(name.strip())
+    return total_us / 1000, imported
+
+
+class TestImportTime(unittest.TestCase):
+    def test_entry_modules_import_within_budget(self):
+        for module in ENTRY_MODULES:
+            with self.subTest(module=module):
+                total_ms, imported = measure_import(module)
+                eager = sorted(
+                    name for name in imported
+                    if any(name == lazy or name.startswith(lazy + ".") for lazy in LAZY_MODULES)
+                )
+                self.assertEqual(eager, [], f"{module} imports {eager} eagerly")
+                self.assertLess(
+                    total_ms, IMPORT_TIME_BUDGET_MS,
+                    f"Importing {module} took {total_ms:.0f} ms (budget {IMPORT_TIME_BUDGET_MS:.0f} ms)"
+                )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import unittest
+from unittest.mock import MagicMock, patch
+
+from backend.src.core import job_context
+from backend.src.core.job_context import JobContext
+
+
+class TestJobContext(unittest.TestCase):
+    def setUp(self):
+        self.files = MagicMock()
+        patcher = patch.object(job_context, "get_remote_file_manager", return_value=self.files)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_close_releases_the_job(self):
+        artifacts = MagicMock()
+        with JobContext(artifacts=artifacts, deadline=None) as context:
+            scratch_dir = context.scratch_dir
+            with open(os.path.join(scratch_dir, "chunk_1.pdf"), "wb") as f:
+                f.write(b"%PDF")
+            context.transactions.append({"Description": "x"})
+            context.personal_info = {"fullName": "A Holder"}
+
+        self.assertTrue(context.closed)
+        self.assertFalse(os.path.exists(scratch_dir))
+        self.assertEqual(context.transactions, [])
+        self.assertIsNone(context.personal_info)
+        artifacts.close.assert_called_once_with()
+        self.files.release_job.assert_called_once_with(context.job_id)
+        with self.assertRaises(RuntimeError):
+            context.scratch_dir
+
+    def test_listeners_get_events_until_close(self):
+        events = []
+        context = JobContext(deadline=None)
+        context.listeners.append(lambda stage, status, details: events.append((stage, status, details)))
+        # A failing listener does not stop the others
+        context.listeners.insert(0, MagicMock(side_effect=ValueError("boom")))
+
+        context.emit("chunk:1", "started", pages=[1, 2])
+        context.close()
+        context.emit("chunk:1", "completed")
+        self.assertEqual(events, [("chunk:1", "started", {"pages": [1, 2]})])
+
+    def test_raw_responses_are_exported_only_when_enabled(self):
+        self.assertIsNone(JobContext(output_dir="out", export_raw_responses=False).export_path("raw.txt"))
+        self.assertIsNone(JobContext(export_raw_responses=True).export_path("raw.txt"))
+        self.assertEqual(
+            JobContext(output_dir="out", export_raw_responses=True).export_path("raw.txt"),
+            os.path.join("out", "raw.txt")
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from backend.src.api.jobs import Job, JobManager, format_event
+from backend.src.utils.exceptions import JobRejectedError
+
+
+class TestJobManager(unittest.TestCase):
+    def setUp(self):
+        self.release = threading.Event()
+        self.manager = JobManager(self.run_job, workers=1, max_queued_jobs=2, max_queued_pages=10)
+
+    def run_job(self, job):
+        job.on_progress("chunk:1", "completed", {})
+        self.release.wait(5)
+        if job.options.get("fail"):
+            raise ValueError("boom")
+        return {"pages": job.pages}
+
+    def new_job(self, pages, **options):
+        work_dir = tempfile.mkdtemp()
+        return Job(pdf_path=os.path.join(work_dir, "x.pdf"), work_dir=work_dir, pages=pages, options=options)
+
+    def wait_for(self, job, status):
+        for _ in range(200):
+            if job.status == status:
+                return
+            time.sleep(0.01)
+        self.fail(f"job is {job.status}, expected {status}")
+
+    def test_jobs_report_progress_and_results(self):
+        job = self.manager.submit(self.new_job(3))
+        self.wait_for(job, "running")
+        self.assertEqual(self.manager.get(job.job_id).to_dict()["stages"], {"chunk:1": "completed"})
+        self.assertNotIn("result", job.to_dict())
+
+        self.release.set()
+        self.wait_for(job, "succeeded")
+        self.assertEqual(job.to_dict()["result"], {"pages": 3})
+        self.assertFalse(os.path.exists(job.work_dir))
+
+    def test_event_log_ends_with_the_result(self):
+        job = self.manager.submit(self.new_job(3))
+        first = job.events_from(0, timeout=5)
+        self.assertEqual(first[0], {"seq": 0, "stage": "chunk:1", "status": "completed"})
+        # Nothing new arrives while the job waits
+        self.assertEqual(job.events_from(1, timeout=0.05), [])
+
+        self.release.set()
+        last = job.events_from(1, timeout=5)
+        self.assertEqual(last, [{"seq": 1, "stage": "job", "status": "succeeded", "result": {"pages": 3}}])
+        self.assertEqual(job.events_from(2, timeout=5), [])
+
+        self.assertEqual(
+            format_event(last[0]),
+            'id: 1\nevent: job\ndata: {"seq": 1, "stage": "job", "status": "succeeded", "result": {"pages": 3}}\n\n'
+        )
+        self.assertTrue(format_event(last[0], sse=False).endswith("}\n"))
+
+    def test_failures_are_reported(self):
+        self.release.set()
+        job = self.manager.submit(self.new_job(1, fail=True))
+        self.wait_for(job, "failed")
+        self.assertEqual(job.to_dict()["error"], "boom")
+
+    def test_admission_by_queue_depth_and_pages(self):
+        # The queue is empty, so a job over the page budget is still admitted
+        running = self.manager.submit(self.new_job(50))
+        self.wait_for(running, "running")
+
+        self.manager.submit(self.new_job(8))
+        with self.assertRaises(JobRejectedError) as raised:
+            self.manager.submit(self.new_job(5))
+        self.assertGreaterEqual(raised.exception.retry_after, 1)
+
+        self.manager.submit(self.new_job(2))
+        rejected = self.new_job(1)
+        with self.assertRaises(JobRejectedError):
+            self.manager.submit(rejected)
+        self.assertFalse(os.path.exists(rejected.work_dir))
+        self.assertEqual(self.manager.stats()["queued_jobs"], 2)
+        self.assertEqual(self.manager.stats()["rejected"], 2)
+        self.release.set()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import os
+import tempfile
+import unittest
+
+from backend.src.core.journal import JOURNAL_FILENAME, open_journal
+
+
+class TestJobJournal(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.pdf_path = os.path.join(self.output_dir, "statement.pdf")
+        with open(self.pdf_path, "wb") as f:
+            f.write(b"%PDF-1.4 test")
+
+    def test_resume_returns_recorded_stages(self):
+        journal = open_journal(self.output_dir, self.pdf_path, chunk_count=3)
+        journal.record("parse", [{"Date": "01-01-2024"}], key=1)
+
+        resumed = open_journal(self.output_dir, self.pdf_path, resume=True, chunk_count=3)
+        self.assertEqual(resumed.get("parse", 1), [{"Date": "01-01-2024"}])
+        self.assertFalse(resumed.has("parse", 2))
+
+    def test_different_options_start_afresh(self):
+        journal = open_journal(self.output_dir, self.pdf_path, chunk_count=3)
+        journal.record("summary", {"recommendations": []})
+
+        resumed = open_journal(self.output_dir, self.pdf_path, resume=True, chunk_count=4)
+        self.assertFalse(resumed.has("summary"))
+
+    def test_truncated_record_is_ignored(self):
+        journal = open_journal(self.output_dir, self.pdf_path, chunk_count=3)
+        journal.record("personal_info", {"fullName": "A"})
+        with open(os.path.join(self.output_dir, JOURNAL_FILENAME), "a", encoding="utf-8") as f:
+            f.write('{"stage": "summary", "ke')
+
+        resumed = open_journal(self.output_dir, self.pdf_path, resume=True, chunk_count=3)
+        self.assertEqual(resumed.get("personal_info"), {"fullName": "A"})
+        self.assertFalse(resumed.has("summary"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+from backend.src.utils.metrics import Counter, Gauge, Histogram, Registry
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_histogram_buckets_are_cumulative(self):
+        latency = Histogram("stage_seconds", "Stage latency.", ("stage",), buckets=(1, 5), registry=self.registry)
+        latency.observe(0.5, stage="parse")
+        latency.observe(3, stage="parse")
+
+        @latency.time(stage="split")
+        def split():
+            return "done"
+
+        self.assertEqual(split(), "done")
+        text = self.registry.render()
+        self.assertIn("# TYPE stage_seconds histogram", text)
+        self.assertIn('stage_seconds_bucket{stage="parse",le="1"} 1', text)
+        self.assertIn('stage_seconds_bucket{stage="parse",le="5"} 2', text)
+        self.assertIn('stage_seconds_bucket{stage="parse",le="+Inf"} 2', text)
+        self.assertIn('stage_seconds_sum{stage="parse"} 3.5', text)
+        self.assertEqual(latency.count(stage="split"), 1)
+
+    def test_counters_and_gauges(self):
+        calls = Counter("calls_total", "Calls.", ("outcome",), registry=self.registry)
+        calls.inc(outcome="ok")
+        calls.inc(2, outcome="ok")
+        depth = Gauge("queue_depth", "Depth.", ("queue",), registry=self.registry)
+        depth.set_function(lambda: 7, queue="jobs")
+        with depth.track_inprogress(queue="chunks"):
+            self.assertEqual(depth.value(queue="chunks"), 1)
+
+        text = self.registry.render()
+        self.assertIn('calls_total{outcome="ok"} 3', text)
+        self.assertIn('queue_depth{queue="jobs"} 7', text)
+        self.assertIn('queue_depth{queue="chunks"} 0', text)
+
+    def test_labels_are_checked(self):
+        calls = Counter("calls_total", "Calls.", ("outcome",), registry=self.registry)
+        with self.assertRaises(ValueError):
+            calls.inc(model="x")
+        with self.assertRaises(ValueError):
+            Counter("calls_total", "Calls.", registry=self.registry)
+
+
+if __name__ == '__main__':
+    unittest.main()
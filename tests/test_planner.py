@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from backend.src.config.settings import Settings
+from backend.src.core import planner
+from backend.src.core.planner import JobHistory, plan_statement
+
+
+class TestPlanner(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.pdf_path = os.path.join(self.directory.name, "statement.pdf")
+        with open(self.pdf_path, "wb") as f:
+            f.write(b"%PDF-1.4")
+        self.history = JobHistory(os.path.join(self.directory.name, "history.jsonl"), max_jobs=2)
+        document = {"pages": 7, "text_pages": 7, "text_layer": True, "size_bytes": 8}
+        patches = [
+            patch.object(planner, "inspect_pdf", return_value=document),
+            patch.object(Settings, "RESULT_STORE_ENABLED", False),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_plan_without_history(self):
+        plan = plan_statement(self.pdf_path, use_gemini=True, chunk_count=3, history=self.history)
+
+        self.assertEqual([chunk["pages"] for chunk in plan["chunks"]], [[1, 3], [4, 6], [7, 7]])
+        self.assertEqual(plan["uploads"], 4)
+        self.assertEqual(plan["model_calls"], {"parse": 3, "categorize": 3, "personal_info": 1, "summary": 1, "total": 8})
+        self.assertEqual(plan["estimate"]["basis"], "defaults")
+        self.assertEqual(plan["estimate"]["tokens"]["stages"]["parse"]["output_tokens"], 7 * 600)
+        self.assertGreater(plan["estimate"]["cost_usd"], 0)
+        self.assertGreater(plan["estimate"]["seconds"], 0)
+        self.assertIsNone(plan["stored_result"])
+
+    def test_plan_scales_recent_history_by_pages(self):
+        usage = {"stages": {"parse": {"calls": 1, "prompt_tokens": 1000, "output_tokens": 2000, "cached_tokens": 500}}}
+        self.history.record("gemini", 100, 3, 1000.0, usage)
+        for _ in range(2):
+            self.history.record("gemini", 14, 3, 70.0, usage)
+        self.history.record("openai", 1, 1, 1.0, {})
+
+        plan = plan_statement(self.pdf_path, use_gemini=True, chunk_count=3, history=self.history)
+
+        # Only the two most recent Gemini jobs count: 28 pages, 140 seconds
+        self.assertEqual(plan["estimate"]["basis"], "history of 2 gemini job(s)")
+        self.assertEqual(plan["estimate"]["seconds"], 35.0)
+        self.assertEqual(
+            plan["estimate"]["tokens"]["stages"]["parse"],
+            {"prompt_tokens": 500, "output_tokens": 1000, "cached_tokens": 250}
+        )
+        self.assertEqual(plan["estimate"]["tokens"]["stages"]["summary"]["output_tokens"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import json
+import marshal
+import tracemalloc
+import unittest
+
+from backend.src.utils.profiling import JobProfile, current_profile, profiling
+from backend.src.utils.tracing import span
+
+
+@span("parse")
+def parse(rows):
+    return [str(row) * 10 for row in rows]
+
+
+class TestProfiling(unittest.TestCase):
+    def test_spans_are_profiled_as_stages(self):
+        profile = JobProfile(top=5)
+        with profiling(profile), span("job"):
+            self.assertIs(current_profile(), profile)
+            parse(range(1000))
+            parse(range(10))
+        self.assertIsNone(current_profile())
+        self.assertFalse(tracemalloc.is_tracing())
+
+        summary = profile.summary()
+        self.assertEqual(set(summary), {"job", "parse"})
+        self.assertEqual(summary["parse"]["calls"], 2)
+        self.assertGreater(summary["parse"]["python_peak_bytes"], 0)
+        # The outer stage's peak includes its nested stages'
+        self.assertGreaterEqual(summary["job"]["python_peak_bytes"], summary["parse"]["python_peak_bytes"])
+
+        reports = profile.reports()
+        self.assertEqual(json.loads(reports["profile.json"])["parse"]["calls"], 2)
+        self.assertIn("profile_parse.pstats", reports)
+        self.assertIsInstance(marshal.loads(reports["profile_parse.pstats"]), dict)
+        self.assertIn("cumulative", reports["profile_parse.txt"])
+        self.assertIn("== parse", reports["profile_allocations.txt"])
+
+    def test_spans_without_a_profile_do_nothing(self):
+        self.assertEqual(len(parse([1])), 1)
+        with profiling(None), span("job"):
+            self.assertIsNone(current_profile())
+        self.assertFalse(tracemalloc.is_tracing())
+
+
+if __name__ == '__main__':
+    unittest.main()
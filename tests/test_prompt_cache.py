@@ -0,0 +1,118 @@
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from backend.src.services import prompt_cache
+from backend.src.services.prompt_cache import PromptCache
+
+
+class ApiError(Exception):
+    def __init__(self, code):
+        super().__init__(f"error {code}")
+        self.code = code
+
+
+class FakeCaches:
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.create_error = None
+        self.update_error = None
+        self.create_started = threading.Event()
+        self.release_create = None
+
+    def create(self, model, config):
+        self.created += 1
+        self.create_started.set()
+        if self.release_create is not None:
+            self.release_create.wait(5)
+        if self.create_error is not None:
+            raise self.create_error
+        return SimpleNamespace(name=f"cachedContents/{self.created}")
+
+    def update(self, name, config):
+        self.updated += 1
+        if self.update_error is not None:
+            raise self.update_error
+
+
+class TestPromptCache(unittest.TestCase):
+    def setUp(self):
+        patcher = patch.object(prompt_cache, "types", MagicMock())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.caches = FakeCaches()
+        self.cache = PromptCache(SimpleNamespace(caches=self.caches), ttl_seconds=100, enabled=True)
+        self.clock = 1000.0
+        clock = patch.object(prompt_cache, "time", SimpleNamespace(time=lambda: self.clock))
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    def test_handles_are_reused_until_refresh_is_due(self):
+        name = self.cache.get("model", "prompt")
+        self.assertEqual(self.cache.get("model", "prompt"), name)
+        self.assertEqual(self.caches.created, 1)
+
+        # Less than REFRESH_FRACTION of the TTL left: the TTL is extended
+        self.clock += 90
+        self.assertEqual(self.cache.get("model", "prompt"), name)
+        self.assertEqual(self.caches.updated, 1)
+        self.clock += 50
+        self.assertEqual(self.cache.get("model", "prompt"), name)
+        self.assertEqual(self.caches.created, 1)
+
+    def test_failed_refresh_creates_a_new_handle(self):
+        self.cache.get("model", "prompt")
+        self.caches.update_error = ApiError(404)
+        self.clock += 90
+        self.assertEqual(self.cache.get("model", "prompt"), "cachedContents/2")
+
+    def test_invalidate_forgets_the_handle(self):
+        self.cache.get("model", "prompt")
+        self.cache.invalidate("model", "prompt")
+        self.assertEqual(self.cache.get("model", "prompt"), "cachedContents/2")
+
+    def test_prompts_the_api_will_not_cache_are_sent_inline(self):
+        self.caches.create_error = ApiError(400)
+        self.assertIsNone(self.cache.get("model", "prompt"))
+        self.caches.create_error = None
+        self.clock += 10_000
+        self.assertIsNone(self.cache.get("model", "prompt"))
+        self.assertEqual(self.caches.created, 1)
+        self.assertIsNone(PromptCache(SimpleNamespace(caches=self.caches), enabled=False).get("model", "prompt"))
+
+    def test_transient_errors_are_retried_after_a_backoff(self):
+        self.caches.create_error = ApiError(429)
+        self.assertIsNone(self.cache.get("model", "prompt"))
+        self.assertIsNone(self.cache.get("model", "prompt"))
+        self.assertEqual(self.caches.created, 1)
+
+        self.clock += PromptCache.RETRY_BACKOFF_SECONDS
+        self.caches.create_error = TimeoutError("timed out")
+        self.assertIsNone(self.cache.get("model", "prompt"))
+        # The second failure in a row waits twice as long
+        self.clock += PromptCache.RETRY_BACKOFF_SECONDS
+        self.assertIsNone(self.cache.get("model", "prompt"))
+        self.assertEqual(self.caches.created, 2)
+
+        self.clock += PromptCache.RETRY_BACKOFF_SECONDS
+        self.caches.create_error = None
+        self.assertEqual(self.cache.get("model", "prompt"), "cachedContents/3")
+
+    def test_callers_do_not_wait_for_a_registration(self):
+        self.caches.release_create = threading.Event()
+        first = threading.Thread(target=self.cache.get, args=("model", "slow prompt"))
+        first.start()
+        self.assertTrue(self.caches.create_started.wait(5))
+
+        # The same prompt is sent inline meanwhile, without a second registration
+        self.assertIsNone(self.cache.get("model", "slow prompt"))
+        self.assertEqual(self.caches.created, 1)
+        self.caches.release_create.set()
+        first.join(5)
+        self.assertEqual(self.cache.get("model", "slow prompt"), "cachedContents/1")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+from backend.src.core.reconciliation import reconcile
+
+
+def row(amount, direction, balance):
+    return {
+        'Date': '01-01-2024',
+        'Description': 'Test',
+        'Amount': amount,
+        'Direction': direction,
+        'Balance': balance,
+        'Category': 'Unknown'
+    }
+
+
+class TestReconciliation(unittest.TestCase):
+    def test_balanced_statement(self):
+        transactions = [
+            row('10.00', 'withdrawn', '90.00'),
+            row('50.00', 'paid in', '140.00'),
+        ]
+        personal_info = {
+            'statementStartingBalance': 100.0,
+            'statementFinishingBalance': 140.0,
+            'totalPaidIn': 50.0,
+            'totalWithdrawn': 10.0,
+        }
+        report = reconcile(transactions, [(1, 1), (2, 2)], personal_info)
+
+        self.assertTrue(report.balanced)
+        self.assertEqual(report.confidence, 1.0)
+        self.assertEqual(report.suspect_pages, [])
+
+    def test_dropped_row_is_localised_to_pages(self):
+        # A 20.00 withdrawal printed on page 2 was dropped
+        transactions = [
+            row('10.00', 'withdrawn', '90.00'),
+            row('5.00', 'withdrawn', '65.00'),
+            row('1.00', 'withdrawn', '64.00'),
+        ]
+        report = reconcile(transactions, [(1, 1), (2, 2), (3, 3)], {'statementStartingBalance': 100.0})
+
+        self.assertEqual([d.index for d in report.discontinuities], [1])
+        self.assertEqual(report.suspect_pages, [1, 2])
+        self.assertLess(report.confidence, 1.0)
+
+    def test_rows_without_balance_carry_running_total(self):
+        transactions = [
+            row('10.00', 'withdrawn', ''),
+            row('10.00', 'withdrawn', '80.00'),
+        ]
+        report = reconcile(transactions, [(1, 2), (1, 2)], {'statementStartingBalance': 100.0})
+
+        self.assertEqual(report.discontinuities, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from backend.src.utils.remote_files import RemoteFileManager
+
+
+class FakeFiles:
+    def __init__(self, listed=()):
+        self.listed = list(listed)
+        self.deleted = []
+
+    def list(self):
+        return self.listed
+
+    def delete(self, name=None, file_id=None):
+        self.deleted.append(name or file_id)
+
+
+class TestRemoteFileManager(unittest.TestCase):
+    def setUp(self):
+        self.client = SimpleNamespace(files=FakeFiles())
+        self.manager = RemoteFileManager(batch_size=10, sweep_seconds=0.01, enabled=True)
+
+    def test_job_files_are_deleted_after_release(self):
+        self.manager.track("gemini", self.client, "files/a", size_bytes=100, job_id="job-1")
+        self.manager.track("gemini", self.client, "files/b", size_bytes=50, job_id="job-1")
+        self.manager.track("gemini", self.client, "files/c", size_bytes=10, job_id="job-2")
+        self.assertEqual(self.manager.stats()["outstanding_bytes"], 160)
+
+        self.assertEqual(self.manager.release_job("job-1"), 2)
+        self.assertTrue(self.manager.flush(timeout=5))
+
+        self.assertEqual(sorted(self.client.files.deleted), ["files/a", "files/b"])
+        stats = self.manager.stats()
+        self.assertEqual(stats["outstanding_files"], 1)
+        self.assertEqual(stats["outstanding_bytes"], 10)
+        self.assertEqual(stats["deleted_files"], 2)
+
+    def test_orphan_sweep_skips_recent_and_tracked_files(self):
+        now = datetime.now(timezone.utc)
+        self.client.files.listed = [
+            SimpleNamespace(name="files/old", create_time=now - timedelta(hours=3), size_bytes=5),
+            SimpleNamespace(name="files/new", create_time=now, size_bytes=5),
+            SimpleNamespace(name="files/live", create_time=now - timedelta(hours=3), size_bytes=5),
+        ]
+        self.manager.track("gemini", self.client, "files/live", job_id="job-1")
+
+        self.assertEqual(self.manager.sweep_orphans(self.client, max_age_seconds=3600), 1)
+        self.manager.flush(timeout=5)
+        self.assertEqual(self.client.files.deleted, ["files/old"])
+
+
+if __name__ == '__main__':
+    unittest.main()
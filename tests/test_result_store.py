@@ -0,0 +1,54 @@
+import hashlib
+import os
+import tempfile
+import unittest
+
+from backend.src.core.result_store import ResultStore, file_sha256, pipeline_version
+from backend.src.utils.exceptions import IdempotencyConflictError
+
+
+class TestResultStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = ResultStore(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_results_are_found_by_document_and_by_job(self):
+        version = pipeline_version(use_gemini=True, chunk_count=3)
+        self.assertIsNone(self.store.get("ab" * 32, version))
+        self.store.put("job-1", "ab" * 32, version, {"transactions": [], "complete": True})
+
+        self.assertEqual(self.store.get("ab" * 32, version).job_id, "job-1")
+        self.assertIsNone(self.store.get("ab" * 32, pipeline_version(use_gemini=True, chunk_count=4)))
+        self.assertEqual(self.store.get_job("job-1").result, {"transactions": [], "complete": True})
+
+        # A reopened store sees the same results
+        reopened = ResultStore(self.directory.name)
+        self.assertEqual(reopened.get_job("job-1").sha256, "ab" * 32)
+        self.assertEqual(self.store.stats(), {"stored": 1, "hits": 1, "misses": 2})
+
+    def test_the_first_result_of_a_document_is_kept(self):
+        self.store.put("job-1", "ab" * 32, "1.x", {"run": 1})
+        stored = self.store.put("job-2", "ab" * 32, "1.x", {"run": 2})
+
+        self.assertEqual((stored.job_id, stored.result), ("job-1", {"run": 1}))
+        self.assertIsNone(self.store.get_job("job-2"))
+        self.assertEqual(os.listdir(os.path.join(self.directory.name, "blobs", "ab")), ["job-1.json"])
+
+    def test_idempotency_keys_return_the_first_job(self):
+        self.assertEqual(self.store.claim_key("key", "job-1", "ab" * 32), "job-1")
+        self.assertEqual(self.store.claim_key("key", "job-2", "ab" * 32), "job-1")
+        with self.assertRaises(IdempotencyConflictError):
+            self.store.claim_key("key", "job-3", "cd" * 32)
+
+    def test_file_sha256(self):
+        path = os.path.join(self.directory.name, "x.pdf")
+        with open(path, "wb") as f:
+            f.write(b"%PDF-1.4")
+        self.assertEqual(file_sha256(path), hashlib.sha256(b"%PDF-1.4").hexdigest())
+
+
+if __name__ == '__main__':
+    unittest.main()
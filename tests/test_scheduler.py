@@ -0,0 +1,82 @@
+import threading
+import time
+import unittest
+
+from backend.src.core.deadlines import deadline_after, deadline_scope
+from backend.src.core.scheduler import FairQueue, FairScheduler, job_priority
+from backend.src.utils.exceptions import DeadlineExceededError
+
+WEIGHTS = {"interactive": 3, "bulk": 1}
+
+
+class TestFairQueue(unittest.TestCase):
+    def test_lanes_are_served_by_weight(self):
+        jobs = FairQueue(weights=WEIGHTS)
+        for i in range(8):
+            jobs.put(f"bulk-{i}", "bulk")
+        for i in range(4):
+            jobs.put(f"ui-{i}", "interactive")
+
+        first = [jobs.get() for _ in range(8)]
+        self.assertEqual(sum(job.startswith("ui") for job in first[:4]), 3)
+        self.assertEqual(first[4:6], ["ui-3", "bulk-1"])
+        self.assertEqual(jobs.stats()["bulk"]["waiting"], 4)
+
+    def test_tenants_take_turns_within_a_lane(self):
+        jobs = FairQueue(weights=WEIGHTS)
+        for item in ("a-1", "a-2", "a-3"):
+            jobs.put(item, "bulk", tenant="a")
+        jobs.put("b-1", "bulk", tenant="b")
+
+        self.assertEqual([jobs.get() for _ in range(4)], ["a-1", "b-1", "a-2", "a-3"])
+
+    def test_get_can_be_restricted_to_lanes(self):
+        jobs = FairQueue(weights=WEIGHTS)
+        jobs.put("bulk-0", "bulk")
+        jobs.put("ui-0", "interactive")
+        self.assertEqual(jobs.get(("interactive",)), "ui-0")
+        self.assertEqual(jobs.qsize(), 1)
+
+
+class TestFairScheduler(unittest.TestCase):
+    def wait_for_waiters(self, scheduler, count):
+        for _ in range(200):
+            lanes = scheduler.stats()["lanes"]
+            if sum(lane["waiting"] for lane in lanes.values()) == count:
+                return
+            time.sleep(0.01)
+        self.fail("callers did not queue for a slot")
+
+    def test_interactive_calls_preempt_queued_bulk_calls(self):
+        scheduler = FairScheduler(1, weights=WEIGHTS)
+        order = []
+
+        def call(lane):
+            with job_priority(lane):
+                with scheduler.slot():
+                    order.append(lane)
+
+        with scheduler.slot("bulk"):
+            bulk = threading.Thread(target=call, args=("bulk",))
+            bulk.start()
+            self.wait_for_waiters(scheduler, 1)
+            interactive = threading.Thread(target=call, args=("interactive",))
+            interactive.start()
+            self.wait_for_waiters(scheduler, 2)
+        bulk.join()
+        interactive.join()
+
+        self.assertEqual(order, ["interactive", "bulk"])
+        self.assertEqual(scheduler.stats()["running"], 0)
+
+    def test_waiting_for_a_slot_honours_the_deadline(self):
+        scheduler = FairScheduler(1, weights=WEIGHTS)
+        with scheduler.slot("bulk"):
+            with deadline_scope(deadline_after(0.05)), self.assertRaises(DeadlineExceededError):
+                with scheduler.slot("interactive"):
+                    pass
+        self.assertEqual(scheduler.stats()["lanes"]["interactive"]["waiting"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
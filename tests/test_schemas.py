@@ -0,0 +1,106 @@
+import json
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from pydantic import ValidationError
+
+from backend.src.config.settings import Settings
+from backend.src.core.schemas import CategoryAssignmentList, PassportData, TransactionList, TransactionSummary
+from backend.src.services import credential_pool
+from backend.src.services.credential_pool import CredentialPool
+from backend.src.services.gemini_service import GeminiService
+from backend.src.utils.exceptions import SchemaDecodeError
+
+SUMMARY = {
+    "personalInformation": {"name": "A Holder", "statementStartingBalance": 10.5},
+    "income": [{"category": "Salary", "amount": 2000}],
+    "outgoings": [{"category": "Gambling", "amount": 25.5}],
+    "generalSummaryAndFinancialHealthCommentary": [{"topic": "overallBalance", "commentary": "Stable"}],
+    "potentialRedFlagsAndConcerns": ["Gambling"],
+    "recommendations": ["Budget"],
+}
+
+
+def service_answering(text):
+    """A GeminiService whose model calls answer with `text`."""
+    service = GeminiService.__new__(GeminiService)
+    service._generate = lambda *args, **kwargs: SimpleNamespace(text=text, parsed=None)
+    return service
+
+
+class TestSchemas(unittest.TestCase):
+    def test_transactions_convert_to_rows(self):
+        transactions = TransactionList.model_validate({"transactions": [
+            {"date": " 01-02-2024 ", "description": "Shop", "amount": 4.5, "direction": "withdrawn", "balance": -10, "page": 2},
+            {"date": "02-02-2024", "description": "Pay", "direction": "paid in"},
+        ]})
+        first, second = transactions.to_rows()
+        self.assertEqual(first, {
+            "Date": "01-02-2024", "Description": "Shop", "Amount": "4.50",
+            "Direction": "withdrawn", "Balance": "-10.00", "Category": "", "Page": 2,
+        })
+        self.assertEqual((second["Amount"], second["Balance"]), ("", ""))
+        self.assertNotIn("Page", second)
+
+    def test_assignments_apply_by_index(self):
+        rows = [{"Description": "a"}, {"Description": "b"}, {"Description": "c"}]
+        assignments = CategoryAssignmentList.model_validate({"assignments": [
+            {"index": 2, "category": "Salary"},
+            {"index": 0, "category": "Gambling"},
+            # Indices outside the batch are ignored
+            {"index": 7, "category": "Unknown"},
+        ]})
+        categorized = assignments.apply_to(rows)
+        self.assertEqual([row["Category"] for row in categorized], ["Gambling", "", "Salary"])
+        # The input rows are left untouched
+        self.assertNotIn("Category", rows[0])
+
+    def test_unknown_categories_are_rejected(self):
+        with self.assertRaises(ValidationError):
+            CategoryAssignmentList.model_validate({"assignments": [{"index": 0, "category": "Groceries"}]})
+
+    def test_summary_converts_to_the_ui_structure(self):
+        summary = TransactionSummary.model_validate(SUMMARY).to_dict()
+        self.assertEqual(summary["personalInformation"]["name"], "A Holder")
+        self.assertEqual(summary["summaryOfIncomeAndOutgoings"], {
+            "income": {"Salary": 2000.0}, "outgoings": {"Gambling": 25.5},
+        })
+        self.assertEqual(summary["generalSummaryAndFinancialHealthCommentary"], {"overallBalance": "Stable"})
+        self.assertEqual(summary["recommendations"], ["Budget"])
+
+
+@patch.object(Settings, "GEMINI_STRUCTURED_OUTPUT", True)
+class TestStructuredDecoding(unittest.TestCase):
+    def test_responses_are_decoded_into_the_schema(self):
+        parsed, text = service_answering(json.dumps(SUMMARY)).generate_structured("prompt", "rows", TransactionSummary)
+        self.assertIsInstance(parsed, TransactionSummary)
+        self.assertEqual(text, json.dumps(SUMMARY))
+
+    def test_decode_errors_keep_the_response_text(self):
+        with self.assertRaises(SchemaDecodeError) as raised:
+            service_answering('{"income": []}').generate_structured("prompt", "rows", TransactionSummary)
+        self.assertEqual(raised.exception.response_text, '{"income": []}')
+
+    def test_undecodable_summary_falls_back_to_the_model_text(self):
+        summary = service_answering("Not JSON at all").generate_transaction_summary([{"Description": "a"}])
+        self.assertEqual(summary, {"raw_summary": "Not JSON at all"})
+
+    def test_undecodable_transactions_parse_to_no_rows(self):
+        self.assertEqual(service_answering("[]").extract_transactions(None), ([], ""))
+
+    @patch.object(credential_pool, "get_credential_pool", lambda: CredentialPool(["key"]))
+    def test_identity_documents_are_decoded_and_their_uploads_released(self):
+        for text, expected in (('{"surname": "Holder"}', {"surname": "Holder"}), ("[]", {"raw_response": "[]"})):
+            service = service_answering(text)
+            upload = SimpleNamespace(name="files/1")
+            service.upload_to_gemini = lambda path: upload
+            service.wait_for_files_active = lambda files: None
+            released = []
+            service.release_uploads = lambda *files: released.extend(files)
+            self.assertEqual(service.extract_document_fields("passport.jpg", "prompt", PassportData), expected)
+            self.assertEqual(released, [upload])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,193 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+import PyPDF2
+
+from backend.src.config.settings import Settings
+from backend.src.core import single_flight
+from backend.src.core.deadlines import deadline_after
+from backend.src.core.job_context import JobContext
+from backend.src.core.journal import open_journal
+from backend.src.core.single_flight import SingleFlight
+from backend.src.services import credential_pool
+from backend.src.services.credential_pool import CredentialPool
+from backend.src.services.gemini_service import StatementGeminiService
+from backend.src.utils.exceptions import DeadlineExceededError
+
+
+class TestSingleFlight(unittest.TestCase):
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.release = threading.Event()
+        self.calls = 0
+
+    def slow_job(self, value):
+        self.calls += 1
+        self.release.wait(5)
+        if value == "fail":
+            raise ValueError("boom")
+        return {"value": value, "transactions": [1, 2]}
+
+    def join_in_background(self, value, results):
+        def run():
+            try:
+                results.append(self.flight.do("doc", self.slow_job, value))
+            except Exception as e:
+                results.append(e)
+        thread = threading.Thread(target=run)
+        thread.start()
+        return thread
+
+    def wait_until_in_flight(self):
+        for _ in range(200):
+            if self.flight.stats()["in_flight"]:
+                return
+            time.sleep(0.01)
+        self.fail("job did not start")
+
+    def test_identical_jobs_share_one_run(self):
+        results = []
+        leader = self.join_in_background("a", results)
+        self.wait_until_in_flight()
+        follower = self.join_in_background("a", results)
+        time.sleep(0.05)
+        self.release.set()
+        leader.join()
+        follower.join()
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results[0], results[1])
+        self.assertIsNot(results[0], results[1])
+        self.assertEqual(self.flight.stats(), {"in_flight": 0, "led": 1, "coalesced": 1})
+
+        # Once the job has returned, the next caller runs afresh
+        self.assertEqual(self.flight.do("doc", self.slow_job, "b")["value"], "b")
+        self.assertEqual(self.calls, 2)
+
+    def test_errors_reach_every_caller(self):
+        results = []
+        threads = [self.join_in_background("fail", results)]
+        self.wait_until_in_flight()
+        threads.append(self.join_in_background("fail", results))
+        time.sleep(0.05)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+
+    def test_waiting_caller_honours_its_deadline(self):
+        leader = self.join_in_background("a", [])
+        self.wait_until_in_flight()
+        with self.assertRaises(DeadlineExceededError):
+            self.flight.do("doc", self.slow_job, "a", deadline=deadline_after(0.05))
+        self.release.set()
+        leader.join()
+
+    def test_unusable_results_are_run_again(self):
+        results, joined = [], []
+        leader = self.join_in_background("partial", results)
+        self.wait_until_in_flight()
+
+        def follow():
+            results.append(self.flight.do(
+                "doc", self.slow_job, "full",
+                reusable=lambda result: result["value"] != "partial",
+                on_join=joined.append
+            ))
+        follower = threading.Thread(target=follow)
+        follower.start()
+        time.sleep(0.05)
+        self.release.set()
+        leader.join()
+        follower.join()
+
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(sorted(result["value"] for result in results), ["full", "partial"])
+        # The follower was handed the leader's shared object (none here) when it joined
+        self.assertEqual(joined, [None])
+
+
+@patch.object(Settings, "SINGLE_FLIGHT_ENABLED", True)
+@patch.object(Settings, "RECONCILIATION_ENABLED", False)
+@patch.object(credential_pool, "get_credential_pool", lambda: CredentialPool(["key"]))
+class TestDuplicateStatements(unittest.TestCase):
+    def setUp(self):
+        patcher = patch.object(single_flight, "_single_flight", SingleFlight())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+        self.pdf_path = os.path.join(self.tmp, "statement.pdf")
+        writer = PyPDF2.PdfWriter()
+        for _ in range(2):
+            writer.add_blank_page(width=100, height=100)
+        with open(self.pdf_path, "wb") as f:
+            writer.write(f)
+
+        self.release = threading.Event()
+        self.calls = []
+        service = StatementGeminiService.__new__(StatementGeminiService)
+        service.split_pdf_with_page_ranges = lambda pdf_path, chunk_count, temp_dir: [
+            (pdf_path, 1, 1), (pdf_path, 2, 2)
+        ]
+        service.process_chunk = self.process_chunk
+        service.extract_personal_info = lambda **kwargs: self.calls.append("personal_info") or {"fullName": "A Holder"}
+        service.generate_transaction_summary = lambda *args, **kwargs: self.calls.append("summary") or {"total": 2}
+        self.service = service
+
+    def process_chunk(self, subpdf_path, index, first_page, last_page, context):
+        self.calls.append(f"chunk:{index}")
+        self.release.wait(5)
+        transactions = [{"Description": f"row {index}", "Page": first_page}]
+        context.journal.record("categorize", transactions, key=index)
+        return transactions
+
+    def context_in(self, name):
+        output_dir = os.path.join(self.tmp, name)
+        return JobContext(output_dir=output_dir, journal=open_journal(output_dir, self.pdf_path, chunk_count=2))
+
+    def test_duplicate_uploads_share_one_run(self):
+        contexts = [self.context_in("job_1"), self.context_in("job_2")]
+        events, results = [], {}
+
+        def run(context):
+            results[context.output_dir] = self.service.process_document(self.pdf_path, chunk_count=2, context=context)
+        contexts[1].listeners.append(lambda stage, status, details: events.append((stage, status)))
+        leader = threading.Thread(target=run, args=(contexts[0],))
+        leader.start()
+        for _ in range(200):
+            if self.calls:
+                break
+            time.sleep(0.01)
+        follower = threading.Thread(target=run, args=(contexts[1],))
+        follower.start()
+        time.sleep(0.05)
+        self.release.set()
+        leader.join(5)
+        follower.join(5)
+
+        self.assertEqual(self.calls, ["chunk:1", "chunk:2", "personal_info", "summary"])
+        first, second = (results[context.output_dir] for context in contexts)
+        self.assertEqual(first, second)
+        self.assertIsNot(first["transactions"], second["transactions"])
+        self.assertIn(("summary", "completed"), events)
+
+        # The follower's own journal holds the result, ready for a resume
+        leader_journal, follower_journal = (context.journal for context in contexts)
+        self.assertNotEqual(leader_journal.path, follower_journal.path)
+        for index in (1, 2):
+            self.assertEqual(follower_journal.get("categorize", index), leader_journal.get("categorize", index))
+        self.assertEqual(follower_journal.get("personal_info"), {"fullName": "A Holder"})
+        self.assertEqual(follower_journal.get("summary"), {"total": 2})
+        self.assertEqual(contexts[1].transactions, second["transactions"])
+
+
+if __name__ == '__main__':
+    unittest.main()
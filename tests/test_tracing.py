@@ -0,0 +1,43 @@
+import json
+import unittest
+
+from backend.src.core.deadlines import deadline_after, run_within
+from backend.src.utils.tracing import Trace, current_trace, span, tracing
+
+
+@span("parse")
+def parse(rows):
+    return len(rows)
+
+
+class TestTracing(unittest.TestCase):
+    def test_spans_are_recorded_across_stage_threads(self):
+        trace = Trace("statement.pdf")
+        with tracing(trace), span("job", provider="gemini"):
+            with span("chunk", index=1):
+                self.assertEqual(run_within(deadline_after(5), "chunk 1", parse, [1, 2]), 2)
+            with self.assertRaises(ValueError), span("generate"):
+                raise ValueError("boom")
+        self.assertIsNone(current_trace())
+
+        exported = json.loads(json.dumps(trace.to_dict()))
+        spans = {event["name"]: event for event in exported["traceEvents"] if event["ph"] == "X"}
+        self.assertEqual(set(spans), {"job", "chunk", "parse", "generate"})
+        self.assertEqual(spans["chunk"]["args"], {"index": 1})
+        self.assertEqual(spans["generate"]["args"], {"error": "ValueError"})
+        # The stage ran on a stage thread, within its chunk
+        self.assertNotEqual(spans["parse"]["tid"], spans["chunk"]["tid"])
+        self.assertGreaterEqual(spans["parse"]["ts"], spans["chunk"]["ts"])
+        self.assertLessEqual(spans["chunk"]["ts"] + spans["chunk"]["dur"], spans["job"]["ts"] + spans["job"]["dur"])
+        threads = [event for event in exported["traceEvents"] if event["name"] == "thread_name"]
+        self.assertEqual(len(threads), 2)
+
+    def test_spans_outside_a_trace_record_nothing(self):
+        self.assertEqual(parse([1]), 1)
+        with span("job"):
+            pass
+        self.assertIsNone(current_trace())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+import unittest
+
+from backend.src.api.uploads import check_content_length, store_upload
+from backend.src.utils.exceptions import UploadRejectedError
+
+
+async def blocks(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+class TestStoreUpload(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def store(self, *chunks, max_size=1024):
+        return asyncio.run(store_upload(blocks(*chunks), self.directory, "../statement.pdf", max_size=max_size))
+
+    def test_upload_is_stored_and_hashed(self):
+        upload = self.store(b"%PD", b"F-1.7 body", b" more")
+        self.assertEqual(upload.path, os.path.join(self.directory, "statement.pdf"))
+        self.assertEqual(upload.size_bytes, 18)
+        self.assertEqual(upload.sha256, hashlib.sha256(b"%PDF-1.7 body more").hexdigest())
+        with open(upload.path, "rb") as f:
+            self.assertEqual(f.read(), b"%PDF-1.7 body more")
+
+    def test_oversized_upload_is_rejected(self):
+        with self.assertRaises(UploadRejectedError) as raised:
+            self.store(b"%PDF-" + b"x" * 600, b"x" * 600)
+        self.assertEqual(raised.exception.status_code, 413)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_non_pdf_is_rejected_from_its_first_block(self):
+        def never():
+            raise AssertionError("read past the first block")
+
+        async def upload():
+            yield b"PK\x03\x04"
+            never()
+
+        with self.assertRaises(UploadRejectedError) as raised:
+            asyncio.run(store_upload(upload(), self.directory, "statement.pdf"))
+        self.assertEqual(raised.exception.status_code, 415)
+        self.assertEqual(os.listdir(self.directory), [])
+
+        with self.assertRaises(UploadRejectedError):
+            self.store(b"%PD")
+
+    def test_declared_length_over_the_limit_is_rejected(self):
+        check_content_length("2048", max_size=1024)
+        check_content_length(None, max_size=1024)
+        with self.assertRaises(UploadRejectedError):
+            check_content_length(str(10 * 1024 * 1024), max_size=1024)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+from types import SimpleNamespace
+
+from backend.src.utils.tracing import span
+from backend.src.utils.usage import Usage, accounting, call_cost, record_usage, usage_counts
+
+
+def gemini_response(prompt, output, cached=0, thoughts=None):
+    return SimpleNamespace(text="", usage_metadata=SimpleNamespace(
+        prompt_token_count=prompt,
+        candidates_token_count=output,
+        cached_content_token_count=cached,
+        thoughts_token_count=thoughts,
+    ))
+
+
+class TestUsage(unittest.TestCase):
+    def test_usage_counts(self):
+        self.assertEqual(
+            usage_counts(gemini_response(1000, 200, cached=800, thoughts=50)),
+            {"prompt_tokens": 1000, "output_tokens": 250, "cached_tokens": 800}
+        )
+        run = SimpleNamespace(usage=SimpleNamespace(prompt_tokens=10, completion_tokens=5, prompt_tokens_details=None))
+        self.assertEqual(usage_counts(run), {"prompt_tokens": 10, "output_tokens": 5, "cached_tokens": 0})
+        self.assertEqual(usage_counts(SimpleNamespace(text="")), {"prompt_tokens": 0, "output_tokens": 0, "cached_tokens": 0})
+
+    def test_call_cost_charges_cached_tokens_at_the_cached_price(self):
+        # 200k uncached + 800k cached prompt tokens and 100k output tokens of gemini-2.0-flash
+        self.assertAlmostEqual(call_cost("gemini-2.0-flash", 1_000_000, 100_000, 800_000), 0.02 + 0.02 + 0.04)
+        self.assertIsNone(call_cost("unknown-model", 10, 10))
+
+    def test_calls_are_accounted_to_the_current_stage_and_job(self):
+        usage = Usage()
+        with accounting(usage):
+            with span("parse"):
+                record_usage("gemini", "gemini-2.0-flash", gemini_response(1_000_000, 0))
+                record_usage("gemini", "gemini-2.5-pro", gemini_response(0, 100_000))
+            with span("categorize"):
+                record_usage("gemini", "experimental-model", gemini_response(500, 20))
+        # Outside a job, calls are only counted in the metrics
+        record_usage("gemini", "gemini-2.0-flash", gemini_response(1_000_000, 0))
+
+        totals = usage.to_dict()
+        self.assertEqual(totals["calls"], 3)
+        self.assertEqual(totals["prompt_tokens"], 1_000_500)
+        self.assertAlmostEqual(totals["cost_usd"], 0.1 + 1.0)
+        self.assertEqual(totals["stages"]["parse"]["calls"], 2)
+        self.assertEqual(totals["stages"]["categorize"]["cost_usd"], 0.0)
+        self.assertEqual(totals["models"]["gemini-2.5-pro"]["output_tokens"], 100_000)
+        self.assertEqual(totals["unpriced_models"], ["experimental-model"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+from unittest.mock import patch
+
+from backend.src.config.settings import Settings
+from backend.src.core.validation import chunk_issue_count, invalid_category_rows
+from backend.src.services.gemini_service import StatementGeminiService
+
+
+def row(balance, amount="10.00", direction="withdrawn", date="01-02-2024", category="Gambling"):
+    return {"Date": date, "Description": "x", "Amount": amount, "Direction": direction, "Balance": balance, "Category": category}
+
+
+GOOD = [row("90.00"), row("80.00")]
+BROKEN = [row("90.00"), row("50.00"), row("40.00", date="31/02/2024")]
+
+
+class TestValidation(unittest.TestCase):
+    def test_chunk_issues_count_invalid_rows_and_balance_breaks(self):
+        self.assertEqual(chunk_issue_count(GOOD), 0)
+        # One balance break and one bad date
+        self.assertEqual(chunk_issue_count(BROKEN), 2)
+
+    def test_empty_chunks_are_a_problem_only_with_text(self):
+        self.assertEqual(chunk_issue_count([]), 1)
+        self.assertEqual(chunk_issue_count([], has_text=False), 0)
+
+    def test_unknown_and_missing_categories_are_invalid(self):
+        rows = [row("1"), row("1", category="Unknown"), row("1", category=""), row("1", category="Groceries")]
+        self.assertEqual(invalid_category_rows(rows), [1, 2, 3])
+
+
+@patch.object(Settings, "GEMINI_ESCALATION_ENABLED", True)
+@patch.object(Settings, "GEMINI_ESCALATION_MODEL", "strong-model")
+@patch.object(Settings, "GEMINI_MODEL_ROUTES", {"parse": "fast-model", "categorize": "fast-model"})
+class TestEscalation(unittest.TestCase):
+    def setUp(self):
+        self.service = StatementGeminiService.__new__(StatementGeminiService)
+        self.models = []
+
+    def answer_parse(self, by_model, has_text=True):
+        def extract_transactions(pdf_obj, prompt_template=None, export_path=None, model=None):
+            model = model or self.service.model_for("parse")
+            self.models.append(model)
+            return [dict(r) for r in by_model[model]], ""
+        self.service.extract_transactions = extract_transactions
+        self.service.pdf_has_text = lambda path: has_text
+
+    def test_stages_are_routed(self):
+        self.assertEqual(StatementGeminiService.model_for("parse"), "fast-model")
+        self.assertEqual(StatementGeminiService.model_for("summary"), Settings.GEMINI_DEFAULT_MODEL)
+
+    def test_valid_chunks_are_not_escalated(self):
+        self.answer_parse({"fast-model": GOOD})
+        self.assertEqual(self.service.parse_chunk(None), GOOD)
+        self.assertEqual(self.models, ["fast-model"])
+
+    def test_invalid_chunks_keep_the_better_attempt(self):
+        self.answer_parse({"fast-model": BROKEN, "strong-model": GOOD})
+        self.assertEqual(self.service.parse_chunk(None), GOOD)
+        self.assertEqual(self.models, ["fast-model", "strong-model"])
+
+        self.models.clear()
+        self.answer_parse({"fast-model": GOOD[:1] + BROKEN[1:2], "strong-model": BROKEN})
+        self.assertEqual(self.service.parse_chunk(None), GOOD[:1] + BROKEN[1:2])
+
+    def test_empty_chunks_without_text_are_not_escalated(self):
+        self.answer_parse({"fast-model": [], "strong-model": GOOD}, has_text=False)
+        self.assertEqual(self.service.parse_chunk(None, pdf_path="cover.pdf"), [])
+        self.assertEqual(self.models, ["fast-model"])
+
+        self.answer_parse({"fast-model": [], "strong-model": GOOD}, has_text=True)
+        self.assertEqual(self.service.parse_chunk(None, pdf_path="statement.pdf"), GOOD)
+
+    def test_only_uncategorized_rows_are_escalated(self):
+        calls = []
+
+        def categorize_transaction_rows(transactions, export_path=None, model=None):
+            calls.append((model, len(transactions)))
+            category = "Salary" if model == "strong-model" else None
+            return [dict(r, Category=category or r["Category"]) for r in transactions]
+        self.service.categorize_transaction_rows = categorize_transaction_rows
+
+        rows = [row("90.00"), row("80.00", category="Unknown"), row("70.00", category="")]
+        categorized = self.service.categorize_chunk(rows)
+        self.assertEqual([r["Category"] for r in categorized], ["Gambling", "Salary", "Salary"])
+        self.assertEqual(calls, [(None, 3), ("strong-model", 2)])
+
+
+if __name__ == '__main__':
+    unittest.main()
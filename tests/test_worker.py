@@ -0,0 +1,104 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from backend.src.api import worker as worker_module
+from backend.src.api.worker import Worker, _handle_line
+from backend.src.core import job_context
+from backend.src.core.result_store import ResultStore
+
+
+class EchoWorker(Worker):
+    """Worker whose jobs just echo their request."""
+
+    def process(self, request, on_progress=None):
+        if request.get("fail"):
+            raise ValueError("boom")
+        if on_progress is not None:
+            on_progress("chunk:0", "parsed", {"transactions": [{"amount": 1}]})
+        return {"path": request.get("path")}
+
+
+class TestWorker(unittest.TestCase):
+    def test_jobs_are_answered_by_id(self):
+        worker = EchoWorker(concurrency=2, max_jobs=0)
+        responses = []
+        _handle_line(worker, '{"id": "a", "type": "statement", "path": "x.pdf"}\n', responses.append)
+        _handle_line(worker, '{"id": "b", "type": "statement", "fail": true}\n', responses.append)
+        worker.drain()
+
+        by_id = {r["id"]: r for r in responses}
+        self.assertEqual(by_id["a"], {"id": "a", "ok": True, "result": {"path": "x.pdf"}})
+        self.assertFalse(by_id["b"]["ok"])
+        self.assertEqual(by_id["b"]["error"], "boom")
+
+    def test_events_are_sent_before_the_answer(self):
+        worker = EchoWorker(concurrency=1, max_jobs=0)
+        responses = []
+        _handle_line(worker, '{"id": "a", "type": "statement", "path": "x.pdf", "events": true}', responses.append)
+        worker.drain()
+
+        self.assertEqual(responses[0], {
+            "id": "a",
+            "event": {"stage": "chunk:0", "status": "parsed", "transactions": [{"amount": 1}]}
+        })
+        self.assertTrue(responses[1]["ok"])
+
+    def test_recycles_after_max_jobs(self):
+        worker = EchoWorker(concurrency=1, max_jobs=2)
+        responses = []
+        self.assertTrue(_handle_line(worker, '{"id": "1", "type": "statement"}', responses.append))
+        # The second job exhausts the worker, so it stops reading
+        self.assertFalse(_handle_line(worker, '{"id": "2", "type": "statement"}', responses.append))
+        self.assertFalse(_handle_line(worker, '{"id": "3", "type": "statement"}', responses.append))
+        worker.drain()
+
+        refused = [r for r in responses if r.get("retry")]
+        self.assertEqual([r["id"] for r in refused], ["3"])
+        self.assertEqual(worker.completed, 2)
+
+
+
+class TestStoredStatements(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.pdf_path = os.path.join(directory.name, "statement.pdf")
+        with open(self.pdf_path, "wb") as f:
+            f.write(b"%PDF")
+        self.store = ResultStore(os.path.join(directory.name, "results"))
+        for patcher in (
+            patch.object(worker_module, "get_result_store", return_value=self.store),
+            patch.object(worker_module, "record_job"),
+            patch.object(job_context, "get_remote_file_manager", return_value=MagicMock()),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.worker = Worker(concurrency=1, max_jobs=0)
+        self.service = MagicMock()
+        self.service.process_document.return_value = {"transactions": [], "complete": True}
+        self.worker._services["statement"] = self.service
+
+    def process(self, request_id, **options):
+        return self.worker.process({"id": request_id, "type": "statement", "path": self.pdf_path, "options": options})
+
+    def test_results_are_stored_under_the_request_id(self):
+        self.assertEqual(self.process("job-1")["job_id"], "job-1")
+        self.assertEqual(self.store.get_job("job-1").result["transactions"], [])
+
+        # A duplicate is answered from the store, with the id of the job that produced it
+        self.assertEqual(self.process("job-2")["job_id"], "job-1")
+        self.assertEqual(self.service.process_document.call_count, 1)
+
+    def test_traced_requests_are_not_answered_from_the_store(self):
+        self.process("job-1")
+        result = self.process("job-2", include_trace=True)
+        self.assertEqual(result["job_id"], "job-2")
+        self.assertIn("trace", result)
+        self.assertEqual(self.service.process_document.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,18 @@
+import { NextResponse } from 'next/server';
+import { getPythonWorker } from '@/lib/python-worker';
+
+// Metrics of the backend worker in the Prometheus text format, for scraping
+export async function GET() {
+  try {
+    const text = await getPythonWorker().metrics();
+    return new NextResponse(text, {
+      headers: { 'Content-Type': 'text/plain; version=0.0.4; charset=utf-8' },
+    });
+  } catch (error) {
+    console.error('Error reading worker metrics:', error);
+    return NextResponse.json({
+      error: 'Failed to read metrics',
+      details: error instanceof Error ? error.message : String(error)
+    }, { status: 500 });
+  }
+}
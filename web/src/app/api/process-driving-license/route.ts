@@ -1,10 +1,7 @@
 import { NextRequest, NextResponse } from 'next/server';
-import { exec } from 'child_process';
 import fs from 'fs';
 import path from 'path';
-import { promisify } from 'util';
-
-const execPromise = promisify(exec);
+import { getPythonWorker } from '@/lib/python-worker';
 
 // Temporary directory for storing uploaded images
 const TEMP_DIR = path.join(process.cwd(), 'temp');
@@ -54,32 +51,17 @@ export async function POST(request: NextRequest) {
     const jobOutputDir = path.join(OUTPUT_DIR, `job_${timestamp}`);
     fs.mkdirSync(jobOutputDir, { recursive: true });
 
-    // Get the absolute path to the backend script
-    const backendScriptPath = path.join(process.cwd(), '..', 'backend', 'parse_driving_license.py');
-
-    // Execute the Python script
-    const { stdout, stderr } = await execPromise(
-      `python "${backendScriptPath}" --image "${filePath}" --output "${path.join(jobOutputDir, 'driving_license_info.json')}"`
-    );
-
-    console.log('Python script output:', stdout);
-    if (stderr) {
-      console.error('Python script error:', stderr);
-    }
-
-    // Read the result file
-    const resultPath = path.join(jobOutputDir, 'driving_license_info.json');
-    let result = null;
-    
-    if (fs.existsSync(resultPath)) {
-      const resultData = fs.readFileSync(resultPath, 'utf-8');
-      result = JSON.parse(resultData);
-    } else {
+    // Process the image on the persistent backend worker
+    const result = await getPythonWorker().submit('driving_license', filePath, jobOutputDir);
+    if (!result) {
       return NextResponse.json({ 
-        error: 'Failed to process driving license image. Result file not found.' 
+        error: 'Failed to process driving license image. No data was extracted.' 
       }, { status: 500 });
     }
 
+    // Keep a copy of the result with the job's output
+    fs.writeFileSync(path.join(jobOutputDir, 'driving_license_info.json'), JSON.stringify(result, null, 2));
+
     // Clean up the temporary file
     fs.unlinkSync(filePath);
 
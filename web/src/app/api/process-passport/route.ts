@@ -1,10 +1,7 @@
 import { NextRequest, NextResponse } from 'next/server';
-import { exec } from 'child_process';
 import fs from 'fs';
 import path from 'path';
-import { promisify } from 'util';
-
-const execPromise = promisify(exec);
+import { getPythonWorker } from '@/lib/python-worker';
 
 // Temporary directory for storing uploaded images
 const TEMP_DIR = path.join(process.cwd(), 'temp');
@@ -54,59 +51,22 @@ export async function POST(request: NextRequest) {
     const jobOutputDir = path.join(OUTPUT_DIR, `job_${timestamp}`);
     fs.mkdirSync(jobOutputDir, { recursive: true });
 
-    // Get the absolute path to the backend script
-    const backendScriptPath = path.join(process.cwd(), '..', 'backend', 'parse_passport.py');
-
-    // Execute the Python script
-    const { stdout, stderr } = await execPromise(
-      `python "${backendScriptPath}" --image "${filePath}" --output "${path.join(jobOutputDir, 'passport_data.json')}"`
-    );
-
-    console.log('Python script output:', stdout);
-    if (stderr) {
-      console.error('Python script error:', stderr);
-    }
-
-    // Read the result file
-    const resultPath = path.join(jobOutputDir, 'passport_data.json');
-    let result = null;
-    
-    if (fs.existsSync(resultPath)) {
-      const resultData = fs.readFileSync(resultPath, 'utf-8');
-      console.log('Raw passport data:', resultData);
-      
-      try {
-        // Extract the first JSON object from the file
-        const jsonStart = resultData.indexOf('{');
-        const jsonEnd = resultData.indexOf('}') + 1;
-        
-        if (jsonStart >= 0 && jsonEnd > jsonStart) {
-          const jsonContent = resultData.substring(jsonStart, jsonEnd);
-          console.log('Extracted JSON content:', jsonContent);
-          result = JSON.parse(jsonContent);
-          console.log('Parsed passport data:', result);
-        } else {
-          // Try parsing the entire file
-          result = JSON.parse(resultData);
-        }
-        
-        // Ensure the result has the required fields for a passport
-        if (!result.passportNumber) {
-          console.warn('Passport data missing passport number:', result);
-        }
-      } catch (error) {
-        console.error('Error parsing passport data:', error);
-        return NextResponse.json({ 
-          error: 'Failed to parse passport data', 
-          details: error instanceof Error ? error.message : String(error) 
-        }, { status: 500 });
-      }
-    } else {
+    // Process the image on the persistent backend worker
+    const result = await getPythonWorker().submit('passport', filePath, jobOutputDir);
+    if (!result) {
       return NextResponse.json({ 
-        error: 'Failed to process passport image. Result file not found.' 
+        error: 'Failed to process passport image. No data was extracted.' 
       }, { status: 500 });
     }
 
+    // Ensure the result has the required fields for a passport
+    if (!result.passportNumber) {
+      console.warn('Passport data missing passport number:', result);
+    }
+
+    // Keep a copy of the result with the job's output
+    fs.writeFileSync(path.join(jobOutputDir, 'passport_data.json'), JSON.stringify(result, null, 2));
+
     // Clean up the temporary file
     fs.unlinkSync(filePath);
 
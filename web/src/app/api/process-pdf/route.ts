@@ -1,10 +1,7 @@
 import { NextRequest, NextResponse } from 'next/server';
-import { exec } from 'child_process';
 import fs from 'fs';
 import path from 'path';
-import { promisify } from 'util';
-
-const execPromise = promisify(exec);
+import { getPythonWorker } from '@/lib/python-worker';
 
 // Temporary directory for storing uploaded PDFs
 const TEMP_DIR = path.join(process.cwd(), 'temp');
@@ -24,25 +21,20 @@ if (!fs.existsSync(BACKEND_OUTPUT_DIR)) {
   fs.mkdirSync(BACKEND_OUTPUT_DIR, { recursive: true });
 }
 
-// Helper function to clean JSON string from markdown code blocks
-function cleanJsonString(jsonString: string): string {
-  let cleaned = jsonString.trim();
-  
-  // Remove markdown code block markers if present
-  if (cleaned.startsWith("```json")) {
-    cleaned = cleaned.substring(7);
-  } else if (cleaned.startsWith("```")) {
-    cleaned = cleaned.substring(3);
-  }
-  
-  if (cleaned.endsWith("```")) {
-    cleaned = cleaned.substring(0, cleaned.length - 3);
+// Summary text returned to the UI for a statement job's result. The backend returns
+// the schema-validated summary object, or the model's text as raw_summary when the
+// response did not match the schema.
+function summaryText(result: any, timestamp: number): string {
+  if (!result.summary) {
+    return 'No summary was generated. Processing may have failed.';
   }
-  
-  // Trim again after removing markers
-  cleaned = cleaned.trim();
-  
-  return cleaned;
+  const summary = result.summary.raw_summary ?? JSON.stringify(result.summary, null, 2);
+
+  // Save the summary to the backend output directory
+  const rawResponsePath = path.join(BACKEND_OUTPUT_DIR, `raw_gemini_response_${timestamp}.txt`);
+  fs.writeFileSync(rawResponsePath, summary);
+  console.log(`Summary saved to: ${rawResponsePath}`);
+  return summary;
 }
 
 export async function POST(request: NextRequest) {
@@ -73,51 +65,39 @@ export async function POST(request: NextRequest) {
     const jobOutputDir = path.join(OUTPUT_DIR, `job_${timestamp}`);
     fs.mkdirSync(jobOutputDir, { recursive: true });
 
-    // Get the absolute path to the backend script
-    const backendScriptPath = path.join(process.cwd(), '..', 'backend', 'run_gemini_processor.py');
-
-    // Execute the Python script
-    const { stdout, stderr } = await execPromise(
-      `python "${backendScriptPath}" --pdf "${filePath}" --output "${jobOutputDir}"`
-    );
-
-    console.log('Python script output:', stdout);
-    if (stderr) {
-      console.error('Python script error:', stderr);
+    // With ?stream=1 the response is NDJSON: the job's pipeline events as they happen
+    // ({"type": "event", "event": {...}}), then {"type": "result", ...} or {"type": "error", ...}
+    if (request.nextUrl.searchParams.get('stream') === '1') {
+      const encoder = new TextEncoder();
+      const stream = new ReadableStream({
+        start(controller) {
+          const send = (line: Record<string, unknown>) =>
+            controller.enqueue(encoder.encode(JSON.stringify(line) + '\n'));
+          getPythonWorker()
+            .submit('statement', filePath, jobOutputDir, {}, (event) => send({ type: 'event', event }))
+            .then((result) => {
+              console.log(`Worker returned ${result.transactions?.length ?? 0} transactions`);
+              send({ type: 'result', success: true, summary: summaryText(result, timestamp) });
+            })
+            .catch((error) => {
+              console.error('Error processing PDF:', error);
+              send({ type: 'error', error: 'Failed to process PDF', details: error instanceof Error ? error.message : String(error) });
+            })
+            .finally(() => {
+              fs.unlinkSync(filePath);
+              controller.close();
+            });
+        },
+      });
+      return new Response(stream, {
+        headers: { 'Content-Type': 'application/x-ndjson', 'Cache-Control': 'no-cache' },
+      });
     }
 
-    // Read the summary file
-    const summaryPath = path.join(jobOutputDir, 'summary.txt');
-    let summary = '';
-    let cleanedSummary = '';
-    
-    if (fs.existsSync(summaryPath)) {
-      summary = fs.readFileSync(summaryPath, 'utf-8');
-      console.log('Raw summary file content:', summary);
-      
-      // Save the raw Gemini response to the backend output directory
-      const rawResponsePath = path.join(BACKEND_OUTPUT_DIR, `raw_gemini_response_${timestamp}.txt`);
-      fs.writeFileSync(rawResponsePath, summary);
-      console.log(`Raw Gemini response saved to: ${rawResponsePath}`);
-      
-      // Clean the JSON string by removing markdown code block markers
-      cleanedSummary = cleanJsonString(summary);
-      console.log('Cleaned summary content:', cleanedSummary);
-      
-      // Try to parse the JSON to verify it's valid
-      try {
-        const parsedSummary = JSON.parse(cleanedSummary);
-        console.log('Parsed summary income:', parsedSummary.summaryOfIncomeAndOutgoings?.income);
-        console.log('Parsed summary outgoings:', parsedSummary.summaryOfIncomeAndOutgoings?.outgoings);
-        
-        // Replace the original summary with the cleaned version
-        summary = cleanedSummary;
-      } catch (parseError) {
-        console.error('Error parsing summary JSON:', parseError);
-      }
-    } else {
-      summary = 'Summary file not found. Processing may have failed.';
-    }
+    // Process the statement on the persistent backend worker
+    const result = await getPythonWorker().submit('statement', filePath, jobOutputDir);
+    console.log(`Worker returned ${result.transactions?.length ?? 0} transactions`);
+    const summary = summaryText(result, timestamp);
 
     // Clean up the temporary file
     fs.unlinkSync(filePath);
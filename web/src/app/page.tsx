@@ -273,38 +273,84 @@ export default function Home() {
     }
   };
 
+  // Chat message for a statement pipeline event streamed by /api/process-pdf
+  const describeStatementEvent = (event: { stage: string; status: string; [detail: string]: any }): string | null => {
+    if (event.stage.startsWith('chunk:') && event.status === 'parsed') {
+      const [first, last] = event.pages ?? [];
+      return `Read ${event.transactions?.length ?? 0} transactions from pages ${first}-${last}.`;
+    }
+    if (event.stage.startsWith('chunk:') && event.status === 'completed') {
+      return `Categorized ${event.transactions?.length ?? 0} transactions.`;
+    }
+    if (event.stage === 'personal_info' && event.status === 'completed' && event.personal_info) {
+      return 'Extracted the account holder details.';
+    }
+    if (event.stage === 'reconciliation' && event.status === 'completed' && event.report) {
+      return event.report.balanced
+        ? 'Statement balances reconcile.'
+        : `Statement balances do not fully reconcile (confidence: ${event.report.confidence}).`;
+    }
+    return null;
+  };
+
   const processStatementPDF = async (file: File) => {
     const formData = new FormData();
     formData.append('file', file);
 
-    const response = await fetch('/api/process-pdf', {
+    // The route streams NDJSON: pipeline events as each stage completes, then the result
+    const response = await fetch('/api/process-pdf?stream=1', {
       method: 'POST',
       body: formData,
     });
 
-    const data = await response.json();
-    
-    // Log the API response for debugging
-    console.log("API Response:", data);
-    console.log("Summary data from API:", data.summary);
-    
-    // Try to parse the summary data to see the actual values
-    try {
-      const parsedSummary = JSON.parse(data.summary);
-      console.log("Parsed summary data:", parsedSummary);
-      if (parsedSummary.summaryOfIncomeAndOutgoings) {
-        console.log("Income data:", parsedSummary.summaryOfIncomeAndOutgoings.income);
-        console.log("Outgoings data:", parsedSummary.summaryOfIncomeAndOutgoings.outgoings);
+    if (!response.ok || !response.body) {
+      const data = await response.json();
+      throw new Error(data.error || 'Failed to process PDF statement');
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffered = '';
+    let data: any = null;
+
+    const handleLine = (line: string) => {
+      if (!line.trim()) return;
+      const message = JSON.parse(line);
+      if (message.type === 'event') {
+        const content = describeStatementEvent(message.event);
+        if (content) {
+          setLeftChatMessages(prev => [
+            ...prev,
+            {
+              id: generateUniqueId(),
+              content,
+              isUser: false,
+            }
+          ]);
+        }
+      } else {
+        data = message;
       }
-    } catch (error) {
-      console.error("Error parsing summary data:", error);
+    };
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffered += decoder.decode(value, { stream: true });
+      const lines = buffered.split('\n');
+      buffered = lines.pop() ?? '';
+      lines.forEach(handleLine);
     }
+    handleLine(buffered);
 
-    if (response.ok) {
+    // Log the API response for debugging
+    console.log("API Response:", data);
+
+    if (data?.type === 'result') {
       // Use the actual summary data from the API response
       setSummaryData(data.summary);
     } else {
-      throw new Error(data.error || 'Failed to process PDF statement');
+      throw new Error(data?.error || 'Failed to process PDF statement');
     }
   };
 
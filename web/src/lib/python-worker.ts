@@ -0,0 +1,144 @@
+import { spawn, ChildProcessWithoutNullStreams } from 'child_process';
+import path from 'path';
+import readline from 'readline';
+
+// Persistent backend worker (backend/src/api/worker.py) speaking JSON lines over stdin/stdout.
+// Keeping one warm Python process avoids paying interpreter start-up, SDK imports and
+// client construction on every upload.
+
+const WORKER_SCRIPT = path.join(process.cwd(), '..', 'backend', 'src', 'api', 'worker.py');
+const PYTHON = process.env.PYTHON_BIN || 'python';
+// A job is retried on a fresh worker at most this many times if its worker exits first
+const MAX_ATTEMPTS = 2;
+
+export type JobType = 'statement' | 'passport' | 'driving_license';
+
+// Pipeline event of a statement job (see JobContext.emit), e.g. a chunk's transactions
+export interface WorkerEvent {
+  stage: string;
+  status: string;
+  [detail: string]: any;
+}
+
+interface PendingJob {
+  request: Record<string, unknown>;
+  resolve: (result: any) => void;
+  reject: (error: Error) => void;
+  onEvent?: (event: WorkerEvent) => void;
+  attempts: number;
+}
+
+class PythonWorker {
+  private child: ChildProcessWithoutNullStreams | null = null;
+  private pending = new Map<string, PendingJob>();
+  private nextId = 0;
+
+  submit(
+    type: JobType,
+    filePath: string,
+    outputDir?: string,
+    options: Record<string, unknown> = {},
+    onEvent?: (event: WorkerEvent) => void
+  ): Promise<any> {
+    return this.request({ type, path: filePath, output_dir: outputDir, options, events: Boolean(onEvent) }, onEvent);
+  }
+
+  // Prometheus text exposition of the worker's metrics (backend/src/utils/metrics.py)
+  async metrics(): Promise<string> {
+    const result = await this.request({ type: 'metrics' });
+    return result.text;
+  }
+
+  private request(body: Record<string, unknown>, onEvent?: (event: WorkerEvent) => void): Promise<any> {
+    const id = `${process.pid}-${Date.now()}-${this.nextId++}`;
+    const request = { id, ...body };
+    return new Promise((resolve, reject) => {
+      this.pending.set(id, { request, resolve, reject, onEvent, attempts: 0 });
+      this.send(id);
+    });
+  }
+
+  private send(id: string) {
+    const job = this.pending.get(id);
+    if (!job) return;
+    job.attempts += 1;
+    this.ensureStarted().stdin.write(JSON.stringify(job.request) + '\n');
+  }
+
+  private ensureStarted(): ChildProcessWithoutNullStreams {
+    if (this.child) return this.child;
+
+    const child = spawn(PYTHON, [WORKER_SCRIPT], { stdio: ['pipe', 'pipe', 'pipe'] });
+    this.child = child;
+    console.log(`Started Python worker ${child.pid}`);
+
+    readline.createInterface({ input: child.stdout }).on('line', (line) => this.onLine(line));
+    child.stderr.on('data', (data) => process.stderr.write(data));
+    child.on('exit', (code) => this.onExit(child, code));
+    child.on('error', (error) => {
+      console.error('Python worker error:', error);
+    });
+    return child;
+  }
+
+  private onLine(line: string) {
+    let response: {
+      id: string | null;
+      ok: boolean;
+      result?: any;
+      error?: string;
+      retry?: boolean;
+      event?: WorkerEvent;
+    };
+    try {
+      response = JSON.parse(line);
+    } catch {
+      console.warn('Ignoring non-protocol output from Python worker:', line);
+      return;
+    }
+    if (response.id === null) return;
+
+    const job = this.pending.get(response.id);
+    if (!job) return;
+    if (response.event) {
+      job.onEvent?.(response.event);
+      return;
+    }
+    if (response.retry) {
+      // The worker is recycling; the job is resent to its replacement when it exits
+      job.attempts -= 1;
+      return;
+    }
+    this.pending.delete(response.id);
+    if (response.ok) {
+      job.resolve(response.result);
+    } else {
+      job.reject(new Error(response.error || 'Worker job failed'));
+    }
+  }
+
+  private onExit(child: ChildProcessWithoutNullStreams, code: number | null) {
+    if (this.child === child) this.child = null;
+    console.log(`Python worker ${child.pid} exited with code ${code}`);
+
+    // Resubmit unanswered jobs to a fresh worker
+    for (const [id, job] of this.pending) {
+      if (job.attempts >= MAX_ATTEMPTS) {
+        this.pending.delete(id);
+        job.reject(new Error(`Python worker exited with code ${code}`));
+      } else {
+        this.send(id);
+      }
+    }
+  }
+}
+
+// Reuse one worker across route modules and hot reloads
+const globalForWorker = globalThis as unknown as { pythonWorker?: PythonWorker };
+
+export function getPythonWorker(): PythonWorker {
+  if (!globalForWorker.pythonWorker) {
+    globalForWorker.pythonWorker = new PythonWorker();
+  }
+  return globalForWorker.pythonWorker;
+}